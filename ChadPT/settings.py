@@ -76,12 +76,7 @@ WSGI_APPLICATION = 'ChadPT.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# DATABASES is built from the environment further down, once .env has been loaded.
 
 
 # Password validation
@@ -143,4 +138,105 @@ dotenv_path = BASE_DIR / '.env'
 # Load the .env file from the specified path
 load_dotenv(dotenv_path)
 
+# Database
+# DB_ENGINE picks the backend; SQLite gets a production profile: WAL so reads
+# carry on during writes, a busy timeout instead of immediate "database is
+# locked" errors, and write transactions that take the lock up front.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # safe with WAL; fsyncs at checkpoints only
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),  # bytes
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),  # negative means KiB
+    'temp_store': 'MEMORY',
+}
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': ';'.join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+        }
+    }
+# Keep connections open across requests instead of reconnecting every time
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 600))  # seconds
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# LLM client, shared by every view in the process
+# backend is 'gemini' or 'stub' (deterministic offline responses, no network needed)
+LLM_CLIENT = {
+    'BACKEND': os.getenv('LLM_BACKEND', 'gemini'),
+    'MODEL': os.getenv('LLM_MODEL', 'gemini-1.5-flash'),
+    'TIMEOUT': float(os.getenv('LLM_TIMEOUT', 60)),  # seconds per request
+    'API_KEY': os.getenv('GEMINI_API'),
+    'MAX_CONCURRENCY': int(os.getenv('LLM_MAX_CONCURRENCY', 4)),  # parallel requests per week plan
+}
+
+# The create page polls a generation job's status every few seconds. Turning this on
+# makes it stream the job as Server-Sent Events instead, which needs the site served
+# over ASGI (ChadPT.asgi, e.g. by uvicorn or daphne): under WSGI every open page would
+# hold a worker for the whole stream.
+GENERATION_EVENTS_STREAMING = os.getenv('GENERATION_EVENTS_STREAMING', 'False') == 'True'
+
+# A generation job's event stream ends after this long; the page then checks the job again and reconnects
+GENERATION_EVENTS_MAX_SECONDS = int(os.getenv('GENERATION_EVENTS_MAX_SECONDS', 120))
+
+# A running generation job whose worker hasn't finished it within the lease is
+# assumed lost (e.g. the worker was killed) and is run again, up to the maximum attempts
+GENERATION_JOB_LEASE_SECONDS = int(os.getenv('GENERATION_JOB_LEASE_SECONDS', 600))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv('GENERATION_JOB_MAX_ATTEMPTS', 3))
+
+# Hard cap on the tokens spent describing a user's past training in generation prompts
+PROMPT_HISTORY_TOKEN_BUDGET = int(os.getenv('PROMPT_HISTORY_TOKEN_BUDGET', 400))
+
+# LLM response cache
+# backend is one of 'lru' (in-process), 'django' (CACHES[CACHE_ALIAS]) or 'database' (LLMResponse table)
+LLM_RESPONSE_CACHE = {
+    'BACKEND': os.getenv('LLM_CACHE_BACKEND', 'lru'),
+    'MAX_ENTRIES': int(os.getenv('LLM_CACHE_MAX_ENTRIES', 1000)),
+    'TIMEOUT': int(os.getenv('LLM_CACHE_TIMEOUT', 60 * 60 * 24)),  # seconds
+    'CACHE_ALIAS': 'default',
+}
+
+# Prompt fragments and the 'django' response cache backend live here. Local
+# memory is per process, so multi-process deployments should point
+# CACHE_LOCATION at a shared cache (e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'chadpt'),
+    }
+}
+
+# Prompt fragments are invalidated by signals; the timeout only bounds stale entries
+PROMPT_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('PROMPT_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))  # seconds
+
+# Homepage sections are versioned per user and retired by signals; the timeout only frees memory
+HOMEPAGE_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('HOMEPAGE_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))  # seconds
+
+# The location and equipment catalog is versioned and retired by signals; the timeout only frees memory
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60 * 24))  # seconds
+
+# Workout and exercise partials are cached under their row's updated_at; the timeout only frees memory
+PARTIAL_CACHE_TIMEOUT = int(os.getenv('PARTIAL_CACHE_TIMEOUT', 60 * 60 * 24))  # seconds
+
+# Workouts older than this move to compressed per-user monthly archive rows (manage.py archive_workouts)
+WORKOUT_ARCHIVE_HORIZON_DAYS = int(os.getenv('WORKOUT_ARCHIVE_HORIZON_DAYS', 365))
+
 LOGOUT_REDIRECT_URL = 'homepage' 
\ No newline at end of file
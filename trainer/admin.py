@@ -5,6 +5,7 @@ from .models import (
     Location,
     UserPreference,
     WeightHistory,
+    WorkoutPlan,
     WorkoutSession,
     WarmUp,
     Query,
@@ -12,6 +13,8 @@ from .models import (
     CoolDown,
     # CoolDownExercise,
     Exercise,
+    GenerationJob,
+    LLMResponse,
     # CardioExercise,
 )
 
@@ -21,9 +24,12 @@ admin.site.register(Equipment)
 admin.site.register(Location)
 admin.site.register(UserPreference)
 admin.site.register(WeightHistory)
+admin.site.register(WorkoutPlan)
 admin.site.register(WorkoutSession)
 admin.site.register(WarmUp)
 admin.site.register(CoolDown)
 admin.site.register(Exercise)
 admin.site.register(Query)
+admin.site.register(GenerationJob)
+admin.site.register(LLMResponse)
 # admin.site.register(CardioExercise)
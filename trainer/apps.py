@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TrainerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trainer'
+
+    def ready(self):
+        # Registers the cache invalidation and summary maintenance handlers
+        from . import signals  # noqa: F401
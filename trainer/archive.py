@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+from .models import Query, WorkoutArchive, WorkoutPlan, WorkoutSession
+from .serializers import serialize_workout, workouts_with_details
+from .training_summary import deferred_summary_updates
+
+
+def archive_cutoff(days=None):
+    """
+    Returns the first date that stays in the hot tables: workouts dated
+    before it are archived.
+
+    Args:
+        days (int): Horizon in days. Defaults to settings.WORKOUT_ARCHIVE_HORIZON_DAYS.
+    """
+    if days is None:
+        days = settings.WORKOUT_ARCHIVE_HORIZON_DAYS
+    return date.today() - timedelta(days=days)
+
+
+def history_entry(workout):
+    """
+    Flattens a workout into the JSON-safe dict kept in archives and returned
+    by the history read path. Use it on workouts fetched with
+    workouts_with_details().select_related('location').
+
+    The numeric exercise columns are left out: they are derived from the
+    sets, reps and weight text, which is kept.
+    """
+    entry = serialize_workout(workout)
+    entry.update({
+        'date': workout.date.isoformat(),
+        'explanation': workout.explanation,
+        'location': workout.location.name if workout.location else None,
+        'workout_type': workout.workout_type,
+        'muscle_groups': workout.muscle_groups or [],
+        'complete': workout.complete,
+    })
+    # The render-cache stamps mean nothing once the rows are gone
+    del entry['updated_at']
+    for exercise, data in zip(workout.exercises.all(), entry['exercises']):
+        data['actual_weight'] = exercise.actual_weight
+        del data['updated_at']
+    return entry
+
+
+def months_to_archive(before):
+    """
+    Returns the (user, month) pairs holding workouts dated before the cutoff,
+    with how many each holds.
+
+    Returns:
+        list: Dicts with user_id, month (first day) and count.
+    """
+    return list(
+        WorkoutSession.objects.filter(date__lt=before)
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month')
+        .annotate(count=Count('id'))
+        .order_by('user_id', 'month')
+    )
+
+
+def archive_month(user_id, month, before):
+    """
+    Moves one user's workouts of one month (up to the cutoff) into that
+    month's archive row, merging with what is already archived, and deletes
+    them from the hot tables. Plans with no workouts left in the hot tables
+    are deleted too, with their queries kept in the archive.
+
+    Args:
+        user_id (int): Primary key of the UserPreference.
+        month (date): First day of the month.
+        before (date): Cutoff; later workouts are left alone.
+
+    Returns:
+        int: Workouts archived.
+    """
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    with transaction.atomic():
+        workouts = list(
+            workouts_with_details().select_related('location')
+            .filter(user_id=user_id, date__gte=month, date__lt=min(next_month, before))
+            .order_by('date', 'id')
+        )
+        if not workouts:
+            return 0
+
+        archive = WorkoutArchive.objects.select_for_update().filter(user_id=user_id, month=month).first()
+        if archive is None:
+            archive = WorkoutArchive(user_id=user_id, month=month)
+            contents = {'workouts': [], 'queries': []}
+        else:
+            contents = archive.unpack()
+        contents['workouts'] += [history_entry(workout) for workout in workouts]
+        contents['workouts'].sort(key=lambda entry: (entry['date'], entry['id']))
+
+        plan_ids = {workout.plan_id for workout in workouts}
+        WorkoutSession.objects.filter(pk__in=[workout.pk for workout in workouts]).delete()
+
+        finished_plans = WorkoutPlan.objects.filter(pk__in=plan_ids, workouts__isnull=True)
+        contents['queries'] += list(
+            Query.objects.filter(plan__in=finished_plans).values('plan_id', 'query', 'parameters')
+        )
+        finished_plans.delete()
+
+        archive.pack(contents)
+        archive.save()
+    return len(workouts)
+
+
+def archive_workouts(before):
+    """
+    Archives every workout dated before the cutoff, one transaction per user
+    and month. Training summaries are refreshed once per user at the end.
+
+    Args:
+        before (date): Cutoff, e.g. from archive_cutoff().
+
+    Returns:
+        list: The (user, month) dicts of months_to_archive(), with count set
+        to the workouts actually archived.
+    """
+    months = months_to_archive(before)
+    with deferred_summary_updates():
+        for row in months:
+            row['count'] = archive_month(row['user_id'], row['month'], before)
+    return months
+
+
+def iter_workout_history(preferences):
+    """
+    Yields a user's workouts newest first, from the hot tables and then from
+    the archive, as history_entry() dicts. Archive rows are only fetched and
+    decompressed once the hot workouts run out, so callers that stop early
+    never touch them.
+
+    Args:
+        preferences (UserPreference): The user's preferences.
+    """
+    hot = workouts_with_details().select_related('location').filter(user=preferences).order_by('-date', '-id')
+    for workout in hot:
+        yield history_entry(workout)
+    for archive in WorkoutArchive.objects.filter(user=preferences).order_by('-month').iterator():
+        yield from reversed(archive.unpack()['workouts'])
+
+
+def archived_queries(preferences):
+    """
+    Returns the plan queries kept in a user's archive rows.
+    """
+    queries = []
+    for archive in WorkoutArchive.objects.filter(user=preferences).order_by('-month').iterator():
+        queries += archive.unpack()['queries']
+    return queries
@@ -0,0 +1,135 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils.safestring import mark_safe
+
+from .models import CatalogVersion, Equipment, Location
+
+# The catalog version as read by the current request, per thread
+_request = threading.local()
+
+
+@receiver(request_started)
+@receiver(request_finished)
+def _forget_catalog_version(**kwargs):
+    # Read at most once per request, and never carried over to the next one
+    _request.version = None
+    _request.active = kwargs.get('signal') is request_started
+
+
+def catalog_version():
+    """
+    Returns the current version of the location and equipment catalog. It is
+    part of every catalog cache key, so bumping it retires them all at once.
+    It is read from the database, once per request, so every process sees
+    the same version whatever cache it uses.
+
+    Returns:
+        int: The version.
+    """
+    version = getattr(_request, 'version', None)
+    if version is None:
+        version = CatalogVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+        if version is None:
+            # Started from the clock (the field default), so a lost row never
+            # comes back as a version whose entries are still cached
+            version = CatalogVersion.objects.get_or_create(pk=1)[0].version
+        if getattr(_request, 'active', False):
+            _request.version = version
+    return version
+
+
+def invalidate_catalog():
+    """
+    Retires the cached catalog and everything rendered from it.
+    """
+    # No row yet: the next read starts a fresh version
+    CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1)
+    _request.version = None
+
+
+def get_catalog():
+    """
+    Returns every location and piece of equipment, building and caching them
+    on first use.
+
+    Returns:
+        dict: 'locations' and 'equipment' (lists of model instances) and
+        'location_equipment' (location id to a tuple of equipment ids).
+    """
+    key = f"catalog:{catalog_version()}"
+    catalog = cache.get(key)
+    if catalog is None:
+        locations = list(Location.objects.all())
+        location_equipment = {location.pk: [] for location in locations}
+        for location_id, equipment_id in Location.equipment.through.objects.values_list('location_id', 'equipment_id'):
+            location_equipment[location_id].append(equipment_id)
+        catalog = {
+            'locations': locations,
+            'equipment': list(Equipment.objects.all()),
+            'location_equipment': {
+                location_id: tuple(equipment_ids) for location_id, equipment_ids in location_equipment.items()
+            },
+        }
+        cache.set(key, catalog, settings.CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def get_locations():
+    return get_catalog()['locations']
+
+
+def get_location(location_id):
+    """
+    Returns the Location with the given primary key, or None.
+    """
+    return next((location for location in get_locations() if location.pk == location_id), None)
+
+
+def location_equipment(location_id):
+    """
+    Returns the equipment available at a location, in catalog order.
+
+    Args:
+        location_id (int): Primary key of the Location.
+
+    Returns:
+        list: Equipment instances.
+    """
+    catalog = get_catalog()
+    equipment_ids = set(catalog['location_equipment'].get(location_id, ()))
+    return [equipment for equipment in catalog['equipment'] if equipment.pk in equipment_ids]
+
+
+def location_choices():
+    return [(location.pk, str(location)) for location in get_locations()]
+
+
+def equipment_choices():
+    return [(equipment.pk, str(equipment)) for equipment in get_catalog()['equipment']]
+
+
+def cached_render(render, *parts):
+    """
+    Returns render()'s HTML, cached until the catalog changes.
+
+    Args:
+        render (callable): Renders the HTML.
+        *parts: Whatever else the HTML depends on, e.g. the field name and
+            widget attributes. Their repr() goes into the cache key.
+
+    Returns:
+        SafeString: The HTML.
+    """
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    key = f"catalog-render:{catalog_version()}:{digest}"
+    html = cache.get(key)
+    if html is None:
+        html = str(render())
+        cache.set(key, html, settings.CATALOG_CACHE_TIMEOUT)
+    return mark_safe(html)
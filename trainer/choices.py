@@ -0,0 +1,112 @@
+from types import MappingProxyType
+
+from .lists_and_dictionaries import (
+    DAYS_OF_WEEK_CHOICES,
+    EATING_HABITS_CHOICES,
+    EQUIPMENT_CHOICES,
+    EQUIPMENT_GROUP_CHOICES,
+    FITNESS_LEVEL_CHOICES,
+    GENDER_CHOICES,
+    GENERATION_MODE_CHOICES,
+    GOAL_CHOICES,
+    MUSCLE_GROUP_CHOICES,
+    PLAN_DURATION_CHOICES,
+    WORKOUT_INTENSITY_CHOICES,
+    WORKOUT_TIME_CHOICES,
+    WORKOUT_TYPE_PREFERENCE_CHOICES,
+)
+
+
+class ChoiceSet:
+    """
+    Read-only lookups over one list of (key, label) choices, built once so
+    that mapping a stored key to its label (or back) is a dict lookup rather
+    than a scan of the list.
+    """
+
+    def __init__(self, choices):
+        self.choices = tuple(choices)
+        self.labels = MappingProxyType(dict(self.choices))
+        # The first key wins if two share a label
+        self.keys = MappingProxyType({label: key for key, label in reversed(self.choices)})
+
+    def label(self, key, default=None):
+        """
+        Returns the label of key, or default if it is not a known key.
+        """
+        return self.labels.get(key, default)
+
+    def labels_for(self, keys):
+        """
+        Returns the labels of several keys, e.g. a MultiSelectField value.
+        Unknown keys are returned as they are.
+        """
+        return [self.labels.get(key.strip(), key.strip()) for key in keys or []]
+
+    def key(self, label, default=None):
+        """
+        Returns the key whose label is label, or default.
+        """
+        return self.keys.get(label, default)
+
+    def __iter__(self):
+        return iter(self.choices)
+
+    def __contains__(self, key):
+        return key in self.labels
+
+
+GOALS = ChoiceSet(GOAL_CHOICES)
+DAYS_OF_WEEK = ChoiceSet(DAYS_OF_WEEK_CHOICES)
+WORKOUT_TYPES = ChoiceSet(WORKOUT_TYPE_PREFERENCE_CHOICES)
+FITNESS_LEVELS = ChoiceSet(FITNESS_LEVEL_CHOICES)
+EATING_HABITS = ChoiceSet(EATING_HABITS_CHOICES)
+GENDERS = ChoiceSet(GENDER_CHOICES)
+MUSCLE_GROUPS = ChoiceSet(MUSCLE_GROUP_CHOICES)
+PLAN_DURATIONS = ChoiceSet(PLAN_DURATION_CHOICES)
+GENERATION_MODES = ChoiceSet(GENERATION_MODE_CHOICES)
+WORKOUT_TIMES = ChoiceSet(WORKOUT_TIME_CHOICES)
+WORKOUT_INTENSITIES = ChoiceSet(WORKOUT_INTENSITY_CHOICES)
+EQUIPMENT_GROUPS = ChoiceSet(EQUIPMENT_GROUP_CHOICES)
+
+# By name, for the template filters
+REGISTRY = MappingProxyType({
+    'goal': GOALS,
+    'day_of_week': DAYS_OF_WEEK,
+    'workout_type': WORKOUT_TYPES,
+    'fitness_level': FITNESS_LEVELS,
+    'eating_habits': EATING_HABITS,
+    'gender': GENDERS,
+    'muscle_group': MUSCLE_GROUPS,
+    'plan_duration': PLAN_DURATIONS,
+    'generation_mode': GENERATION_MODES,
+    'workout_time': WORKOUT_TIMES,
+    'workout_intensity': WORKOUT_INTENSITIES,
+    'equipment_group': EQUIPMENT_GROUPS,
+})
+
+# The predefined equipment as (name, group) pairs. A few items, e.g. 'Battle
+# Ropes', are listed under more than one group.
+EQUIPMENT = tuple(EQUIPMENT_CHOICES)
+
+# Equipment names of each group, in list order
+EQUIPMENT_BY_GROUP = MappingProxyType({
+    group: tuple(name for name, item_group in EQUIPMENT if item_group == group)
+    for group, _ in EQUIPMENT_GROUP_CHOICES
+})
+
+# Groups of each equipment name
+EQUIPMENT_GROUPS_BY_NAME = MappingProxyType({
+    name: tuple(group for item_name, group in EQUIPMENT if item_name == name)
+    for name, _ in EQUIPMENT
+})
+
+
+def get_choice_set(name):
+    """
+    Returns the registered ChoiceSet called name.
+
+    Raises:
+        KeyError: If no ChoiceSet has that name.
+    """
+    return REGISTRY[name]
@@ -16,11 +16,64 @@ from .lists_and_dictionaries import (
     DAYS_OF_WEEK_CHOICES,
     EATING_HABITS_CHOICES,
     PLAN_DURATION_CHOICES,
-    MUSCLE_GROUP_CHOICES
+    MUSCLE_GROUP_CHOICES,
+    GENERATION_MODE_CHOICES
 )
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.forms import AuthenticationForm
 from django.utils import timezone
+from django.forms.models import ModelChoiceIterator
+
+from .catalog import cached_render, equipment_choices, location_choices
+
+
+class CatalogChoiceIterator(ModelChoiceIterator):
+    """
+    Yields a catalog field's choices from the cached catalog instead of
+    running the field's queryset. The queryset is still used to validate
+    submitted values.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from self.field.catalog_choices()
+
+    def __len__(self):
+        return len(self.field.catalog_choices()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.catalog_choices())
+
+
+class CatalogChoiceField(forms.ModelChoiceField):
+    iterator = CatalogChoiceIterator
+
+    def __init__(self, catalog_choices, **kwargs):
+        # A function returning the (pk, label) choices, e.g. catalog.location_choices
+        self.catalog_choices = catalog_choices
+        super().__init__(**kwargs)
+
+
+class CatalogMultipleChoiceField(forms.ModelMultipleChoiceField):
+    iterator = CatalogChoiceIterator
+
+    def __init__(self, catalog_choices, **kwargs):
+        self.catalog_choices = catalog_choices
+        super().__init__(**kwargs)
+
+
+class CatalogCheckboxSelectMultiple(forms.CheckboxSelectMultiple):
+    """
+    Checkboxes for a catalog field. With nothing ticked, the rendered HTML is
+    cached until the catalog changes.
+    """
+
+    def render(self, name, value, attrs=None, renderer=None):
+        if value:
+            return super().render(name, value, attrs, renderer)
+        render = super().render
+        return cached_render(lambda: render(name, value, attrs, renderer), self.template_name, name, self.attrs, attrs)
 
 
 class CustomAuthenticationForm(AuthenticationForm):
@@ -90,7 +143,8 @@ class LocationForm(forms.Form):
         widget=forms.RadioSelect,
         help_text="Select your preferred workout location or choose to create a new location."
     )
-    existing_location = forms.ModelChoiceField(
+    existing_location = CatalogChoiceField(
+        location_choices,
         queryset=Location.objects.all(),
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'}),
@@ -114,9 +168,10 @@ class LocationForm(forms.Form):
         widget=forms.TextInput(attrs={'placeholder': 'Location Type'}),
         help_text="Enter the type of location (e.g., Gym, Park)."
     )
-    new_location_equipment = forms.ModelMultipleChoiceField(
+    new_location_equipment = CatalogMultipleChoiceField(
+        equipment_choices,
         queryset=Equipment.objects.all(),
-        widget=forms.CheckboxSelectMultiple,
+        widget=CatalogCheckboxSelectMultiple,
         required=False,
         help_text="Select available equipment for the new location."
     )
@@ -138,7 +193,8 @@ class WorkoutPlanForm(forms.Form):
         initial=now().date(),
     )
 
-    preferred_location = forms.ModelChoiceField(
+    preferred_location = CatalogChoiceField(
+        location_choices,
         queryset=Location.objects.all(),
         label="Select Workout Location (Optional)",
         required=False,
@@ -159,6 +215,14 @@ class WorkoutPlanForm(forms.Form):
         required=False,
     )
 
+    generation_mode = forms.ChoiceField(
+        choices=GENERATION_MODE_CHOICES,
+        label="Generation Mode",
+        initial='single',
+        required=False,
+        help_text="Week plans can be generated one day per request, in parallel, which is faster.",
+    )
+
     def clean_start_date(self):
         """
         The workout can not be in the past
@@ -229,7 +293,8 @@ class UserUpdateForm(forms.ModelForm):
         required=False,
         initial=['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
     )
-    preferred_location = forms.ModelChoiceField(
+    preferred_location = CatalogChoiceField(
+        location_choices,
         queryset=Location.objects.all(),
         required=False,
         help_text="Select your preferred workout location."
@@ -0,0 +1,480 @@
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import (
+    GenerationJob,
+    Location,
+    Query,
+    WeightHistory,
+    WorkoutPlan,
+    WorkoutSession,
+)
+from .helper_functions import (
+    workout_day_payload_text,
+    workout_payload_text,
+)
+from .json_stream import iter_json_objects
+from .lists_and_dictionaries import MUSCLE_GROUP_CHOICES
+from .llm import get_llm_client
+from .persistence import save_workout_plan
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# How many past sessions feed the training history summary of a prompt
+HISTORY_SESSIONS = 60
+
+# How long a replaced workout's ID keeps resolving to its replacement, so a
+# repeated click that arrives after the first one finished still gets the new workout
+REPLACED_WORKOUT_TIMEOUT = 60  # seconds
+
+_enqueue_flight = SingleFlight()
+
+
+class MissingDaysError(ValueError):
+    """
+    Raised when some days of a parallel week plan could not be generated,
+    even on a retry. The other days are saved.
+    """
+
+    def __init__(self, days):
+        self.days = days
+        super().__init__(
+            "These days could not be generated: " + ", ".join(day.strftime('%A %d %B') for day in days) + "."
+        )
+
+
+def build_job_parameters(cleaned_data, preferences):
+    """
+    Collects the workout plan form input into a JSON-serialisable dict that
+    can be stored on a GenerationJob and replayed by the worker.
+
+    Args:
+        cleaned_data (dict): The cleaned data of a valid WorkoutPlanForm.
+        preferences (UserPreference): The requesting user's preferences, used
+            for any values left blank on the form.
+
+    Returns:
+        dict: The generation parameters.
+    """
+    location = cleaned_data.get('preferred_location') or preferences.preferred_location
+    return {
+        'plan_duration': cleaned_data.get('plan_duration'),
+        'start_date': cleaned_data.get('start_date').isoformat(),
+        'location_id': location.id if location else None,
+        'workout_type': cleaned_data.get('preferred_workout_type') or preferences.workout_type_preference,
+        'workout_length': cleaned_data.get('workout_length') or preferences.preferred_workout_duration,
+        'generation_mode': cleaned_data.get('generation_mode') or 'single',
+    }
+
+
+def hash_job_parameters(parameters):
+    """
+    Hashes generation parameters so equal form input gives an equal hash,
+    whatever the key order.
+    """
+    normalised = json.dumps(parameters, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(normalised.encode('utf-8')).hexdigest()
+
+
+def _lease_cutoff():
+    # Jobs started (or, for pending ones, queued) before this are stale
+    return timezone.now() - timedelta(seconds=settings.GENERATION_JOB_LEASE_SECONDS)
+
+
+def enqueue_generation_job(preferences, parameters):
+    """
+    Queues a workout plan generation for the worker. If the user already has
+    a recent unfinished job with the same parameters (e.g. a double-clicked
+    Submit), that job is returned instead of queueing a second LLM call.
+
+    Returns:
+        GenerationJob: The pending or running job for these parameters.
+    """
+    input_hash = hash_job_parameters(parameters)
+
+    def enqueue():
+        # A duplicate submission joins the job that is already queued or
+        # running, unless it has outlived its lease and is probably lost
+        cutoff = _lease_cutoff()
+        job = GenerationJob.objects.filter(
+            Q(status=GenerationJob.STATUS_PENDING, created_at__gte=cutoff)
+            | Q(status=GenerationJob.STATUS_RUNNING, started_at__gte=cutoff),
+            user=preferences,
+            input_hash=input_hash,
+        ).first()
+        return job or GenerationJob.objects.create(user=preferences, parameters=parameters, input_hash=input_hash)
+
+    job, _ = _enqueue_flight.do((preferences.pk, input_hash), enqueue)
+    return job
+
+
+def fail_abandoned_jobs():
+    """
+    Marks running jobs that outlived their lease on their last attempt as
+    failed, along with their plans.
+
+    Returns:
+        int: The number of jobs failed.
+    """
+    abandoned = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING,
+        started_at__lt=_lease_cutoff(),
+        attempts__gte=settings.GENERATION_JOB_MAX_ATTEMPTS,
+    )
+    plan_ids = list(abandoned.exclude(plan=None).values_list('plan_id', flat=True))
+    failed = abandoned.update(
+        status=GenerationJob.STATUS_FAILED,
+        error="The workout plan could not be generated. Please try again.",
+        finished_at=timezone.now(),
+    )
+    WorkoutPlan.objects.filter(pk__in=plan_ids).update(status=WorkoutPlan.STATUS_FAILED)
+    return failed
+
+
+def claim_next_job():
+    """
+    Atomically claims the oldest pending job, or a running one whose lease ran
+    out. The conditional update means two workers polling the same table can
+    never claim the same job twice.
+
+    Returns:
+        GenerationJob or None: The claimed job, or None if the queue is empty.
+    """
+    fail_abandoned_jobs()
+    claimable = GenerationJob.objects.filter(
+        Q(status=GenerationJob.STATUS_PENDING)
+        | Q(status=GenerationJob.STATUS_RUNNING, started_at__lt=_lease_cutoff())
+    )
+    for job in claimable.order_by('created_at')[:10]:
+        # The job must still be as it was read: a worker that claimed it in
+        # between has changed its status or start time
+        claimed = GenerationJob.objects.filter(
+            pk=job.pk, status=job.status, started_at=job.started_at
+        ).update(
+            status=GenerationJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def plan_week_days(preferences, start_date):
+    """
+    Picks the dates of a week plan: the user's workout days in the seven days
+    from start_date, or every day if they haven't chosen any.
+    """
+    week = [start_date + timedelta(days=offset) for offset in range(7)]
+    workout_days = {day.lower() for day in preferences.workout_days or []}
+    return [day for day in week if day.strftime('%A').lower() in workout_days] or week
+
+
+def assign_muscle_groups(days, workout_sessions):
+    """
+    Assigns each day of a fanned-out week a muscle group focus up front, so the
+    independent per-day requests don't all train the same thing. Groups that
+    were trained least recently are used first.
+
+    Args:
+        days (list): The dates of the plan.
+        workout_sessions (list): Recent WorkoutSessions, newest first.
+
+    Returns:
+        dict: Maps each date to a muscle group label.
+    """
+    groups = [label for key, label in MUSCLE_GROUP_CHOICES if key != 'full_body']
+    last_trained = {}
+    for session in workout_sessions:
+        for group in session.muscle_groups or []:
+            last_trained.setdefault(str(group).lower(), session.date)
+    rotation = sorted(groups, key=lambda group: last_trained.get(group.lower(), date.min))
+    return {day: rotation[index % len(rotation)] for index, day in enumerate(days)}
+
+
+def record_plan_inputs(preferences, plan, parameters, weight_history, workout_sessions):
+    """
+    Stores what a plan was generated from: the job parameters and the IDs of
+    the weigh-ins and workouts its training history was built from. Single
+    days are regenerated from this record rather than from the full prompt.
+
+    Returns:
+        Query: The saved record.
+    """
+    return Query.objects.create(
+        plan=plan,
+        user=preferences,
+        parameters={
+            **parameters,
+            'weight_history_ids': [entry.id for entry in weight_history],
+            'workout_history_ids': [session.id for session in workout_sessions],
+        },
+    )
+
+
+def _generate_days_in_parallel(preferences, parameters, plan, location, weight_history, workout_sessions):
+    """
+    Splits a week plan into one request per day and runs them concurrently,
+    saving each day to the plan as soon as it arrives.
+
+    Returns:
+        tuple: (created WorkoutSession instances, dates that failed twice).
+    """
+    days = plan_week_days(preferences, date.fromisoformat(parameters['start_date']))
+    focus = assign_muscle_groups(days, workout_sessions)
+    week_outline = ', '.join(f"{day.strftime('%A')}: {focus[day]}" for day in days)
+
+    prompts = {}
+    for day in days:
+        prompts[day] = workout_payload_text(
+            'day',
+            day,
+            preferences,
+            parameters['workout_type'],
+            parameters['workout_length'],
+            location,
+            weight_history,
+            workout_sessions,
+            constraints=(
+                f"This workout is one day of a weekly plan ({week_outline}). "
+                f"Focus this workout on: {focus[day]}. Do not program the muscle groups of the other days."
+            ),
+        )
+    record_plan_inputs(preferences, plan, parameters, weight_history, workout_sessions)
+
+    client = get_llm_client()
+    max_workers = getattr(settings, 'LLM_CLIENT', {}).get('MAX_CONCURRENCY', 4)
+    sessions = []
+    pending = list(prompts)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Only the LLM calls run in the pool; saving stays on this thread's DB connection.
+        # Days that fail are retried once, after the first round
+        for attempt in (1, 2):
+            futures = {executor.submit(_generate_day, client, prompts[day]): day for day in pending}
+            pending = []
+            for future in as_completed(futures):
+                day = futures[future]
+                try:
+                    # The workout goes on the day it was asked for, whatever date the reply gave it
+                    workout_data = [{**future.result()[0], 'date': day}]
+                    # A reply that can't be saved fails its day, like one that can't be parsed
+                    sessions += save_workout_plan(preferences, plan, workout_data, location=location)
+                except Exception:
+                    logger.exception("Generating %s of plan %s failed (attempt %s)", day, plan.pk, attempt)
+                    pending.append(day)
+            if not pending:
+                break
+    return sessions, sorted(pending)
+
+
+def parse_single_workout(response_text):
+    """
+    Parses a response that should hold one workout. It is parsed object by
+    object, so a bare object rather than a list still works.
+
+    Returns:
+        list: The first workout, as a one-workout list.
+
+    Raises:
+        ValueError: If the response holds no workout.
+    """
+    workout_data = list(iter_json_objects([response_text]))
+    if not workout_data:
+        raise ValueError("The response did not contain a workout.")
+    return workout_data[:1]
+
+
+def _generate_day(client, prompt):
+    # Runs in the pool: one LLM call for one day
+    return client.generate(prompt, parse=parse_single_workout)
+
+
+def generate_workout_plan(preferences, parameters, plan):
+    """
+    Builds the prompt and streams the LLM response, saving each workout as
+    soon as its JSON object is complete so it can be shown straight away.
+    Week plans in 'parallel' mode are fanned out into one request per day.
+
+    Args:
+        preferences (UserPreference): The user the plan is for.
+        parameters (dict): Generation parameters from build_job_parameters.
+        plan (WorkoutPlan): The plan to save the workouts to.
+
+    Returns:
+        list: The created WorkoutSession instances.
+    """
+    weight_history = WeightHistory.objects.filter(user=preferences).with_bmi().order_by('-date')[:20]
+    # The history is summarised to a fixed token budget, so a longer window costs no prompt space
+    workout_sessions = WorkoutSession.objects.filter(user=preferences).order_by('-date').prefetch_related('exercises')[:HISTORY_SESSIONS]
+    location = Location.objects.get(pk=parameters['location_id'])
+
+    if parameters['plan_duration'] == 'week' and parameters.get('generation_mode') == 'parallel':
+        sessions, missing_days = _generate_days_in_parallel(
+            preferences, parameters, plan, location, weight_history, list(workout_sessions)
+        )
+        if not sessions:
+            raise ValueError("None of the days of the plan could be generated.")
+        if missing_days:
+            raise MissingDaysError(missing_days)
+        return sessions
+
+    payload_text = workout_payload_text(
+        parameters['plan_duration'],
+        date.fromisoformat(parameters['start_date']),
+        preferences,
+        parameters['workout_type'],
+        parameters['workout_length'],
+        location,
+        weight_history,
+        workout_sessions,
+    )
+    record_plan_inputs(preferences, plan, parameters, weight_history, workout_sessions)
+
+    sessions = []
+    for workout in iter_json_objects(get_llm_client().stream(payload_text)):
+        sessions += save_workout_plan(preferences, plan, [workout], location=location)
+    if not sessions:
+        raise ValueError("The response did not contain any workouts.")
+    return sessions
+
+
+def create_plan(preferences, parameters):
+    """
+    Creates the plan a generation job fills in, covering the dates the
+    parameters ask for.
+
+    Returns:
+        WorkoutPlan: The new plan, in the generating state.
+    """
+    start_date = date.fromisoformat(parameters['start_date'])
+    return WorkoutPlan.objects.create(
+        user=preferences,
+        start_date=start_date,
+        end_date=start_date + timedelta(days=6 if parameters['plan_duration'] == 'week' else 0),
+        status=WorkoutPlan.STATUS_GENERATING,
+        model_name=getattr(settings, 'LLM_CLIENT', {}).get('MODEL', ''),
+    )
+
+
+def run_generation_job(job):
+    """
+    Runs a claimed job to completion, recording the outcome on the job row.
+
+    Returns:
+        GenerationJob: The finished job.
+    """
+    if job.plan_id:
+        # A retry after a lost worker: its partial plan is replaced by this run's
+        job.plan.delete()
+    # Publish the plan up front so the browser can follow it as it is saved
+    job.plan = create_plan(job.user, job.parameters)
+    # Only the latest attempt writes to the job: if this run outlives its
+    # lease, another worker claims the job again and owns it from then on
+    GenerationJob.objects.filter(pk=job.pk, attempts=job.attempts).update(plan=job.plan)
+    try:
+        generate_workout_plan(job.user, job.parameters, job.plan)
+        job.status = GenerationJob.STATUS_DONE
+        job.plan.status = WorkoutPlan.STATUS_READY
+    except MissingDaysError as e:
+        # The rest of the week is saved and usable; the user is told which days are missing
+        logger.warning("Generation job %s finished without some days: %s", job.pk, e)
+        job.status = GenerationJob.STATUS_DONE
+        job.plan.status = WorkoutPlan.STATUS_READY
+        job.error = str(e)
+    except Exception as e:
+        logger.exception("Generation job %s failed", job.pk)
+        job.status = GenerationJob.STATUS_FAILED
+        job.plan.status = WorkoutPlan.STATUS_FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    finished = GenerationJob.objects.filter(pk=job.pk, attempts=job.attempts).update(
+        status=job.status, error=job.error, finished_at=job.finished_at
+    )
+    if finished:
+        WorkoutPlan.objects.filter(pk=job.plan.pk).update(status=job.plan.status)
+    else:
+        logger.warning("Generation job %s was claimed again before attempt %s finished", job.pk, job.attempts)
+        job.plan.delete()
+    return job
+
+
+def replaced_workout_key(workout_id):
+    return f"replaced-workout:{workout_id}"
+
+
+def replacement_workout(workout_id):
+    """
+    Returns the workout that replaced the given (deleted) one.
+
+    Raises:
+        WorkoutSession.DoesNotExist: If the replacement is no longer recorded.
+    """
+    replacement_id = cache.get(replaced_workout_key(workout_id))
+    if replacement_id is None:
+        raise WorkoutSession.DoesNotExist("The workout was already replaced.")
+    return WorkoutSession.objects.get(pk=replacement_id)
+
+
+def regenerate_workout(preferences, workout):
+    """
+    Asks the LLM for a new version of one workout of a plan and swaps it in
+    for the old one. The prompt is built from the plan's recorded parameters,
+    with the plan's other workouts as constraints. The old workout is only
+    deleted once the new one has been generated.
+
+    Args:
+        preferences (UserPreference): Owner of the workout.
+        workout (WorkoutSession): The workout to replace.
+
+    Returns:
+        WorkoutSession: The new workout.
+    """
+    # Plans generated before parameters were recorded fall back to the user's preferences
+    parameters = Query.objects.filter(plan_id=workout.plan_id).values_list('parameters', flat=True).first() or {}
+    location = (
+        Location.objects.filter(pk=parameters.get('location_id')).first()
+        or workout.location
+        or preferences.preferred_location
+    )
+    siblings = (
+        WorkoutSession.objects.filter(plan_id=workout.plan_id)
+        .exclude(pk=workout.pk)
+        .only('name', 'date', 'workout_type', 'muscle_groups')
+        .order_by('date')
+    )
+    prompt = workout_day_payload_text(
+        workout.date,
+        preferences,
+        parameters.get('workout_type') or preferences.workout_type_preference,
+        parameters.get('workout_length') or preferences.preferred_workout_duration,
+        location,
+        list(siblings),
+        replaced=workout,
+    )
+
+    workout_data = get_llm_client().generate(prompt, use_cache=True, parse=parse_single_workout)
+
+    with transaction.atomic():
+        # The delete, not the earlier read, decides who replaces the workout: a
+        # request in another process may have replaced it in the meantime.
+        # This cascades to delete WarmUp, CoolDown, and Exercises
+        deleted, _ = WorkoutSession.objects.filter(pk=workout.pk).delete()
+        if not deleted:
+            return replacement_workout(workout.pk)
+        # The replacement takes the replaced workout's day, whatever date the LLM gave it
+        replacement = {**workout_data[0], 'date': workout.date}
+        new_workout = save_workout_plan(preferences, workout.plan, [replacement], location=location)[0]
+        # Recorded before commit, so a request whose delete waited on this one finds it
+        cache.set(replaced_workout_key(workout.pk), new_workout.id, REPLACED_WORKOUT_TIMEOUT)
+    return new_workout
@@ -3,59 +3,20 @@ from pathlib import Path
 import os
 import random
 import json
-import google.generativeai as genai
 import requests
 import re
-import datetime
 from . models import Location
-import json
+from .json_stream import strip_code_fence, parse_json_objects
+from .history_summary import summarize_training_history, estimate_tokens
+from .training_summary import get_training_summary
+from .prompt_fragments import WORKOUT_FORMAT_TRAILER, location_fragment, personal_fragments
+from django.conf import settings
+import logging
 from datetime import date
 
-from .lists_and_dictionaries import (
-    EQUIPMENT_GROUP_CHOICES, 
-    EQUIPMENT_CHOICES, 
-    GOAL_CHOICES, 
-    WORKOUT_TYPE_PREFERENCE_CHOICES,  
-    FITNESS_LEVEL_CHOICES, 
-    WORKOUT_TIME_CHOICES,
-    GENDER_CHOICES,
-    WORKOUT_TYPE_PREFERENCE_CHOICES,
-    GOAL_CHOICES,
-    DAYS_OF_WEEK_CHOICES,
-    EATING_HABITS_CHOICES
-)
-
-def get_value_from_choices(key, choices):
-    """
-    Retrieve the value corresponding to a given key from a list of tuples.
-
-    Args:
-        key (str): The key to search for in the list of tuples.
-        choices (list): A list of tuples where each tuple contains a key-value pair.
-
-    Returns:
-        str: The value corresponding to the key if found, otherwise None.
-    """
-    for choice_key, choice_value in choices:
-        if choice_key == key:
-            return choice_value
-    return None
-
-
-
-def replace_text(text, new_date):
-    # Replace the date in the format YYYY-MM-DD
-    text = re.sub(r'The workout should start on \d{4}-\d{2}-\d{2}', f'The workout should start on {new_date}', text)
-    
-    # Replace 'one day tailored' with 'one week tailored' if it exists in the text
-    text = re.sub(r'one week tailored', 'one day tailored', text)
-    
-    return text
-
-def generate_random_id():
-    """Generates a random 20-digit ID."""
-    return ''.join([str(random.randint(0, 9)) for _ in range(20)])
+from .choices import DAYS_OF_WEEK, EATING_HABITS, FITNESS_LEVELS, GOALS, WORKOUT_TYPES
 
+logger = logging.getLogger(__name__)
 
 def safe_join(field):
     """
@@ -70,12 +31,13 @@ def safe_join(field):
     return ', '.join(field) if isinstance(field, list) else field
 
 
-import json
-import re
-
 def convert_text_to_json(text):
     """
-    Converts a JSON-like text input to a Python object.
+    Converts a JSON-like LLM response to a Python object.
+
+    Well-formed responses are parsed directly. Malformed ones are parsed
+    object by object with the tolerant streaming parser, so one bad token
+    only loses the object it appears in rather than the whole plan.
 
     Args:
         text (str): A string containing JSON-formatted data, possibly wrapped in delimiters.
@@ -84,31 +46,20 @@ def convert_text_to_json(text):
         dict or list: A Python object (e.g., list or dictionary) parsed from the JSON text.
 
     Raises:
-        ValueError: If the input text is not valid JSON or is empty.
+        ValueError: If no JSON could be recovered from the input or it is empty.
     """
     # Check if the text is empty or None
     if not text or not text.strip():
         raise ValueError("Input text is empty or invalid.")
-    
+
+    sanitized_text = strip_code_fence(text)
     try:
-        # Normalize and remove common wrappers such as backticks or markers
-        sanitized_text = text.strip()
-        
-        # Remove ```json or ``` if present
-        if sanitized_text.startswith("```json") or sanitized_text.startswith("```"):
-            sanitized_text = sanitized_text.lstrip("```json").lstrip("```").strip()
-        
-        # Remove ending backticks if present
-        if sanitized_text.endswith("```"):
-            sanitized_text = sanitized_text.rstrip("```").strip()
-        
-        # Fix invalid JSON (e.g., unquoted strings in values)
-        sanitized_text = re.sub(r'(?<="reps": )([^",\]}]+)', r'"\1"', sanitized_text)
-        
-        # Parse the sanitized JSON
         return json.loads(sanitized_text)
     except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON format: {e}\nInput text: {sanitized_text[:2000]}...")
+        workouts = parse_json_objects(sanitized_text)
+        if not workouts:
+            raise ValueError(f"Invalid JSON format: {e}\nInput text: {sanitized_text[:2000]}...")
+        return workouts
 
     
 class CustomJSONEncoder(json.JSONEncoder):
@@ -120,52 +71,22 @@ class CustomJSONEncoder(json.JSONEncoder):
 
 
 
-def personal_details_dict(preferences):
-        GOAL_CHOICES_DICT = dict(GOAL_CHOICES)
-        # Ensure `fitness_goals` is converted into a list of strings
-        fitness_goals_list = preferences.fitness_goals or []
-
-        # Map fitness goals to their descriptions
-        mapped_fitness_goals = [
-            GOAL_CHOICES_DICT.get(goal.strip(), goal.strip())
-            for goal in fitness_goals_list
-        ]
-
-        DAYS_OF_WEEK_CHOICES_DICT = dict(DAYS_OF_WEEK_CHOICES)
-        # Ensure `fitness_goals` is converted into a list of strings
-        days_of_week_list = preferences.workout_days or []
-
-        # Map fitness goals to their descriptions
-        mapped_days_of_week = [
-            DAYS_OF_WEEK_CHOICES_DICT.get(day.strip(), day.strip())
-            for day in days_of_week_list
-        ]
-
-        WORKOUT_TYPE_PREFERENCE_DICT = dict(WORKOUT_TYPE_PREFERENCE_CHOICES)
-        workout_type_description = WORKOUT_TYPE_PREFERENCE_DICT.get(preferences.workout_type_preference, preferences.workout_type_preference)
-
-        EATING_HABITS_CHOICES_DICT = dict(EATING_HABITS_CHOICES)
-        eating_habit_description = EATING_HABITS_CHOICES_DICT.get(preferences.eating_habits, preferences.eating_habits)
-
-        FITNESS_LEVEL_CHOICES_DICT = dict(FITNESS_LEVEL_CHOICES)
-        fitness_level_description = FITNESS_LEVEL_CHOICES_DICT.get(preferences.fitness_level, preferences.fitness_level)
-
-
+def personal_details_dict(preferences, summary=None):
         user_details = {
             "firstname": preferences.firstname,
             "lastname": preferences.lastname,
             "dob": preferences.dob,
             "age": preferences.age,  # Calculated field
             "height": preferences.height,
-            "bmi": preferences.bmi,  # Calculated field
+            "bmi": (summary or get_training_summary(preferences)).latest_bmi,  # Maintained on write
             "gender": preferences.gender,
-            "fitness_level": fitness_level_description,
-            "eating_habits": eating_habit_description,
-            "workout_type_preference": workout_type_description,  # Correctly join list items
+            "fitness_level": FITNESS_LEVELS.label(preferences.fitness_level, preferences.fitness_level),
+            "eating_habits": EATING_HABITS.label(preferences.eating_habits, preferences.eating_habits),
+            "workout_type_preference": WORKOUT_TYPES.label(preferences.workout_type_preference, preferences.workout_type_preference),
             "preferred_location": preferences.preferred_location.name if preferences.preferred_location else "Not specified",
             "preferred_workout_duration": preferences.preferred_workout_duration,
-            "fitness_goals": mapped_fitness_goals,  # Correctly join list items
-            "workout_days": mapped_days_of_week,
+            "fitness_goals": GOALS.labels_for(preferences.fitness_goals),
+            "workout_days": DAYS_OF_WEEK.labels_for(preferences.workout_days),
         }
         return user_details
 
@@ -179,6 +100,8 @@ def workout_payload_text(
     location,
     weight_history,
     workout_sessions,
+    constraints=None,
+    history_token_budget=None,
     ):
     """
     Generates a personalized workout plan payload as a formatted text.
@@ -189,22 +112,28 @@ def workout_payload_text(
         preferences (object): User preferences including fitness goals, intensity, etc.
         preferred_workout_type (str): Preferred type of workout.
         workout_length (int): Maximum workout duration in minutes.
-        preferred_location (object): Location and available equipment details.
+        location (Location or str): The workout location, or its name.
         weight_history (list): List of weight history entries.
         workout_sessions (list): List of past workout sessions.
         safe_join (callable): A utility function to safely join list items.
+        constraints (str): Optional extra instructions, e.g. the muscle group a
+            single day of a fanned-out week plan must focus on.
+        history_token_budget (int): Maximum tokens for the training history
+            summary. Defaults to the PROMPT_HISTORY_TOKEN_BUDGET setting.
 
     Returns:
         str: A formatted workout plan payload text.
     """
-    location = Location.objects.get(name=location)
-
-
-    days = ', '.join([i.title() for i in preferences.workout_days])
-    # print([get_value_from_choices(i, FITNESS_LEVEL_CHOICES) for i in preferences.fitness_goals])
-    fitness_goals_desc = '\n - '.join([get_value_from_choices(i, GOAL_CHOICES) for i in preferences.fitness_goals])
-    preferred_workout_type_desc = get_value_from_choices(preferred_workout_type, WORKOUT_TYPE_PREFERENCE_CHOICES)
-    fitness_level_desc = get_value_from_choices(preferences.fitness_level, FITNESS_LEVEL_CHOICES)
+    # Locations can still be passed by name, as the views did before the generation worker
+    if not isinstance(location, Location):
+        location = Location.objects.get(name=location)
+    personal_info, fitness = personal_fragments(preferences)
+    history_text, history_tokens = summarize_training_history(
+        workout_sessions,
+        weight_history,
+        history_token_budget or settings.PROMPT_HISTORY_TOKEN_BUDGET,
+    )
+    preferred_workout_type_desc = WORKOUT_TYPES.label(preferred_workout_type)
 
     payload_text = (
         f"Imagine you are a personal trainer. Create a unique and challenging workout plan for one {plan_duration_value} "
@@ -212,58 +141,82 @@ def workout_payload_text(
         f"start on {start_date}. Take into account the users Personal Info, Workout Location & Available Equipment," 
         f"Fitness, Level Age and BMI and Past Workouts below.\n\n"
         f"--- Personal Info ---\n"
-        + f"Fitness Goals:\n{fitness_goals_desc}\n"
-        + f"Preferred Workout Type: {preferred_workout_type_desc}\n"
-        + f"Workout should not take longer than: {workout_length} minutes\n"
-        + f"Workouts should take place on these days: {days}, and there should be no more than {len(preferences.workout_days)} workouts per week"    
+        + personal_info
+        + f"\nPreferred Workout Type: {preferred_workout_type_desc}\n"
+        + f"Workout should not take longer than: {workout_length} minutes"
         + f"\n\n--- Workout Location & Available Equipment ---\n"
-        + f"Location: {location.name}\n"
-        + "Available Equipment for the Workout:\n"
-        + "\n".join([f"  - {equipment.equipment}" for equipment in location.equipment.all()])
+        + location_fragment(location)
         + f"\n\n--- Fitness Level Age and BMI ---\n"
-        + f"{fitness_level_desc}\n"
-        + f"Age: {preferences.age}\n"
-        + f"--- Weight History ---\n"
-        + "\n".join([f"  - Date: {entry.date}, Weight: {entry.weight} kg, BMI: {entry.bmi}" for entry in weight_history])
-        + "\n\n--- Past Workouts ---\n"
-        + f"Make sure that the new workout plan takes into account past workouts below "
+        + fitness
+        + "\n\n--- Training History ---\n"
+        + f"Make sure that the new workout plan takes into account the training history below "
         + f"so that muscel groups are not overused and workouts are challenging and varied.\n"
-        + "\n".join(
-            [
-                f"  - Date: {session.date}\n    Type: {session.workout_type}\n"
-                "    Exercises:\n"
-                + "\n".join(
-                    [
-                        f"      - {exercise.name}: Sets {exercise.sets}, Reps {exercise.reps}, Weight: {exercise.actual_weight or 'Bodyweight'}"
-                        for exercise in session.exercises.all()
-                    ]
-                )
-                for session in workout_sessions
-            ]
-        )
-        + f"\n\n--- Structured Workout Plan ---\n"
-        f"Format the entire response as valid JSON as follows:\n"
-        "[{{\n"
-        "  \"name\": \"Workout Name\",\n"
-        "  \"goal\": \"Goal of the workout\",\n"
-        "  \"muscle group\": \"Muscle group worked\",\n"
-        "  \"location\": \"Location of workout\",\n"
-        "  \"date\": \"28-10-2024\",\n"
-        "  \"exercises\": [\n"
-        "    {{\n"
-        "      \"name\": \"Exercise Name\",\n"
-        "      \"sets\": \"3\",\n"
-        "      \"reps\": \"10 per leg\",\n"
-        "      \"recommended_weight\": \"10 kg\",\n"
-        "      \"description\": \"Exercise description\"\n"
-        "    }}\n"
-        "  ],\n"
-        "  \"warm_up\": \"Warm-up details\",\n"
-        "  \"cool_down\": \"Cool-down details\",\n"
-        "  \"important_considerations\": \"Important considerations\",\n"
-        "  \"explanation\": \"Detailed explanation of the workout\"\n"
-        "}}]\n"
+        + history_text
+        + (f"\n\n--- Plan Constraints ---\n{constraints}" if constraints else "")
+        + "\n\n"
+        + WORKOUT_FORMAT_TRAILER
+    )
+    logger.info(
+        "Built workout prompt: ~%s tokens, of which ~%s are training history",
+        estimate_tokens(payload_text),
+        history_tokens,
+    )
+    return payload_text
+
+def workout_day_payload_text(
+    day,
+    preferences,
+    preferred_workout_type,
+    workout_length,
+    location,
+    siblings,
+    replaced=None,
+    ):
+    """
+    Generates the prompt that regenerates a single day of an existing plan.
+    Instead of the full training history, the plan's other workouts are
+    listed as one-line constraints, so a swap costs a fraction of the tokens
+    of the original plan prompt.
+
+    Args:
+        day (date): Date of the workout to generate.
+        preferences (object): User preferences including fitness goals, intensity, etc.
+        preferred_workout_type (str): Preferred type of workout.
+        workout_length (int): Maximum workout duration in minutes.
+        location (Location): The workout location, or None if the plan has none.
+        siblings (list): The other WorkoutSessions of the plan.
+        replaced (WorkoutSession): The workout being replaced, if any.
+
+    Returns:
+        str: A formatted workout payload text.
+    """
+    personal_info, fitness = personal_fragments(preferences)
+    preferred_workout_type_desc = WORKOUT_TYPES.label(preferred_workout_type)
+
+    def outline(workout):
+        focus = ', '.join(workout.muscle_groups or []) or workout.workout_type or "unspecified"
+        return f"{workout.name} ({focus})"
+
+    constraints = [f"- {workout.date:%A %Y-%m-%d}: {outline(workout)}" for workout in siblings]
+    payload_text = (
+        f"Imagine you are a personal trainer. Create one workout for {day:%A} {day.isoformat()} that fits into the "
+        f"individual's existing workout plan. Take into account the users Personal Info, Workout Location & "
+        f"Available Equipment and Fitness, Level Age and BMI below.\n\n"
+        f"--- Personal Info ---\n"
+        + personal_info
+        + f"\nPreferred Workout Type: {preferred_workout_type_desc}\n"
+        + f"Workout should not take longer than: {workout_length} minutes"
+        + (f"\n\n--- Workout Location & Available Equipment ---\n{location_fragment(location)}" if location else "")
+        + f"\n\n--- Fitness Level Age and BMI ---\n"
+        + fitness
+        + "\n\n--- Plan Constraints ---\n"
+        + ("The other workouts of the plan:\n" + "\n".join(constraints) + "\n"
+           "Do not overload the muscle groups they train, especially on neighbouring days.\n" if constraints else "")
+        + (f"The new workout must be different from the one it replaces: {outline(replaced)}.\n" if replaced else "")
+        + "Return exactly one workout.\n\n"
+        + WORKOUT_FORMAT_TRAILER
     )
+    logger.info("Built single day workout prompt: ~%s tokens", estimate_tokens(payload_text))
     return payload_text
 
 def generate_exercise_query(exercise_data):
@@ -284,3 +237,46 @@ def generate_exercise_query(exercise_data):
         "]\n"
     )
     return payload_text
+
+
+def generate_batch_exercise_query(workout, exercises_to_replace, other_exercises):
+    """
+    Builds a single prompt that asks for replacements for several exercises of
+    one workout at once.
+
+    Args:
+        workout (WorkoutSession): The workout the exercises belong to.
+        exercises_to_replace (list): Exercises to replace, in order.
+        other_exercises (list): The workout's remaining exercises, sent as
+            context so replacements don't duplicate them.
+
+    Returns:
+        str: The prompt text.
+    """
+    payload_text = (
+        f"Replace exercises in the workout '{workout.name}' (goal: {workout.goal}). "
+        f"Each replacement should target similar muscle groups to the exercise it replaces "
+        f"and keep a similar number of sets and reps.\n\n"
+        f"Exercises to replace:\n"
+        + "\n".join(
+            f"  {number}. {exercise.name}: Sets {exercise.sets}, Reps {exercise.reps}"
+            for number, exercise in enumerate(exercises_to_replace, start=1)
+        )
+        + "\n\nThe rest of the workout, which stays as it is. Do not repeat these exercises:\n"
+        + ("\n".join(
+            f"  - {exercise.name}: Sets {exercise.sets}, Reps {exercise.reps}"
+            for exercise in other_exercises
+        ) or "  - None")
+        + f"\n\nReturn exactly {len(exercises_to_replace)} exercises, one per exercise to replace and "
+        "in the same order. Format the entire response as JSON as follows:\n"
+        "[\n"
+        "    {\n"
+        "        \"name\": \"Exercise Name\",\n"
+        "        \"sets\": \"3\",\n"
+        "        \"reps\": \"10 per leg\",\n"
+        "        \"recommended_weight\": \"10 kg\",\n"
+        "        \"description\": \"Exercise description\"\n"
+        "    }\n"
+        "]\n"
+    )
+    return payload_text
@@ -0,0 +1,133 @@
+import math
+from collections import OrderedDict
+
+from .parsing import parse_reps, parse_sets, parse_weight_kg
+
+# Rough size of a token for English prompt text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Estimates how many LLM tokens a piece of text uses.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def exercise_volume(exercise):
+    """
+    Estimates the volume of one exercise entry: sets x reps x kg, or sets x
+    reps for bodyweight and timed work.
+
+    Returns:
+        float: The volume, or None if the sets and reps can't be read.
+    """
+    sets = parse_sets(exercise.sets)
+    _, reps, per_side = parse_reps(exercise.reps)
+    if not sets or not reps:
+        return None
+    weight, _ = parse_weight_kg(exercise.actual_weight or exercise.recommended_weight)
+    volume = sets * reps * (2 if per_side else 1)
+    return float(volume * weight) if weight else float(volume)
+
+
+def _trend(volumes):
+    """
+    Describes how volume moved from the oldest to the newest entry.
+    """
+    volumes = [v for v in volumes if v]
+    if len(volumes) < 2 or not volumes[0]:
+        return "new"
+    change = (volumes[-1] - volumes[0]) / volumes[0]
+    if change > 0.05:
+        return f"up {change:.0%}"
+    if change < -0.05:
+        return f"down {-change:.0%}"
+    return "steady"
+
+
+def summarize_training_history(workout_sessions, weight_history, token_budget):
+    """
+    Condenses past workouts and weigh-ins into compact per-muscle-group and
+    per-exercise aggregates that fit a hard token budget, so prompt size no
+    longer grows with how active a user is.
+
+    Args:
+        workout_sessions (iterable): Past WorkoutSessions, newest first, with
+            their exercises ideally prefetched.
+        weight_history (iterable): WeightHistory entries, newest first.
+        token_budget (int): Maximum tokens the summary may use.
+
+    Returns:
+        tuple: (summary text, estimated tokens used).
+    """
+    muscle_groups = OrderedDict()
+    exercises = OrderedDict()
+    for session in workout_sessions:
+        for group in session.muscle_groups or ([session.workout_type] if session.workout_type else []):
+            stats = muscle_groups.setdefault(str(group), {'last': session.date, 'sessions': 0})
+            stats['sessions'] += 1
+        for exercise in session.exercises.all():
+            stats = exercises.setdefault(exercise.name.strip().lower(), {
+                'name': exercise.name.strip(),
+                'last': session.date,
+                'latest': f"{exercise.sets}x{exercise.reps}",
+                'count': 0,
+                'top_weight': None,
+                'volumes': [],
+            })
+            stats['count'] += 1
+            weight, _ = parse_weight_kg(exercise.actual_weight or exercise.recommended_weight)
+            if weight and (stats['top_weight'] is None or weight > stats['top_weight']):
+                stats['top_weight'] = weight
+            # Sessions arrive newest first; keep volumes oldest first
+            stats['volumes'].insert(0, exercise_volume(exercise))
+
+    weights = list(weight_history)
+    lines = []
+    if weights:
+        latest, oldest = weights[0], weights[-1]
+        change = latest.weight - oldest.weight
+        lines.append(
+            f"Weight: {latest.weight} kg on {latest.date} "
+            f"({change:+} kg since {oldest.date}), BMI: {latest.bmi}"
+        )
+    if muscle_groups:
+        lines.append("Muscle groups (last trained, sessions):")
+        lines += [
+            f"  - {group}: {stats['last']}, {stats['sessions']}"
+            for group, stats in muscle_groups.items()
+        ]
+    if exercises:
+        lines.append("Exercises (last done, latest sets x reps, times, top weight, volume trend):")
+        # Frequent, recent exercises say the most about the user's training, so they survive the budget
+        ranked = sorted(exercises.values(), key=lambda stats: (stats['count'], stats['last']), reverse=True)
+        lines += [
+            f"  - {stats['name']}: {stats['last']}, {stats['latest']}, {stats['count']}x, "
+            f"{str(stats['top_weight']) + ' kg' if stats['top_weight'] else 'bodyweight'}, "
+            f"{_trend(stats['volumes'])}"
+            for stats in ranked
+        ]
+    if not lines:
+        lines.append("No previous workouts recorded.")
+
+    summary = []
+    used = 0
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line + "\n")
+        if used + cost > token_budget:
+            # Drop kept lines until the note about what was cut fits too
+            while True:
+                omitted = f"  ... {len(lines) - len(summary)} more lines omitted"
+                if used + estimate_tokens(omitted) <= token_budget:
+                    summary.append(omitted)
+                    break
+                if not summary:
+                    # The budget is too small for even the note, so leave it out
+                    break
+                used -= estimate_tokens(summary.pop() + "\n")
+            break
+        summary.append(line)
+        used += cost
+    text = "\n".join(summary)
+    return text, estimate_tokens(text)
@@ -0,0 +1,255 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Curly quotes the model sometimes uses in place of JSON's straight quotes.
+# Only quotes that delimit a string are rewritten; curly quotes inside a
+# properly quoted string are valid JSON and left alone.
+OPENING_QUOTES = '"“„'
+CLOSING_QUOTES = {'"': '"', '“': '"”', '„': '"“”'}
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+def strip_code_fence(text):
+    """
+    Removes a leading ```json (or bare ```) fence and a trailing ``` fence.
+    """
+    text = text.strip()
+    for fence in ("```json", "```JSON", "```"):
+        if text.startswith(fence):
+            text = text[len(fence):]
+            break
+    text = text.strip()
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def _is_json_scalar(token):
+    try:
+        value = json.loads(token)
+    except ValueError:
+        return False
+    return not isinstance(value, str)
+
+
+def repair_json(text, truncated=False):
+    """
+    Rewrites JSON-like text produced by an LLM into valid JSON.
+
+    Repairs smart quotes, trailing commas, raw newlines inside strings and
+    unquoted values such as ``"reps": 10 per leg``. With ``truncated`` set,
+    it also closes an unterminated string and any open objects or arrays so
+    a response that was cut off mid-object still parses.
+
+    Args:
+        text (str): The JSON-like text.
+        truncated (bool): Whether the text may end part-way through a value.
+
+    Returns:
+        str: The repaired text.
+    """
+    out = []
+    stack = []
+    # Whether the string just opened is an object key still awaiting its ':'
+    awaiting_colon = False
+    closing_quotes = None
+    i = 0
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        if closing_quotes:
+            if char == '\\' and i + 1 < n:
+                out.append(text[i:i + 2])
+                i += 2
+                continue
+            if char in closing_quotes:
+                closing_quotes = None
+                out.append('"')
+            else:
+                out.append('\\n' if char == '\n' else char)
+            i += 1
+            continue
+
+        if char in OPENING_QUOTES:
+            closing_quotes = CLOSING_QUOTES[char]
+            if stack and stack[-1] == '{' and _expects_key(out):
+                awaiting_colon = True
+            out.append('"')
+        elif char in '{[':
+            stack.append(char)
+            out.append(char)
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack:
+                out.append(CLOSERS[stack.pop()])
+            awaiting_colon = False
+        elif char == ':':
+            awaiting_colon = False
+            out.append(char)
+            i += 1
+            while i < n and text[i] in ' \t':
+                out.append(text[i])
+                i += 1
+            if i < n and text[i] not in OPENING_QUOTES + '{[\n\r':
+                end = i
+                while end < n and text[end] not in ',}]\n\r':
+                    end += 1
+                token = text[i:end].strip()
+                if end == n and truncated:
+                    # The value itself may have been cut off; only keep it if it is complete
+                    token = token if _is_json_scalar(token) else json.dumps(token)
+                elif not token:
+                    token = 'null'
+                elif not _is_json_scalar(token):
+                    token = json.dumps(token.strip('"\''))
+                out.append(token)
+                i = end
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    if truncated:
+        if closing_quotes:
+            out.append('"')
+        repaired = ''.join(out).rstrip()
+        if repaired.endswith(','):
+            repaired = repaired[:-1]
+        if awaiting_colon:
+            repaired += ': null'
+        elif repaired.endswith(':'):
+            repaired += ' null'
+        return repaired + ''.join(CLOSERS[opener] for opener in reversed(stack))
+    return ''.join(out)
+
+
+def _expects_key(out):
+    """
+    Whether the last significant output character opens an object member.
+    """
+    for piece in reversed(out):
+        stripped = piece.strip()
+        if stripped:
+            return stripped[-1] in '{,'
+    return False
+
+
+def _strip_trailing_comma(out):
+    while out and not out[-1].strip():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+
+def parse_json_object(text, truncated=False):
+    """
+    Parses one JSON object, falling back to repair_json if it is malformed.
+
+    Raises:
+        ValueError: If the text cannot be repaired into valid JSON.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(repair_json(text, truncated=truncated))
+
+
+class StreamingJSONParser:
+    """
+    Incrementally parses an LLM response made of a JSON array of objects (or a
+    single object). Feed it chunks as they arrive; each top-level object is
+    returned as soon as its closing brace is seen. Objects that cannot be
+    repaired are skipped and recorded in ``errors`` instead of failing the
+    whole response.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.closing_quotes = None
+        self.escape = False
+        self.current = []
+        self.errors = []
+
+    def feed(self, chunk):
+        """
+        Consumes a chunk of text.
+
+        Returns:
+            list: The top-level objects completed by this chunk.
+        """
+        completed = []
+        for char in chunk:
+            if self.depth == 0 and char != '{':
+                # Skip fences, the enclosing array and separators
+                continue
+            self.current.append(char)
+            if self.closing_quotes:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char in self.closing_quotes:
+                    self.closing_quotes = None
+            elif char in OPENING_QUOTES:
+                self.closing_quotes = CLOSING_QUOTES[char]
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete(''.join(self.current), completed)
+                    self.current = []
+        return completed
+
+    def close(self):
+        """
+        Signals the end of the response.
+
+        Returns:
+            list: The final object if the response was cut off inside it and
+            it could be repaired, otherwise an empty list.
+        """
+        completed = []
+        if self.current:
+            self._complete(''.join(self.current), completed, truncated=True)
+        self.current = []
+        self.depth = 0
+        self.closing_quotes = None
+        self.escape = False
+        return completed
+
+    def _complete(self, text, completed, truncated=False):
+        try:
+            completed.append(parse_json_object(text, truncated=truncated))
+        except ValueError as e:
+            logger.warning("Skipping unparseable object in LLM response: %s", e)
+            self.errors.append((str(e), text))
+
+
+def iter_json_objects(chunks):
+    """
+    Yields each top-level object of a streamed JSON response as soon as it is
+    complete.
+
+    Args:
+        chunks (iterable): Pieces of response text in the order received.
+
+    Yields:
+        dict: Each parsed top-level object.
+    """
+    parser = StreamingJSONParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def parse_json_objects(text):
+    """
+    Parses a complete response, returning every object that could be parsed
+    or repaired.
+    """
+    return list(iter_json_objects([text]))
@@ -237,6 +237,11 @@ PLAN_DURATION_CHOICES = [
     ('week', 'One Week'),
 ]
 
+GENERATION_MODE_CHOICES = [
+    ('single', 'Whole plan in one request'),
+    ('parallel', 'One request per day, in parallel (week plans)'),
+]
+
 
 GOAL_CHOICES = [
     ('heart_health', 'Cardiovascular Health and Endurance - Improve your ability to exercise for longer periods without tiring.'),
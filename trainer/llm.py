@@ -0,0 +1,177 @@
+import hashlib
+import json
+import re
+import threading
+from datetime import date, timedelta
+
+from django.conf import settings
+
+from .llm_cache import get_response_cache
+
+DEFAULT_CLIENT_SETTINGS = {
+    'BACKEND': 'gemini',
+    'MODEL': 'gemini-1.5-flash',
+    'TIMEOUT': 60,
+    'API_KEY': None,
+}
+
+
+class GeminiBackend:
+    """
+    Talks to Google Gemini. The SDK is configured once and the model object is
+    kept for the life of the process, so its underlying transport (and its
+    open connections) is reused by every request.
+    """
+
+    def __init__(self, model_name, api_key, timeout):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.timeout = timeout
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt):
+        response = self.model.generate_content(prompt, request_options={'timeout': self.timeout})
+        return response.text
+
+    def stream(self, prompt):
+        response = self.model.generate_content(prompt, stream=True, request_options={'timeout': self.timeout})
+        for chunk in response:
+            yield chunk.text
+
+
+class StubBackend:
+    """
+    Deterministic offline backend for development and tests. Responses are
+    derived from a hash of the prompt, so the same prompt always produces the
+    same, correctly formatted, JSON.
+    """
+
+    EXERCISES = [
+        ("Push-up", "Bodyweight"),
+        ("Goblet Squat", "16 kg"),
+        ("Dumbbell Row", "12 kg"),
+        ("Reverse Lunge", "10 kg"),
+        ("Plank", "Bodyweight"),
+        ("Romanian Deadlift", "30 kg"),
+        ("Shoulder Press", "10 kg"),
+        ("Glute Bridge", "Bodyweight"),
+    ]
+    MUSCLE_GROUPS = ["Upper Body", "Lower Body", "Full Body", "Core", "Arms"]
+
+    def __init__(self, model_name, api_key=None, timeout=None):
+        self.model_name = model_name
+
+    def _seed(self, prompt):
+        return int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+
+    def _exercise(self, seed, offset):
+        name, weight = self.EXERCISES[(seed + offset) % len(self.EXERCISES)]
+        return {
+            "name": name,
+            "sets": str(3 + (seed + offset) % 2),
+            "reps": str(8 + (seed + offset) % 5),
+            "recommended_weight": weight,
+            "description": f"Perform {name.lower()} with controlled form.",
+        }
+
+    def _workout(self, seed, day, workout_date):
+        muscle_group = self.MUSCLE_GROUPS[(seed + day) % len(self.MUSCLE_GROUPS)]
+        return {
+            "name": f"{muscle_group} Session",
+            "goal": f"Build {muscle_group.lower()} strength",
+            "muscle group": muscle_group,
+            "location": "Stub Gym",
+            "date": workout_date.isoformat(),
+            "exercises": [self._exercise(seed, day + i) for i in range(4)],
+            "warm_up": "5 minutes of light cardio and dynamic stretching.",
+            "cool_down": "5 minutes of static stretching.",
+            "important_considerations": "Stop if you feel sharp pain.",
+            "explanation": f"A {muscle_group.lower()} session generated offline.",
+        }
+
+    def generate(self, prompt):
+        seed = self._seed(prompt)
+        if prompt.startswith("Replace exercise"):
+            # One exercise per numbered line of a batch request, otherwise just one
+            count = len(re.findall(r'^\s+\d+\. ', prompt, re.MULTILINE)) or 1
+            return json.dumps([self._exercise(seed, i) for i in range(count)], indent=2)
+
+        start = re.search(r'start on (\d{4}-\d{2}-\d{2})', prompt)
+        start_date = date.fromisoformat(start.group(1)) if start else date.today()
+        days = 7 if 'one week' in prompt else 1
+        workouts = [self._workout(seed, day, start_date + timedelta(days=day)) for day in range(days)]
+        return "```json\n" + json.dumps(workouts, indent=2) + "\n```"
+
+    def stream(self, prompt):
+        text = self.generate(prompt)
+        for i in range(0, len(text), 64):
+            yield text[i:i + 64]
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+class LLMClient:
+    """
+    The single entry point the views use to talk to the LLM.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    def generate(self, prompt, use_cache=False, parse=None):
+        """
+        Sends a prompt and returns the full response text.
+
+        Args:
+            prompt (str): The prompt text.
+            use_cache (bool): Serve identical prompts from the response cache.
+            parse (callable): Optional. Turns the response text into the
+                result, raising if it can't be parsed. Responses that don't
+                parse are never cached.
+
+        Returns:
+            The response text, or parse()'s result if parse is given.
+        """
+        if use_cache:
+            return get_response_cache().get_or_generate(prompt, self.model_name, self.backend.generate, parse=parse)
+        response_text = self.backend.generate(prompt)
+        return parse(response_text) if parse else response_text
+
+    def stream(self, prompt):
+        """
+        Sends a prompt and yields the response text as it is produced.
+        """
+        return self.backend.stream(prompt)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """
+    Returns the process-wide LLMClient, building it from the LLM_CLIENT
+    setting on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                options = {**DEFAULT_CLIENT_SETTINGS, **getattr(settings, 'LLM_CLIENT', {})}
+                backend_class = BACKENDS[options['BACKEND']]
+                _client = LLMClient(backend_class(
+                    model_name=options['MODEL'],
+                    api_key=options['API_KEY'],
+                    timeout=options['TIMEOUT'],
+                ))
+    return _client
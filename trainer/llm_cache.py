@@ -0,0 +1,269 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SETTINGS = {
+    'BACKEND': 'lru',
+    'MAX_ENTRIES': 1000,
+    'TIMEOUT': 60 * 60 * 24,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def normalize_prompt(prompt):
+    """
+    Collapses whitespace so prompts that differ only in formatting share a key.
+    """
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def make_cache_key(prompt, model_name):
+    """
+    Builds the content-addressed key for a prompt sent to a given model.
+
+    Args:
+        prompt (str): The prompt text.
+        model_name (str): The model the prompt is sent to.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    content = f"{model_name}\n{normalize_prompt(prompt)}"
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class LRUBackend:
+    """
+    In-process cache. Evicts the least recently used entry once MAX_ENTRIES is
+    reached and treats entries older than TIMEOUT seconds as missing.
+    """
+
+    def __init__(self, max_entries, timeout, **kwargs):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.timeout and time.monotonic() - stored_at > self.timeout:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, model_name=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Stores responses in one of the configured Django caches, so entries are
+    shared between worker processes. Size limits are left to that cache's
+    own MAX_ENTRIES option.
+    """
+
+    key_prefix = 'llm-response'
+
+    def __init__(self, max_entries, timeout, cache_alias='default', **kwargs):
+        self.timeout = timeout
+        self.cache = caches[cache_alias]
+
+    def _generation(self):
+        # Part of every key, so clear() can retire all responses without
+        # touching the other entries of a shared cache
+        key = f"{self.key_prefix}:generation"
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, time.time_ns(), None)
+            generation = self.cache.get(key)
+        return generation
+
+    def _key(self, key):
+        return f"{self.key_prefix}:{self._generation()}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, value, model_name=None):
+        self.cache.set(self._key(key), value, self.timeout or None)
+
+    def clear(self):
+        try:
+            self.cache.incr(f"{self.key_prefix}:generation")
+        except ValueError:
+            # No generation yet, so nothing is stored
+            pass
+
+
+class DatabaseBackend:
+    """
+    Stores responses in the LLMResponse table so they survive restarts.
+    Expired rows are ignored on read and trimmed, along with the least
+    recently used rows over MAX_ENTRIES, on write.
+    """
+
+    def __init__(self, max_entries, timeout, **kwargs):
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+    @property
+    def model(self):
+        from .models import LLMResponse
+        return LLMResponse
+
+    def _expiry_cutoff(self):
+        return timezone.now() - timedelta(seconds=self.timeout)
+
+    def get(self, key):
+        entries = self.model.objects.filter(key=key)
+        if self.timeout:
+            entries = entries.filter(created_at__gte=self._expiry_cutoff())
+        entry = entries.only('response').first()
+        if entry is None:
+            return None
+        self.model.objects.filter(key=key).update(last_used_at=timezone.now())
+        return entry.response
+
+    def set(self, key, value, model_name=None):
+        now = timezone.now()
+        self.model.objects.update_or_create(
+            key=key,
+            defaults={
+                'model_name': model_name or '',
+                'response': value,
+                'created_at': now,
+                'last_used_at': now,
+            },
+        )
+        self._evict()
+
+    def _evict(self):
+        if self.timeout:
+            self.model.objects.filter(created_at__lt=self._expiry_cutoff()).delete()
+        stale_keys = self.model.objects.order_by('-last_used_at').values_list('key', flat=True)[self.max_entries:]
+        stale_keys = list(stale_keys)
+        if stale_keys:
+            self.model.objects.filter(key__in=stale_keys).delete()
+
+    def clear(self):
+        self.model.objects.all().delete()
+
+
+BACKENDS = {
+    'lru': LRUBackend,
+    'django': DjangoCacheBackend,
+    'database': DatabaseBackend,
+}
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of LLM responses with hit/miss counters.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_generate(self, prompt, model_name, generate, parse=None):
+        """
+        Returns the cached response for the prompt, calling generate() and
+        storing its result on a miss.
+
+        Args:
+            prompt (str): The prompt text.
+            model_name (str): Name of the model the prompt is sent to.
+            generate (callable): Takes the prompt and returns response text.
+            parse (callable): Optional. Takes the response text and returns
+                the parsed response, raising if it can't be parsed. A fresh
+                response is only stored once it parses, so a malformed one is
+                asked for again on the next try instead of being served.
+
+        Returns:
+            The response text, or parse()'s result if parse is given.
+        """
+        parse = parse or (lambda response_text: response_text)
+        key = make_cache_key(prompt, model_name)
+        response_text = self.backend.get(key)
+        if response_text is not None:
+            self._count(hit=True)
+            return parse(response_text)
+
+        self._count(hit=False)
+        response_text = generate(prompt)
+        parsed = parse(response_text)
+        self.backend.set(key, response_text, model_name=model_name)
+        return parsed
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        logger.debug("LLM response cache %s (hits=%s, misses=%s)", 'hit' if hit else 'miss', self.hits, self.misses)
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Returns the process-wide ResponseCache configured by the
+    LLM_RESPONSE_CACHE setting.
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                options = {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'LLM_RESPONSE_CACHE', {})}
+                backend_class = BACKENDS[options['BACKEND']]
+                backend = backend_class(
+                    max_entries=options['MAX_ENTRIES'],
+                    timeout=options['TIMEOUT'],
+                    cache_alias=options['CACHE_ALIAS'],
+                )
+                _response_cache = ResponseCache(backend)
+    return _response_cache
+
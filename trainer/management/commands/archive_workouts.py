@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from trainer.archive import archive_cutoff, archive_workouts, months_to_archive
+
+
+class Command(BaseCommand):
+    help = "Move workouts older than the archive horizon into compressed per-user monthly archive rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help="Archive workouts older than this many days (default: WORKOUT_ARCHIVE_HORIZON_DAYS).",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="List what would be archived without changing anything.")
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError("--days must be at least 1")
+        before = archive_cutoff(options['days'])
+
+        months = months_to_archive(before) if options['dry_run'] else archive_workouts(before)
+        for row in months:
+            self.stdout.write(f"User {row['user_id']} {row['month']:%Y-%m}: {row['count']} workouts")
+
+        total = sum(row['count'] for row in months)
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} workouts dated before {before}"))
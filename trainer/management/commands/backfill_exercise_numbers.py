@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from trainer.models import Exercise
+
+
+class Command(BaseCommand):
+    help = "Fill the numeric sets/reps/weight columns of existing exercises from their text, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Exercises per transaction.")
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help="Resume after this exercise ID (printed after every chunk).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = options['start_after']
+        text_fields = ['id', 'sets', 'reps', 'recommended_weight', 'actual_weight']
+        updated = 0
+
+        while True:
+            # Keyset pagination keeps every chunk an index range scan, however far in we are
+            chunk = list(Exercise.objects.filter(id__gt=last_id).order_by('id').only(*text_fields)[:chunk_size])
+            if not chunk:
+                break
+            for exercise in chunk:
+                exercise.normalize()
+            with transaction.atomic():
+                Exercise.objects.bulk_update(chunk, Exercise.NUMERIC_FIELDS)
+            updated += len(chunk)
+            last_id = chunk[-1].id
+            self.stdout.write(f"Updated {updated} exercises (last ID {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} exercises"))
@@ -0,0 +1,160 @@
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from trainer.models import CustomUser, Exercise, UserPreference, WorkoutPlan, WorkoutSession
+
+# Owners the written plans are spread over, and the readers cycle through
+OWNERS = 50
+
+
+def add_bench_database(alias, path, options):
+    """
+    Registers a fresh SQLite file as a database alias and creates every
+    model's table in it. The schema comes from the models rather than the
+    migrations, whose data migrations only know the default database.
+    """
+    connections.settings[alias] = {
+        **connections.settings[DEFAULT_DB_ALIAS],
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': options,
+    }
+    with connections[alias].schema_editor() as editor:
+        for model in apps.get_models():
+            editor.create_model(model)
+
+
+def remove_bench_database(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+def create_owners(alias):
+    """
+    Returns:
+        list: IDs of the UserPreferences the bench's plans belong to.
+    """
+    users = CustomUser.objects.using(alias).bulk_create([
+        CustomUser(email=f"bench{i}@example.com", password='!') for i in range(OWNERS)
+    ])
+    preferences = UserPreference.objects.using(alias).bulk_create([
+        UserPreference(user=user, firstname="Bench", lastname="User", dob=date(1990, 1, 1), height=180)
+        for user in users
+    ])
+    return [preference.pk for preference in preferences]
+
+
+def write_plans(alias, owners, plans_per_transaction, stop, stats):
+    """
+    Inserts week plans (7 workouts of 5 exercises each) in large
+    transactions until told to stop, with the bulk inserts save_workout_plan
+    uses. Bulk inserts send no signals, so nothing touches the default
+    database.
+    """
+    plan_count = 0
+    while not stop.is_set():
+        try:
+            with transaction.atomic(using=alias):
+                for _ in range(plans_per_transaction):
+                    plan_count += 1
+                    owner = owners[plan_count % len(owners)]
+                    plan = WorkoutPlan.objects.using(alias).create(user_id=owner)
+                    sessions = WorkoutSession.objects.using(alias).bulk_create([
+                        WorkoutSession(plan=plan, user_id=owner, name="Leg Day", date=date(2024, 11, day + 1),
+                                       description="Squats and lunges " * 20)
+                        for day in range(7)
+                    ])
+                    exercises = [
+                        Exercise(workout=session, name=f"Exercise {i}", sets="3", reps="10",
+                                 description="Controlled tempo " * 10)
+                        for session in sessions
+                        for i in range(5)
+                    ]
+                    for exercise in exercises:
+                        exercise.normalize()
+                    Exercise.objects.using(alias).bulk_create(exercises)
+            stats['plans'] += plans_per_transaction
+        except OperationalError:
+            stats['write_errors'] += 1
+    connections[alias].close()
+
+
+def read_homepage(alias, owners, stop, stats):
+    """
+    Runs the homepage's recent workouts query until told to stop.
+    """
+    index = 0
+    while not stop.is_set():
+        index = (index + 1) % len(owners)
+        started = time.perf_counter()
+        try:
+            list(WorkoutSession.objects.using(alias).filter(user_id=owners[index]).order_by('-date')[:20])
+            stats['latencies'].append(time.perf_counter() - started)
+        except OperationalError:
+            stats['read_errors'] += 1
+    connections[alias].close()
+
+
+def run_profile(name, options, readers, duration, plans_per_transaction):
+    """
+    Runs one writer and several readers against a fresh database file opened
+    with the given connection options.
+
+    Returns:
+        dict: Plans written, read latencies and lock errors.
+    """
+    alias = f'bench_{name}'
+    with tempfile.TemporaryDirectory() as directory:
+        add_bench_database(alias, str(Path(directory) / 'bench.sqlite3'), options)
+        try:
+            owners = create_owners(alias)
+            stop = threading.Event()
+            stats = {'plans': 0, 'write_errors': 0, 'read_errors': 0, 'latencies': []}
+            threads = [threading.Thread(target=write_plans, args=(alias, owners, plans_per_transaction, stop, stats))]
+            threads += [threading.Thread(target=read_homepage, args=(alias, owners, stop, stats)) for _ in range(readers)]
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            remove_bench_database(alias)
+    return stats
+
+
+class Command(BaseCommand):
+    help = "Benchmark homepage reads running alongside bulk plan inserts, with and without the SQLite production profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds to run each profile.")
+        parser.add_argument('--readers', type=int, default=4, help="Concurrent reader threads.")
+        parser.add_argument('--plans-per-transaction', type=int, default=50, help="Week plans per write transaction.")
+
+    def handle(self, *args, **options):
+        profiles = {
+            # What a bare sqlite3 DATABASES entry gives: rollback journal, deferred transactions, a 5 second lock wait
+            'bare': {},
+            'production': {
+                'init_command': ';'.join(f"PRAGMA {name}={value}" for name, value in settings.SQLITE_PRAGMAS.items()),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+        self.stdout.write(f"{'profile':<12}{'plans':>8}{'reads':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'lock errors':>14}")
+        for name, connection_options in profiles.items():
+            stats = run_profile(name, connection_options, options['readers'], options['duration'], options['plans_per_transaction'])
+            latencies = sorted(stats['latencies']) or [0.0]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"{name:<12}{stats['plans']:>8}{len(stats['latencies']):>10}"
+                f"{statistics.median(latencies) * 1000:>10.2f}{p99 * 1000:>10.2f}{latencies[-1] * 1000:>10.2f}"
+                f"{stats['read_errors'] + stats['write_errors']:>14}"
+            )
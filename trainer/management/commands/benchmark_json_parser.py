@@ -0,0 +1,94 @@
+import json
+import re
+import timeit
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from trainer.json_stream import StreamingJSONParser
+
+CORPUS_DIR = Path(__file__).resolve().parent.parent.parent / 'benchmarks' / 'llm_responses'
+
+
+def legacy_convert_text_to_json(text):
+    """
+    The original whole-buffer parser, kept here as the benchmark baseline.
+    """
+    sanitized_text = text.strip()
+    if sanitized_text.startswith("```json") or sanitized_text.startswith("```"):
+        sanitized_text = sanitized_text.lstrip("```json").lstrip("```").strip()
+    if sanitized_text.endswith("```"):
+        sanitized_text = sanitized_text.rstrip("```").strip()
+    sanitized_text = re.sub(r'(?<="reps": )([^",\]}]+)', r'"\1"', sanitized_text)
+    return json.loads(sanitized_text)
+
+
+def streaming_parse(text, chunk_size):
+    """
+    Feeds the text to the streaming parser in chunks.
+
+    Returns:
+        tuple: The parsed objects and the number of characters consumed
+        before the first object was available.
+    """
+    parser = StreamingJSONParser()
+    objects = []
+    first_object_at = None
+    for start in range(0, len(text), chunk_size):
+        objects += parser.feed(text[start:start + chunk_size])
+        if objects and first_object_at is None:
+            first_object_at = min(start + chunk_size, len(text))
+    objects += parser.close()
+    if objects and first_object_at is None:
+        first_object_at = len(text)
+    return objects, first_object_at
+
+
+class Command(BaseCommand):
+    help = "Benchmark the streaming JSON parser against the legacy parser over a corpus of LLM responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            default=str(CORPUS_DIR),
+            help="Directory of captured LLM responses (*.txt).",
+        )
+        parser.add_argument('--chunk-size', type=int, default=64, help="Characters per streamed chunk.")
+        parser.add_argument('--repeat', type=int, default=200, help="Parses per file when timing.")
+
+    def handle(self, *args, **options):
+        files = sorted(Path(options['corpus']).glob('*.txt'))
+        if not files:
+            self.stdout.write(self.style.ERROR(f"No responses found in {options['corpus']}"))
+            return
+
+        chunk_size = options['chunk_size']
+        repeat = options['repeat']
+        legacy_parsed = 0
+        streaming_parsed = 0
+
+        self.stdout.write(f"{'response':<24}{'legacy':>10}{'stream':>10}{'legacy ms':>12}{'stream ms':>12}{'1st obj':>10}")
+        for path in files:
+            text = path.read_text()
+
+            try:
+                legacy_count = len(legacy_convert_text_to_json(text))
+                legacy_ms = timeit.timeit(lambda: legacy_convert_text_to_json(text), number=repeat) / repeat * 1000
+                legacy_result = str(legacy_count)
+                legacy_parsed += 1
+            except ValueError:
+                legacy_ms = 0.0
+                legacy_result = 'FAIL'
+
+            objects, first_object_at = streaming_parse(text, chunk_size)
+            stream_ms = timeit.timeit(lambda: streaming_parse(text, chunk_size), number=repeat) / repeat * 1000
+            if objects:
+                streaming_parsed += 1
+            first_object = f"{first_object_at / len(text):.0%}" if first_object_at else '-'
+
+            self.stdout.write(
+                f"{path.stem:<24}{legacy_result:>10}{len(objects):>10}{legacy_ms:>12.3f}{stream_ms:>12.3f}{first_object:>10}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Legacy parsed {legacy_parsed}/{len(files)} responses, streaming parsed {streaming_parsed}/{len(files)}. "
+            f"'1st obj' is the share of the response received before the first workout was available."
+        ))
@@ -0,0 +1,62 @@
+import re
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from trainer.models import Query, WeightHistory, WorkoutSession
+from trainer.serializers import workouts_with_details
+
+
+def hot_queries(user_id, plan_id):
+    """
+    The queries behind the homepage and the upcoming workouts page, as the
+    views build them.
+
+    Returns:
+        list: (label, queryset) pairs.
+    """
+    return [
+        ("homepage: weight history", WeightHistory.objects.filter(user_id=user_id).order_by('-date')[:20]),
+        ("homepage: recent workouts", WorkoutSession.objects.filter(user_id=user_id).order_by('-date')[:20]),
+        ("homepage: next workout", WorkoutSession.objects.filter(user_id=user_id, date__gt=date.today()).order_by('date')[:1]),
+        ("upcoming workouts: plan", workouts_with_details().filter(plan_id=plan_id).order_by('date')),
+        ("replace workout: original query", Query.objects.filter(plan_id=plan_id)[:1]),
+    ]
+
+
+def plan_problems(plan):
+    """
+    Finds full table scans and sorts in a SQLite query plan.
+    """
+    problems = []
+    for line in plan.splitlines():
+        # Django prints SQLite plan rows as "id parent notused detail"
+        detail = re.sub(r'^[\d\s]*', '', line.strip())
+        if (detail.startswith('SCAN') and 'USING' not in detail) or 'TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+class Command(BaseCommand):
+    help = "Print the query plan of each hot query and fail if any of them scans a table or sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1, help="UserPreference ID to plan the queries for.")
+        parser.add_argument('--plan', type=int, default=1, help="WorkoutPlan ID to plan the queries for.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                f"Scan detection understands SQLite plans only; printing the {connection.vendor} plans as they are."
+            ))
+
+        failures = 0
+        for label, queryset in hot_queries(options['user'], options['plan']):
+            plan = queryset.explain()
+            problems = plan_problems(plan) if connection.vendor == 'sqlite' else []
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(f"{label}: {'scan or sort' if problems else 'indexed'}"))
+            self.stdout.write(plan)
+            failures += bool(problems)
+
+        if failures:
+            raise CommandError(f"{failures} hot queries are not fully served by an index")
@@ -5,6 +5,7 @@ from trainer.models import (
     CustomUser,
     UserPreference,
     Location,
+    WorkoutPlan,
     WorkoutSession,
     WarmUp,
     CoolDown,
@@ -36,7 +37,7 @@ class Command(BaseCommand):
 
         # Date range for workouts
         days_between = (end_date - today).days
-        group_id = f"workout-{random.randint(1000, 9999)}"
+        plan = WorkoutPlan.objects.create(user=preferences, start_date=today, end_date=end_date)
         workout_names = [
             "Strength Training", "HIIT", "Cardio", "Yoga", "Pilates", "CrossFit",
             "Cycling", "Swimming", "Running", "Rowing", "Climbing", "Boxing",
@@ -50,7 +51,7 @@ class Command(BaseCommand):
             workout_goal = f"Improve {random.choice(['strength', 'endurance', 'flexibility', 'speed', 'agility'])}"
 
             workout_session = WorkoutSession.objects.create(
-                group_id=group_id,
+                plan=plan,
                 user=preferences,
                 name=workout_name,
                 goal=workout_goal,
@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from trainer.generation import claim_next_job, run_generation_job
+from trainer.models import GenerationJob
+
+
+class Command(BaseCommand):
+    help = "Run queued workout plan generation jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("Waiting for generation jobs..."))
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Running job {job.pk} for {job.user}")
+            job = run_generation_job(job)
+            if job.status == GenerationJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f"Job {job.pk} finished: plan {job.plan_id}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job {job.pk} failed: {job.error}"))
@@ -1,4 +1,9 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -20,3 +25,68 @@ class CustomUserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self.create_user(email, password, **extra_fields)
+
+
+class ExerciseQuerySet(models.QuerySet):
+    def with_volume(self):
+        """
+        Annotates each exercise with its volume (sets x reps, doubled for
+        per-side work) and tonnage (volume x kg, actual weight first), from
+        the numeric columns.
+        """
+        sides = Case(When(per_side=True, then=Value(2)), default=Value(1))
+        volume = ExpressionWrapper(F('sets_count') * F('reps_max') * sides, output_field=IntegerField())
+        return self.annotate(
+            volume=volume,
+            tonnage=ExpressionWrapper(
+                volume * Coalesce('actual_weight_kg', 'recommended_weight_kg'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
+    def totals(self):
+        """
+        Sums volume and tonnage over the queryset in a single query.
+
+        Returns:
+            dict: {'volume': int or None, 'tonnage': Decimal or None}
+        """
+        # Aggregates can't reuse the names of the annotations they sum
+        totals = self.with_volume().aggregate(total_volume=Sum('volume'), total_tonnage=Sum('tonnage'))
+        return {'volume': totals['total_volume'], 'tonnage': totals['total_tonnage']}
+
+
+def bmi_expression(weight, height):
+    """
+    BMI in SQL from a weight in kg and a height in cm, rounded to two
+    decimals like the BMI properties.
+    """
+    height_in_meters = Cast(height, FloatField()) / 100
+    return Round(Cast(weight, FloatField()) / (height_in_meters * height_in_meters), 2)
+
+
+class UserPreferenceQuerySet(models.QuerySet):
+    def with_latest_weight(self):
+        """
+        Annotates each user with their latest weigh-in (latest_weight_value,
+        latest_weight_date) and the BMI it gives (bmi_value), using
+        subqueries instead of one query per user.
+        """
+        from .models import WeightHistory
+
+        latest = WeightHistory.objects.filter(user=OuterRef('pk')).order_by('-date')
+        return self.annotate(
+            latest_weight_value=Subquery(latest.values('weight')[:1]),
+            latest_weight_date=Subquery(latest.values('date')[:1]),
+        ).annotate(
+            bmi_value=bmi_expression(F('latest_weight_value'), F('height')),
+        )
+
+
+class WeightHistoryQuerySet(models.QuerySet):
+    def with_bmi(self):
+        """
+        Annotates each weigh-in with its BMI (bmi_value), computed from the
+        user's height in the same query.
+        """
+        return self.annotate(bmi_value=bmi_expression(F('weight'), F('user__height')))
@@ -0,0 +1,197 @@
+# Generated by Django 5.1.15 on 2026-10-18 06:58
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+import multiselectfield.db.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Equipment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment', models.CharField(blank=True, choices=[('Pull-Up Bar', 'Pull-Up Bar'), ('Dip Station', 'Dip Station'), ('Monkey Bars', 'Monkey Bars'), ('Benches', 'Benches'), ('Resistance Bands', 'Resistance Bands'), ('Climbing Wall', 'Climbing Wall'), ('Parallel Bars', 'Parallel Bars'), ('Push-Up Bars', 'Push-Up Bars'), ('Sit-Up Bench', 'Sit-Up Bench'), ('Balance Beam', 'Balance Beam'), ('Bodyweight Workout Station', 'Bodyweight Workout Station'), ('Battle Rope Anchors', 'Battle Rope Anchors'), ('Outdoor Elliptical Machines', 'Outdoor Elliptical Machines'), ('Steppers', 'Steppers'), ('Leg Press Stations', 'Leg Press Stations'), ('Body Twist Machines', 'Body Twist Machines'), ('Treadmill', 'Treadmill'), ('Elliptical', 'Elliptical'), ('Stationary Bike', 'Stationary Bike'), ('Rowing Machine', 'Rowing Machine'), ('Assault Bike', 'Assault Bike'), ('Stair Climber', 'Stair Climber'), ('Fan Bike', 'Fan Bike'), ('Spin Bike', 'Spin Bike'), ('Air Runner', 'Air Runner'), ('SkiErg', 'SkiErg'), ('Recumbent Bike', 'Recumbent Bike'), ('Arc Trainer', 'Arc Trainer'), ('Climbing Machine', 'Climbing Machine'), ('Jacobs Ladder', 'Jacobs Ladder'), ('Vertical Climber', 'Vertical Climber'), ('Upper Body Ergometer (UBE)', 'Upper Body Ergometer (UBE)'), ('Smith Machine', 'Smith Machine'), ('Leg Press Machine', 'Leg Press Machine'), ('Lat Pulldown Machine', 'Lat Pulldown Machine'), ('Chest Press Machine', 'Chest Press Machine'), ('Leg Extension Machine', 'Leg Extension Machine'), ('Cable Machine', 'Cable Machine'), ('Hack Squat Machine', 'Hack Squat Machine'), ('Shoulder Press Machine', 'Shoulder Press Machine'), ('Seated Row Machine', 'Seated Row Machine'), ('Pec Deck Machine', 'Pec Deck Machine'), ('Ab Crunch Machine', 'Ab Crunch Machine'), ('Leg Curl Machine', 'Leg Curl Machine'), ('Glute Bridge Machine', 'Glute Bridge Machine'), ('Calf Raise Machine', 'Calf Raise Machine'), ('Inner/Outer Thigh Machine', 'Inner/Outer Thigh Machine'), ('Biceps Curl Machine', 'Biceps Curl Machine'), ('Triceps Extension Machine', 'Triceps Extension Machine'), ('Multi-Station Gym Machine', 'Multi-Station Gym Machine'), ('Chest Fly Machine', 'Chest Fly Machine'), ('Dumbbells', 'Dumbbells'), ('Barbells', 'Barbells'), ('Kettlebells', 'Kettlebells'), ('Medicine Balls', 'Medicine Balls'), ('EZ Curl Bar', 'EZ Curl Bar'), ('Trap Bar', 'Trap Bar'), ('Weight Plates', 'Weight Plates'), ('Powerlifting Chains', 'Powerlifting Chains'), ('Weighted Vest', 'Weighted Vest'), ('Adjustable Dumbbells', 'Adjustable Dumbbells'), ('Ankle Weights', 'Ankle Weights'), ('Weighted Sandbags', 'Weighted Sandbags'), ('Power Bags', 'Power Bags'), ('Club Bells', 'Club Bells'), ('Mace Bells', 'Mace Bells'), ('Flat Bench', 'Flat Bench'), ('Adjustable Bench', 'Adjustable Bench'), ('Squat Rack', 'Squat Rack'), ('Power Rack', 'Power Rack'), ('Half Rack', 'Half Rack'), ('Preacher Curl Bench', 'Preacher Curl Bench'), ('Decline Bench', 'Decline Bench'), ('Incline Bench', 'Incline Bench'), ('Roman Chair', 'Roman Chair'), ('Hip Thrust Machine', 'Hip Thrust Machine'), ('Plyo Boxes', 'Plyo Boxes'), ('Wall Balls', 'Wall Balls'), ('Olympic Barbells', 'Olympic Barbells'), ('Battle Ropes', 'Battle Ropes'), ('Sled Push', 'Sled Push'), ('Sandbags', 'Sandbags'), ('Wooden Rings', 'Wooden Rings'), ('GHD (Glute Ham Developer)', 'GHD (Glute Ham Developer)'), ('Heavy Ropes', 'Heavy Ropes'), ('Climbing Ropes', 'Climbing Ropes'), ('Tire Flip Station', 'Tire Flip Station'), ('Kegs for Lifting', 'Kegs for Lifting'), ('Steel Logs', 'Steel Logs'), ('Slam Balls', 'Slam Balls'), ('Agility Ladder', 'Agility Ladder'), ('TRX', 'TRX'), ('Boxing Bags', 'Boxing Bags'), ('Battle Ropes', 'Battle Ropes'), ('Core Sliders', 'Core Sliders'), ('Bulgarian Bags', 'Bulgarian Bags'), ('Resistance Tubes', 'Resistance Tubes'), ('Balance Boards', 'Balance Boards'), ('Yoga Mat', 'Yoga Mat'), ('Foam Roller', 'Foam Roller'), ('Stretch Bands', 'Stretch Bands'), ('Massage Balls', 'Massage Balls'), ('Yoga Blocks', 'Yoga Blocks'), ('Resistance Bands', 'Resistance Bands'), ('Yoga Bolsters', 'Yoga Bolsters'), ('Stretch Straps', 'Stretch Straps'), ('Yoga Wheel', 'Yoga Wheel'), ('Cushions or Zafus for Meditation', 'Cushions or Zafus for Meditation'), ('Eye Pillows', 'Eye Pillows'), ('Agility Cones', 'Agility Cones'), ('Speed Ladder', 'Speed Ladder'), ('Parallette Bars', 'Parallette Bars'), ('Weighted Sled', 'Weighted Sled'), ('Jump Rope', 'Jump Rope'), ('Resistance Parachute', 'Resistance Parachute'), ('Balance Trainer (BOSU Ball)', 'Balance Trainer (BOSU Ball)'), ('Core Bags', 'Core Bags'), ('Balance Disc', 'Balance Disc'), ('Landmine Attachment for Barbells', 'Landmine Attachment for Barbells'), ('Sand Discs', 'Sand Discs'), ('Weighted Bags', 'Weighted Bags'), ('Boxing Gloves', 'Boxing Gloves'), ('Heart Rate Monitor', 'Heart Rate Monitor'), ('Weighted Jump Rope', 'Weighted Jump Rope'), ('Gymnastic Rings', 'Gymnastic Rings'), ('Aerobic Stepper', 'Aerobic Stepper'), ('Chalk or Chalk Balls', 'Chalk or Chalk Balls'), ('Exercise Ball (Stability Ball)', 'Exercise Ball (Stability Ball)')], help_text='Select predefined equipment or leave blank to enter custom equipment.', max_length=100, unique=True)),
+                ('custom_equipment', models.CharField(blank=True, help_text='Enter custom equipment if not listed above.', max_length=100)),
+                ('equipment_type', models.CharField(choices=[('Public Park Equipment', 'Public Park Equipment'), ('Gym Cardio Machines', 'Gym Cardio Machines'), ('Gym Strength Machines', 'Gym Strength Machines'), ('Gym Free Weights', 'Gym Free Weights'), ('Gym Benches and Racks', 'Gym Benches and Racks'), ('CrossFit Equipment', 'CrossFit Equipment'), ('F45 Training Equipment', 'F45 Training Equipment'), ('Yoga & Mobility Equipment', 'Yoga & Mobility Equipment'), ('Functional Training Equipment', 'Functional Training Equipment'), ('Miscellaneous', 'Miscellaneous')], max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Equipment',
+                'verbose_name_plural': 'Equipment',
+            },
+        ),
+        migrations.CreateModel(
+            name='LLMResponse',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('model_name', models.CharField(max_length=100)),
+                ('response', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('is_staff', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('location_type', models.CharField(max_length=50)),
+                ('address', models.CharField(blank=True, max_length=255, null=True)),
+                ('equipment', models.ManyToManyField(blank=True, related_name='locations', to='trainer.equipment')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('firstname', models.CharField(max_length=30)),
+                ('lastname', models.CharField(max_length=30)),
+                ('gender', models.CharField(choices=[('male', 'Male'), ('female', 'Female'), ('other', 'Other'), ('prefer_not_to_say', 'Prefer not to say')], help_text='Select your gender.', max_length=20)),
+                ('dob', models.DateField()),
+                ('height', models.IntegerField(help_text='Enter height in centimeters. Must be between 50 and 300.', validators=[django.core.validators.MinValueValidator(50), django.core.validators.MaxValueValidator(300)])),
+                ('workout_type_preference', models.CharField(choices=[('functional', 'Improve everyday movement (Functional training)'), ('targeted', 'Build specific muscles (Targeted training)'), ('both', 'Combination of both (Functional and targeted training)')], help_text='Select your workout type preference.', max_length=20)),
+                ('fitness_goals', multiselectfield.db.fields.MultiSelectField(choices=[('heart_health', 'Cardiovascular Health and Endurance - Improve your ability to exercise for longer periods without tiring.'), ('energy', 'General Energy and Stamina - Increase your daily energy levels and feel less fatigue.'), ('muscle_strength', 'Muscle Strength - Become stronger and lift or carry things more easily.'), ('flexibility', 'Flexibility - Improve your ability to stretch and move your body.'), ('explosive_power', 'Explosive Power - Perform quick and powerful movements like jumps or sprints.'), ('speed', 'Speed - Run or move faster over short distances.'), ('coordination', 'Coordination - Improve how your body moves smoothly and in sync.'), ('agility', 'Agility - Move quickly and easily, especially when changing direction.'), ('balance', 'Balance - Stay steady and stable during exercises or daily activities.'), ('precision_control', 'Precision and Control - Perform exercises or movements with accuracy and focus.')], help_text='What would you like Chad to help you with?', max_length=116)),
+                ('fitness_level', models.CharField(blank=True, choices=[('beginner', 'Beginner - Just starting out or returning after a long break, with limited experience.'), ('intermediate', 'Intermediate - Some experience with regular exercise and a moderate level of fitness.'), ('advanced', 'Advanced - Extensive experience, high level of fitness, and familiarity with intense workouts.'), ('elite', 'Elite - Exceptional fitness and performance at a professional or near-professional level.')], default='Beginner', max_length=12)),
+                ('eating_habits', models.CharField(choices=[('poor', 'Poor – Frequent junk food and limited fruits/vegetables.'), ('fair', 'Fair – Balanced meals but occasional unhealthy snacks.'), ('average', 'Average – Mix of healthy and unhealthy meals.'), ('good', 'Good – Mostly balanced meals with occasional indulgences.'), ('excellent', 'Excellent – Consistently balanced, nutrient-rich diet.')], default='average', max_length=10)),
+                ('workout_days', multiselectfield.db.fields.MultiSelectField(blank=True, choices=[('monday', 'Monday'), ('tuesday', 'Tuesday'), ('wednesday', 'Wednesday'), ('thursday', 'Thursday'), ('friday', 'Friday'), ('saturday', 'Saturday'), ('sunday', 'Sunday')], default=['monday', 'tuesday', 'wednesday', 'thursday', 'friday'], max_length=56)),
+                ('preferred_workout_duration', models.CharField(choices=[('10', '10 minutes'), ('15', '15 minutes'), ('20', '20 minutes'), ('25', '25 minutes'), ('30', '30 minutes'), ('35', '35 minutes'), ('40', '40 minutes'), ('45', '45 minutes'), ('50', '50 minutes'), ('55', '55 minutes'), ('60', '60 minutes'), ('65', '65 minutes'), ('70', '70 minutes'), ('75', '75 minutes'), ('80', '80 minutes'), ('85', '85 minutes'), ('90', '90 minutes'), ('95', '95 minutes'), ('100', '100 minutes'), ('105', '105 minutes'), ('110', '110 minutes'), ('115', '115 minutes'), ('120', '120 minutes'), ('125', '125 minutes'), ('130', '130 minutes'), ('135', '135 minutes'), ('140', '140 minutes'), ('145', '145 minutes'), ('150', '150 minutes')], max_length=5)),
+                ('preferred_location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='trainer.location')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('parameters', models.JSONField()),
+                ('input_hash', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('group_id', models.CharField(blank=True, max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='trainer.userpreference')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_id', models.CharField(max_length=20)),
+                ('name', models.CharField(max_length=100, null=True)),
+                ('goal', models.CharField(max_length=400, null=True)),
+                ('explanation', models.CharField(max_length=400, null=True)),
+                ('date', models.DateField()),
+                ('description', models.TextField()),
+                ('workout_type', models.CharField(max_length=50, null=True)),
+                ('muscle_groups', models.JSONField(null=True)),
+                ('complete', models.BooleanField(default=False)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workouts', to='trainer.location')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workouts', to='trainer.userpreference')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WarmUp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField()),
+                ('workout', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='warm_up', to='trainer.workoutsession')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Exercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('recommended_weight', models.CharField(blank=True, max_length=30, null=True)),
+                ('actual_weight', models.CharField(blank=True, max_length=30, null=True)),
+                ('reps', models.TextField(null=True)),
+                ('sets', models.TextField(null=True)),
+                ('description', models.TextField(null=True)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercises', to='trainer.workoutsession')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoolDown',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField()),
+                ('workout', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cool_down', to='trainer.workoutsession')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CardioExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('duration', models.DurationField()),
+                ('distance', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cardio_exercises', to='trainer.workoutsession')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Query',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_id', models.CharField(max_length=20)),
+                ('query', models.CharField(max_length=2000)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_query', to='trainer.userpreference')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group_id'], name='query_group_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeightHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weight_history', to='trainer.userpreference')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['user', '-date'], name='weight_user_date_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['user', '-date'], name='workout_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['group_id', 'date'], name='workout_group_date_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='actual_weight_kg',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='is_bodyweight',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='per_side',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='recommended_weight_kg',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='reps_max',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='reps_min',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='sets_count',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
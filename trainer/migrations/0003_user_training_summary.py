@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0002_exercise_numeric_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrainingSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='training_summary', serialize=False, to='trainer.userpreference')),
+                ('recent_sessions', models.PositiveIntegerField(default=0)),
+                ('sessions_per_week', models.FloatField(default=0)),
+                ('muscle_group_counts', models.JSONField(blank=True, default=dict)),
+                ('recent_volume', models.PositiveIntegerField(blank=True, null=True)),
+                ('recent_tonnage', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('latest_weight', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('latest_weight_date', models.DateField(blank=True, null=True)),
+                ('latest_bmi', models.FloatField(blank=True, null=True)),
+                ('computed_on', models.DateField()),
+                ('last_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='trainer.workoutsession')),
+                ('next_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='trainer.workoutsession')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0004_workout_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='query',
+            name='parameters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='query',
+            name='query',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0005_query_parameters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('generating', 'Generating'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10)),
+                ('model_name', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plans', to='trainer.userpreference')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generation_jobs', to='trainer.workoutplan'),
+        ),
+        migrations.AddField(
+            model_name='query',
+            name='plan',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='queries', to='trainer.workoutplan'),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='plan',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='workouts', to='trainer.workoutplan'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user', '-start_date'], name='plan_user_start_idx'),
+        ),
+    ]
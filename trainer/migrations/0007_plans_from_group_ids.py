@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Max, Min
+
+
+def create_plans(apps, schema_editor):
+    """
+    Creates a WorkoutPlan for every (user, group_id) in use and points the
+    workouts, queries and generation jobs of the group at it.
+    """
+    WorkoutPlan = apps.get_model('trainer', 'WorkoutPlan')
+    WorkoutSession = apps.get_model('trainer', 'WorkoutSession')
+    Query = apps.get_model('trainer', 'Query')
+    GenerationJob = apps.get_model('trainer', 'GenerationJob')
+
+    groups = {}
+    for row in WorkoutSession.objects.values('user_id', 'group_id').annotate(start=Min('date'), end=Max('date')):
+        groups[row['user_id'], row['group_id']] = {'start_date': row['start'], 'end_date': row['end']}
+    for key in Query.objects.values_list('user_id', 'group_id').distinct():
+        groups.setdefault(key, {})
+    for key in GenerationJob.objects.exclude(group_id='').values_list('user_id', 'group_id').distinct():
+        groups.setdefault(key, {})
+
+    for (user_id, group_id), dates in groups.items():
+        job = GenerationJob.objects.filter(user_id=user_id, group_id=group_id).order_by('created_at').first()
+        plan = WorkoutPlan.objects.create(
+            user_id=user_id,
+            status='failed' if job and job.status == 'failed' else 'ready',
+            **dates,
+        )
+        if job:
+            WorkoutPlan.objects.filter(pk=plan.pk).update(created_at=job.created_at)
+        for model in (WorkoutSession, Query, GenerationJob):
+            model.objects.filter(user_id=user_id, group_id=group_id).update(plan=plan)
+
+
+def restore_group_ids(apps, schema_editor):
+    WorkoutPlan = apps.get_model('trainer', 'WorkoutPlan')
+    for name in ('WorkoutSession', 'Query', 'GenerationJob'):
+        model = apps.get_model('trainer', name)
+        for plan_id in model.objects.exclude(plan=None).values_list('plan_id', flat=True).distinct():
+            model.objects.filter(plan_id=plan_id).update(group_id=str(plan_id))
+        # Detach first: deleting the plans would cascade to the workouts and queries
+        model.objects.update(plan=None)
+    WorkoutPlan.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0006_workout_plan'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_plans, restore_group_ids),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0007_plans_from_group_ids'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='query',
+            name='query_group_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workoutsession',
+            name='workout_group_date_idx',
+        ),
+        # A default lets the columns be added back (and refilled by 0007) when migrating backwards
+        migrations.AlterField(
+            model_name='query',
+            name='group_id',
+            field=models.CharField(default='', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='workoutsession',
+            name='group_id',
+            field=models.CharField(default='', max_length=20),
+        ),
+        migrations.RemoveField(
+            model_name='generationjob',
+            name='group_id',
+        ),
+        migrations.RemoveField(
+            model_name='query',
+            name='group_id',
+        ),
+        migrations.RemoveField(
+            model_name='workoutsession',
+            name='group_id',
+        ),
+        migrations.AlterField(
+            model_name='query',
+            name='plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queries', to='trainer.workoutplan'),
+        ),
+        migrations.AlterField(
+            model_name='workoutsession',
+            name='plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workouts', to='trainer.workoutplan'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['plan', 'date'], name='workout_plan_date_idx'),
+        ),
+    ]
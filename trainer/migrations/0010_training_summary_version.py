@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:35
+
+import time
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainer', '0009_updated_at_stamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertrainingsummary',
+            name='version',
+            field=models.PositiveBigIntegerField(default=time.time_ns),
+        ),
+    ]
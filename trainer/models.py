@@ -16,10 +16,15 @@ from .lists_and_dictionaries import (
 
 from decimal import Decimal
 from datetime import date
+import json
+import time
+import zlib
 from django.conf import settings
-from .managers import CustomUserManager  # Import the custom manager
+from .managers import CustomUserManager, ExerciseQuerySet, UserPreferenceQuerySet, WeightHistoryQuerySet  # Import the custom managers
+from .parsing import parse_reps, parse_sets, parse_weight_kg
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
@@ -80,11 +85,25 @@ class Location(models.Model):
     location_type = models.CharField(max_length=50)
     address = models.CharField(max_length=255, blank=True, null=True)
     equipment = models.ManyToManyField(Equipment, blank=True, related_name='locations')
+    # Version stamp for conditional GETs; equipment changes touch it via signals
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
+class CatalogVersion(models.Model):
+    """
+    Version of the location and equipment catalog, in a single row. It is
+    part of every catalog cache key and is bumped by ``trainer.signals`` on
+    any change, so processes that share no cache still agree on it.
+    """
+    version = models.PositiveBigIntegerField(default=time.time_ns)
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
+
+
 class UserPreference(models.Model):
     """
     Stores user-specific workout preferences, including preferred workout location,
@@ -158,11 +177,16 @@ class UserPreference(models.Model):
             )
         return None
 
+    objects = UserPreferenceQuerySet.as_manager()
+
     @property
     def bmi(self):
         """
         Calculate the user's BMI based on their most recent weight and height.
+        Uses the value annotated by ``with_latest_weight()`` when there is one.
         """
+        if hasattr(self, 'bmi_value'):
+            return self.bmi_value
         try:
             # Get the most recent weight entry
             latest_weight_entry = self.weight_history.first()
@@ -186,11 +210,16 @@ class WeightHistory(models.Model):
     date = models.DateField()
     weight = models.DecimalField(max_digits=5, decimal_places=2)  # in kg
 
+    objects = WeightHistoryQuerySet.as_manager()
+
     @property
     def bmi(self):
         """
         Calculate the BMI for this weight entry using the user's height.
+        Uses the value annotated by ``with_bmi()`` when there is one.
         """
+        if hasattr(self, 'bmi_value'):
+            return self.bmi_value
         if not self.user.height:
             return None  # Height is required for BMI calculation
         
@@ -203,15 +232,58 @@ class WeightHistory(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Latest weigh-ins of a user (homepage chart, BMI)
+            models.Index(fields=['user', '-date'], name='weight_user_date_idx'),
+        ]
+
+class WorkoutPlan(models.Model):
+    """
+    A generated set of workouts: one day or one week, created by a generation
+    job. Its workouts and the record of what it was generated from (Query)
+    point to it.
+    """
+    STATUS_GENERATING = 'generating'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_GENERATING, 'Generating'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(UserPreference, on_delete=models.CASCADE, related_name='plans')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_READY)
+    model_name = models.CharField(max_length=100, blank=True)  # LLM the plan was generated with
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # A user's plans, newest first
+            models.Index(fields=['user', '-start_date'], name='plan_user_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Plan {self.pk} for {self.user} from {self.start_date}"
+
 
 class Query(models.Model):
-    group_id = models.CharField(max_length=20)
+    """
+    What a plan was generated from.
+    """
+    plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE, related_name='queries')
     user = models.ForeignKey(UserPreference, on_delete=models.CASCADE, related_name='user_query')
-    query = models.CharField(max_length=2000)
+    # Full prompt; only set on plans generated before parameters were recorded
+    query = models.TextField(blank=True)
+    # Job parameters plus the weigh-in and workout IDs the history was built from, e.g.
+    # {"plan_duration": "week", "start_date": "2024-11-04", "location_id": 3, ..., "workout_history_ids": [12, 9]}
+    parameters = models.JSONField(default=dict, blank=True)
 
 
 class WorkoutSession(models.Model):
-    group_id = models.CharField(max_length=20)
+    plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE, related_name='workouts')
     user = models.ForeignKey(UserPreference, on_delete=models.CASCADE, related_name='workouts')
     name = models.CharField(max_length=100, null=True)
     goal = models.CharField(max_length=400, null=True)
@@ -226,6 +298,16 @@ class WorkoutSession(models.Model):
     workout_type = models.CharField(null=True, max_length=50)  # e.g., "Strength Training"
     muscle_groups = models.JSONField(null=True)  # e.g., ["Chest", "Back", "Legs"]
     complete = models.BooleanField(default=False)
+    # Version stamp for conditional GETs and render caching; warm-up and cool-down changes touch it via signals
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Recent and upcoming workouts of a user; also serves date > today for the next workout
+            models.Index(fields=['user', '-date'], name='workout_user_date_idx'),
+            # The workouts of one plan, in date order
+            models.Index(fields=['plan', 'date'], name='workout_plan_date_idx'),
+        ]
 
     def __str__(self):
         return f"Workout on {self.date} - {self.user.firstname}"
@@ -240,6 +322,12 @@ class CoolDown(models.Model):
 
 
 class Exercise(models.Model):
+    # Numeric columns filled by normalize(), so volume and tonnage can be aggregated in SQL
+    NUMERIC_FIELDS = [
+        'sets_count', 'reps_min', 'reps_max', 'per_side',
+        'recommended_weight_kg', 'actual_weight_kg', 'is_bodyweight',
+    ]
+
     workout = models.ForeignKey(WorkoutSession, on_delete=models.CASCADE, related_name='exercises')
     name = models.CharField(max_length=100)
     recommended_weight = models.CharField(max_length=30, blank=True, null=True)
@@ -247,13 +335,175 @@ class Exercise(models.Model):
     reps = models.TextField(null=True)
     sets = models.TextField(null=True)
     description = models.TextField(null=True)
+    sets_count = models.PositiveSmallIntegerField(null=True, blank=True)
+    reps_min = models.PositiveSmallIntegerField(null=True, blank=True)
+    reps_max = models.PositiveSmallIntegerField(null=True, blank=True)
+    per_side = models.BooleanField(default=False)  # e.g., "10 per leg"
+    recommended_weight_kg = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    actual_weight_kg = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    is_bodyweight = models.BooleanField(default=False)
+    # Version stamp for conditional GETs and render caching. bulk_update() does not set it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ExerciseQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name} for {self.workout}"
 
+    def normalize(self):
+        """
+        Fills the numeric columns from the free-text sets, reps and weights.
+        The text is kept as the LLM or user wrote it. Values that don't fit
+        the columns are left empty.
+        """
+        self.sets_count = _fits_small_int(parse_sets(self.sets))
+        reps_min, reps_max, self.per_side = parse_reps(self.reps)
+        self.reps_min = _fits_small_int(reps_min)
+        self.reps_max = _fits_small_int(reps_max)
+        recommended_kg, recommended_bodyweight = parse_weight_kg(self.recommended_weight)
+        actual_kg, actual_bodyweight = parse_weight_kg(self.actual_weight)
+        self.recommended_weight_kg = _fits_weight(recommended_kg)
+        self.actual_weight_kg = _fits_weight(actual_kg)
+        self.is_bodyweight = actual_bodyweight if self.actual_weight else recommended_bodyweight
+
+    def save(self, *args, **kwargs):
+        self.normalize()
+        super().save(*args, **kwargs)
+
+
+def _fits_small_int(value):
+    return value if value is not None and value <= 32767 else None
+
+
+def _fits_weight(value):
+    return value if value is not None and value < 10000 else None
+
 class CardioExercise(models.Model):
     workout = models.ForeignKey(WorkoutSession, on_delete=models.CASCADE, related_name='cardio_exercises')
     name = models.CharField(max_length=100)
     duration = models.DurationField()  # e.g., for running
     distance = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # e.g., distance for sprints
 
+
+class UserTrainingSummary(models.Model):
+    """
+    Denormalised training state of one user, maintained on write by
+    ``trainer.training_summary`` so read paths need a single primary-key
+    lookup instead of recomputing it from raw rows on every request.
+    """
+    user = models.OneToOneField(UserPreference, on_delete=models.CASCADE, primary_key=True, related_name='training_summary')
+    last_workout = models.ForeignKey(WorkoutSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    next_workout = models.ForeignKey(WorkoutSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Over the last RECENT_DAYS days
+    recent_sessions = models.PositiveIntegerField(default=0)
+    sessions_per_week = models.FloatField(default=0)
+    muscle_group_counts = models.JSONField(default=dict, blank=True)  # e.g., {"Upper Body": 3, "Core": 1}
+    recent_volume = models.PositiveIntegerField(null=True, blank=True)
+    recent_tonnage = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    latest_weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # in kg
+    latest_weight_date = models.DateField(null=True, blank=True)
+    latest_bmi = models.FloatField(null=True, blank=True)
+    # The next/last workouts and recent window move with the date, so a summary is only good for the day it was computed
+    computed_on = models.DateField()
+    # Bumped on every change to what the homepage or the personal prompt
+    # fragments show. It is part of their cache keys, so processes that
+    # share no cache (e.g. the generation worker) still agree on it
+    version = models.PositiveBigIntegerField(default=time.time_ns)
+
+    def __str__(self):
+        return f"Training summary for {self.user}"
+
+
+class WorkoutArchive(models.Model):
+    """
+    One user's workouts for one calendar month, moved out of the hot workout
+    tables by ``trainer.archive`` once they are older than the archive
+    horizon. The workouts, with their warm-up, cool-down and exercises, and
+    the queries of plans archived in full are kept as zlib-compressed JSON.
+    """
+    user = models.ForeignKey(UserPreference, on_delete=models.CASCADE, related_name='workout_archives')
+    month = models.DateField()  # first day of the month
+    session_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()  # zlib-compressed {"workouts": [...], "queries": [...]}
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='archive_user_month_uniq'),
+        ]
+
+    def unpack(self):
+        """
+        Returns the archived workouts and queries.
+        """
+        return json.loads(zlib.decompress(self.data))
+
+    def pack(self, contents):
+        """
+        Compresses contents into the row, keeping session_count in step.
+
+        Args:
+            contents (dict): {"workouts": [...], "queries": [...]} with JSON-safe values.
+        """
+        self.data = zlib.compress(json.dumps(contents, separators=(',', ':')).encode(), 9)
+        self.session_count = len(contents['workouts'])
+        self.updated_at = timezone.now()
+
+    def __str__(self):
+        return f"{self.user} workouts of {self.month:%B %Y}"
+
+
+class GenerationJob(models.Model):
+    """
+    A queued request to generate a workout plan. Jobs are created by the web
+    views and processed out-of-band by the ``process_generation_jobs``
+    management command, so no web worker waits on the LLM round trip.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(UserPreference, on_delete=models.CASCADE, related_name='generation_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    parameters = models.JSONField()  # e.g., {"plan_duration": "week", "start_date": "2024-11-04", ...}
+    # Hash of the normalised parameters, used to coalesce duplicate submissions
+    input_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    plan = models.ForeignKey(WorkoutPlan, on_delete=models.SET_NULL, null=True, blank=True, related_name='generation_jobs')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Generation job {self.pk} ({self.status}) for {self.user}"
+
+
+class LLMResponse(models.Model):
+    """
+    A cached LLM response, keyed by a hash of the normalised prompt and the
+    model name. Used by the 'database' backend of the LLM response cache.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    model_name = models.CharField(max_length=100)
+    response = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} response {self.key[:12]}"
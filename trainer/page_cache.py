@@ -0,0 +1,124 @@
+import hashlib
+
+from django.db.models import Count, F, Max
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
+
+from .catalog import get_location
+from .models import UserTrainingSummary, WorkoutSession
+
+
+def homepage_version(user_id):
+    """
+    Returns the current version of a user's homepage fragments. It is part of
+    every fragment's cache key, so bumping it retires them all at once. It is
+    read from the user's training summary, so every process sees the same
+    version whatever cache it uses.
+
+    Args:
+        user_id (int): Primary key of the CustomUser.
+
+    Returns:
+        int or None: The version, or None if the user has no summary yet.
+    """
+    return UserTrainingSummary.objects.filter(user__user_id=user_id).values_list('version', flat=True).first()
+
+
+def bump_homepage_version(user_id):
+    """
+    Retires a user's cached homepage fragments and personal prompt fragments.
+    """
+    UserTrainingSummary.objects.filter(user__user_id=user_id).update(version=F('version') + 1)
+
+
+def bump_homepage_versions(preferences_ids):
+    """
+    Retires the cached homepage fragments and personal prompt fragments of
+    the given users.
+
+    Args:
+        preferences_ids (iterable): Primary keys of UserPreferences, or a
+            queryset selecting them.
+    """
+    UserTrainingSummary.objects.filter(user_id__in=preferences_ids).update(version=F('version') + 1)
+
+
+def conditional_page(stamp):
+    """
+    Decorates a GET view so that it answers 304 Not Modified, without running
+    its queries or templates, while the page's version stamp is unchanged.
+
+    Args:
+        stamp (callable): Called with the view's arguments. Returns the page's
+            (etag, last_modified), or None if there is no such page, in which
+            case the view runs as usual.
+    """
+    def stamp_once(request, *args, **kwargs):
+        # condition() asks for the ETag and Last-Modified separately
+        if not hasattr(request, '_page_stamp'):
+            request._page_stamp = stamp(request, *args, **kwargs) or (None, None)
+        return request._page_stamp
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: stamp_once(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: stamp_once(request, *args, **kwargs)[1],
+    )
+
+
+def _workouts_stamp(request, workouts, *parts):
+    # One aggregate over the workouts and their exercises. The counts catch
+    # deletions, which leave no newer stamp behind
+    row = workouts.aggregate(
+        workout_count=Count('id', distinct=True),
+        exercise_count=Count('exercises', distinct=True),
+        workouts_updated=Max('updated_at'),
+        exercises_updated=Max('exercises__updated_at'),
+    )
+    stamps = [row['workouts_updated'], row['exercises_updated']]
+    # The pages extend base.html, which shows the user's menu and CSRF token.
+    # The token is rotated on login, and a page kept with an old one would
+    # have its POSTs rejected, so it is part of the ETag (hashed, as ETags
+    # may be logged or shared where the cookie isn't)
+    get_token(request)  # Sets the token up on a first visit, as rendering the page would
+    csrf_digest = hashlib.md5(request.META['CSRF_COOKIE'].encode()).hexdigest()
+    etag = ":".join(str(part) for part in (
+        *parts, request.user.pk, csrf_digest, row['workout_count'], row['exercise_count'],
+        *(stamp.isoformat() if stamp else '' for stamp in stamps),
+    ))
+    return row['workout_count'], etag, max(filter(None, stamps), default=None)
+
+
+def plan_page_stamp(request, plan_id):
+    """
+    Returns the (etag, last_modified) of a plan's upcoming workouts page, or
+    None if the plan has no workouts of the requesting user's. Only their own
+    workouts are stamped, so a 304 never confirms that another user's plan
+    exists.
+    """
+    found, etag, last_modified = _workouts_stamp(
+        request, WorkoutSession.objects.filter(plan_id=plan_id, plan__user__user=request.user), 'plan', plan_id
+    )
+    return (etag, last_modified) if found else None
+
+
+def workout_page_stamp(request, workout_id):
+    """
+    Returns the (etag, last_modified) of a workout's detail page, or None if
+    the requesting user has no such workout.
+    """
+    found, etag, last_modified = _workouts_stamp(
+        request, WorkoutSession.objects.filter(pk=workout_id, user__user=request.user), 'workout', workout_id
+    )
+    return (etag, last_modified) if found else None
+
+
+def location_page_stamp(request, location_id):
+    """
+    Returns the (etag, last_modified) of a location's detail partial, or None
+    if there is no such location. Read from the cached catalog, so it usually
+    costs only the catalog version's query.
+    """
+    location = get_location(location_id)
+    if location is None:
+        return None
+    return f"location:{location_id}:{location.updated_at.isoformat()}", location.updated_at
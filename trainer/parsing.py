@@ -0,0 +1,72 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+BODYWEIGHT_WORDS = ('bodyweight', 'body weight', 'none', 'n/a', 'no weight')
+POUNDS_TO_KG = Decimal('0.45359237')
+
+
+def parse_sets(text):
+    """
+    Reads the number of sets from free text such as "3" or "3 sets".
+
+    Returns:
+        int: The number of sets, or None if there isn't one.
+    """
+    match = re.search(r'\d+', str(text or ''))
+    return int(match.group()) if match else None
+
+
+def parse_reps(text):
+    """
+    Reads a rep range from free text such as "10", "8-12", "10 per leg" or
+    "45 seconds".
+
+    Returns:
+        tuple: (min reps, max reps, per side flag). The counts are None when
+        the text has no number.
+    """
+    text = str(text or '').lower()
+    numbers = [int(n) for n in re.findall(r'\d+', text)[:2]]
+    per_side = bool(re.search(r'per (leg|side|arm)|each (leg|side|arm)', text))
+    if not numbers:
+        return None, None, per_side
+    return min(numbers), max(numbers), per_side
+
+
+def parse_weight_kg(text):
+    """
+    Reads a weight in kilograms from free text such as "10 kg", "22.5kg",
+    "25 lbs" or "Bodyweight".
+
+    Returns:
+        tuple: (weight in kg as a Decimal or None, bodyweight flag).
+    """
+    text = str(text or '').strip().lower()
+    if not text or any(word in text for word in BODYWEIGHT_WORDS):
+        return None, bool(text)
+    match = re.search(r'(\d+(?:\.\d+)?)', text)
+    if not match:
+        return None, False
+    weight = Decimal(match.group(1))
+    if re.search(r'lb|pound', text):
+        weight = weight * POUNDS_TO_KG
+    return weight.quantize(Decimal('0.01')), False
+
+
+def parse_workout_date(text):
+    """
+    Reads a workout date as returned by the LLM, either "2024-10-28" or, as
+    in the example given in the prompt, "28-10-2024".
+
+    Returns:
+        date: The date, or None if it can't be read.
+    """
+    if isinstance(text, date):
+        return text
+    for date_format in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(text or '').strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,74 @@
+from django.db import transaction
+
+from .models import WorkoutSession, WarmUp, CoolDown, Exercise
+from .page_cache import bump_homepage_version
+from .parsing import parse_workout_date
+from .training_summary import refresh_training_summary
+
+
+def save_workout_plan(preferences, plan, workout_data, location=None):
+    """
+    Persists the parsed workouts of a generated plan in one transaction, with
+    one bulk insert per table. The number of statements is the same for a
+    single day as for a full week, and readers never see a workout without
+    its warm-up, cool-down or exercises.
+
+    Args:
+        preferences (UserPreference): Owner of the workouts.
+        plan (WorkoutPlan): The plan the workouts belong to.
+        workout_data (list): Workout dicts as parsed from the LLM response.
+        location (Location): Where the workouts take place.
+
+    Returns:
+        list: The created WorkoutSession instances.
+    """
+    sessions = [
+        WorkoutSession(
+            plan=plan,
+            user=preferences,
+            location=location,
+            name=workout.get('name'),
+            goal=workout.get('goal'),
+            date=parse_workout_date(workout.get('date')),
+            description=workout.get('explanation') or '',
+            workout_type=workout.get('workout_type'),
+            muscle_groups=[workout['muscle group']] if workout.get('muscle group') else None,
+        )
+        for workout in workout_data
+    ]
+    if not sessions:
+        return []
+
+    with transaction.atomic():
+        # SQLite and PostgreSQL return the new primary keys, which the related rows need
+        WorkoutSession.objects.bulk_create(sessions)
+        WarmUp.objects.bulk_create([
+            WarmUp(workout=session, description=workout['warm_up'])
+            for session, workout in zip(sessions, workout_data)
+            if workout.get('warm_up')
+        ])
+        CoolDown.objects.bulk_create([
+            CoolDown(workout=session, description=workout['cool_down'])
+            for session, workout in zip(sessions, workout_data)
+            if workout.get('cool_down')
+        ])
+        exercises = [
+            Exercise(
+                workout=session,
+                name=exercise.get('name'),
+                sets=exercise.get('sets'),
+                reps=exercise.get('reps'),
+                recommended_weight=exercise.get('recommended_weight'),
+                description=exercise.get('description'),
+            )
+            for session, workout in zip(sessions, workout_data)
+            for exercise in workout.get('exercises', [])
+        ]
+        # bulk_create skips save(), so fill the numeric columns here
+        for exercise in exercises:
+            exercise.normalize()
+        Exercise.objects.bulk_create(exercises)
+        # bulk_create sends no signals, so update the summary once for the whole plan
+        refresh_training_summary(preferences.pk)
+    bump_homepage_version(preferences.user_id)
+    return sessions
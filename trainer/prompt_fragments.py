@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .choices import FITNESS_LEVELS, GOALS
+from .training_summary import get_training_summary
+
+# The response format never changes, so it is built once at import.
+WORKOUT_FORMAT_TRAILER = (
+    "--- Structured Workout Plan ---\n"
+    "Format the entire response as valid JSON as follows:\n"
+    "[{\n"
+    "  \"name\": \"Workout Name\",\n"
+    "  \"goal\": \"Goal of the workout\",\n"
+    "  \"muscle group\": \"Muscle group worked\",\n"
+    "  \"location\": \"Location of workout\",\n"
+    "  \"date\": \"28-10-2024\",\n"
+    "  \"exercises\": [\n"
+    "    {\n"
+    "      \"name\": \"Exercise Name\",\n"
+    "      \"sets\": \"3\",\n"
+    "      \"reps\": \"10 per leg\",\n"
+    "      \"recommended_weight\": \"10 kg\",\n"
+    "      \"description\": \"Exercise description\"\n"
+    "    }\n"
+    "  ],\n"
+    "  \"warm_up\": \"Warm-up details\",\n"
+    "  \"cool_down\": \"Cool-down details\",\n"
+    "  \"important_considerations\": \"Important considerations\",\n"
+    "  \"explanation\": \"Detailed explanation of the workout\"\n"
+    "}]\n"
+)
+
+
+def location_fragment_key(location):
+    # updated_at moves with the location's equipment (see signals), and is read
+    # from the database, so the worker sees changes made by the web process
+    return f"prompt-fragment:location:{location.pk}:{location.updated_at.isoformat()}"
+
+
+def personal_fragment_key(preferences_id, version):
+    # Age changes with the date, so each day gets its own entry
+    return f"prompt-fragment:personal:{preferences_id}:{version}:{date.today().isoformat()}"
+
+
+def location_fragment(location):
+    """
+    Returns the 'Location & Available Equipment' block of a prompt, building
+    and caching it on first use.
+
+    Args:
+        location (Location): The location, freshly read from the database.
+
+    Returns:
+        str: The prompt fragment.
+    """
+    key = location_fragment_key(location)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = (
+            f"Location: {location.name}\n"
+            "Available Equipment for the Workout:\n"
+            + "\n".join(f"  - {equipment}" for equipment in location.equipment.all())
+        )
+        cache.set(key, fragment, settings.PROMPT_FRAGMENT_CACHE_TIMEOUT)
+    return fragment
+
+
+def personal_fragments(preferences):
+    """
+    Returns the parts of the 'Personal Info' and 'Fitness Level Age and BMI'
+    blocks that depend only on the user's saved preferences and latest
+    weigh-in, building and caching them on first use.
+
+    Args:
+        preferences (UserPreference): The user's preferences.
+
+    Returns:
+        tuple: (personal info fragment, fitness fragment).
+    """
+    # The summary's version is bumped by every preference and weigh-in change
+    summary = get_training_summary(preferences)
+    key = personal_fragment_key(preferences.pk, summary.version)
+    fragments = cache.get(key)
+    if fragments is None:
+        workout_days = preferences.workout_days or []
+        personal_info = (
+            "Fitness Goals:\n - "
+            + "\n - ".join(GOALS.labels_for(preferences.fitness_goals))
+            + f"\nWorkouts should take place on these days: {', '.join(day.title() for day in workout_days)}, "
+            f"and there should be no more than {len(workout_days)} workouts per week"
+        )
+        fitness = (
+            f"{FITNESS_LEVELS.label(preferences.fitness_level)}\n"
+            f"Age: {preferences.age}"
+            + (f"\nBMI: {summary.latest_bmi}" if summary.latest_bmi is not None else "")
+        )
+        fragments = (personal_info, fitness)
+        cache.set(key, fragments, settings.PROMPT_FRAGMENT_CACHE_TIMEOUT)
+    return fragments
+
@@ -0,0 +1,58 @@
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import WorkoutSession
+
+
+def workouts_with_details():
+    """
+    Returns a WorkoutSession queryset that loads the warm-up and cool-down in
+    the same query and all exercises in one more, however many workouts are
+    fetched.
+    """
+    return WorkoutSession.objects.select_related('warm_up', 'cool_down').prefetch_related('exercises')
+
+
+def _description(workout, related_name, default):
+    try:
+        return getattr(workout, related_name).description
+    except ObjectDoesNotExist:
+        return default
+
+
+def serialize_exercise(exercise):
+    return {
+        'id': exercise.id,
+        'name': exercise.name,
+        'sets': exercise.sets,
+        'reps': exercise.reps,
+        'description': exercise.description,
+        'recommended_weight': exercise.recommended_weight,
+        'updated_at': exercise.updated_at,
+    }
+
+
+def serialize_workout(workout):
+    """
+    Flattens a workout into the dict the workout templates render. Use it on
+    workouts fetched with workouts_with_details() to avoid extra queries.
+
+    Args:
+        workout (WorkoutSession): The workout to serialize.
+
+    Returns:
+        dict: The workout, its warm-up and cool-down text, and its exercises.
+        updated_at is the latest stamp of the workout and its exercises.
+    """
+    exercises = [serialize_exercise(exercise) for exercise in workout.exercises.all()]
+    return {
+        'id': workout.id,
+        'name': workout.name,
+        'goal': workout.goal,
+        'date': workout.date,
+        'plan_id': workout.plan_id,
+        'description': workout.description,
+        'warm_up': _description(workout, 'warm_up', "No warm-up"),
+        'cool_down': _description(workout, 'cool_down', "No cool-down"),
+        'exercises': exercises,
+        'updated_at': max([workout.updated_at] + [exercise['updated_at'] for exercise in exercises]),
+    }
@@ -0,0 +1,184 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CoolDown, CustomUser, Equipment, Exercise, Location, UserPreference, WarmUp, WeightHistory, WorkoutPlan, WorkoutSession
+from .catalog import invalidate_catalog
+from .page_cache import bump_homepage_version, bump_homepage_versions
+from .training_summary import (
+    exercise_summary_state,
+    record_exercise_change,
+    record_weight,
+    record_workout_change,
+    refresh_training_summary,
+    schedule_summary_refresh,
+    workout_summary_state,
+)
+
+
+def touch_locations(location_ids):
+    # The location page and prompt fragment list the equipment, so their
+    # version stamp moves with it
+    if location_ids:
+        Location.objects.filter(pk__in=location_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Location.equipment.through)
+def location_equipment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        location_ids = [instance.pk]
+    elif pk_set:
+        # Changed from the equipment side, e.g. equipment.locations.add(...)
+        location_ids = list(pk_set)
+    else:
+        location_ids = list(instance.locations.values_list('pk', flat=True))
+    touch_locations(location_ids)
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(pre_delete, sender=Equipment)
+def equipment_changed(sender, instance, **kwargs):
+    location_ids = list(instance.locations.values_list('pk', flat=True))
+    touch_locations(location_ids)
+
+
+# The location and equipment catalog is small and rarely changes, so any
+# change retires all of it
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def catalog_rows_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(m2m_changed, sender=Location.equipment.through)
+def catalog_equipment_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog()
+
+
+# Training summary maintenance. Saved workouts and exercises are applied to the
+# summary as changes, read before the save; the rest recompute it. Deletes
+# cascading from a user (or, for exercises and workouts, from their workout or
+# plan) are skipped: the summary goes with the user, and the workout's or
+# plan's own handler covers the rest.
+
+def _deleted_with(origin, *models):
+    # origin is the instance or queryset whose delete() started the cascade
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, models)
+
+
+@receiver(post_save, sender=UserPreference)
+def preferences_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Height feeds the BMI
+        refresh_training_summary(instance.pk)
+
+
+@receiver(pre_save, sender=WorkoutSession)
+def workout_saving(sender, instance, **kwargs):
+    instance._summary_before = workout_summary_state(instance)
+
+
+@receiver(post_save, sender=WorkoutSession)
+def workout_saved(sender, instance, **kwargs):
+    record_workout_change(instance, instance._summary_before)
+
+
+@receiver(post_delete, sender=WorkoutPlan)
+def plan_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, UserPreference, CustomUser):
+        schedule_summary_refresh(instance.user_id)
+
+
+@receiver(post_delete, sender=WorkoutSession)
+def workout_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, WorkoutPlan, UserPreference, CustomUser):
+        schedule_summary_refresh(instance.user_id)
+
+
+@receiver(pre_save, sender=Exercise)
+def exercise_saving(sender, instance, **kwargs):
+    instance._summary_before = exercise_summary_state(instance)
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_saved(sender, instance, **kwargs):
+    record_exercise_change(instance, instance._summary_before)
+
+
+@receiver(pre_delete, sender=Exercise)
+def exercise_deleting(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, WorkoutSession, WorkoutPlan, UserPreference, CustomUser):
+        instance._summary_before = exercise_summary_state(instance)
+
+
+@receiver(post_delete, sender=Exercise)
+def exercise_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, WorkoutSession, WorkoutPlan, UserPreference, CustomUser):
+        record_exercise_change(instance, instance._summary_before, deleted=True)
+
+
+@receiver(post_save, sender=WeightHistory)
+def weight_saved(sender, instance, **kwargs):
+    record_weight(instance)
+
+
+@receiver(post_delete, sender=WeightHistory)
+def weight_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, UserPreference, CustomUser):
+        refresh_training_summary(instance.user_id)
+
+
+# Homepage fragment versions. Every change to something the homepage shows
+# bumps the owner's version, which retires all of their cached fragments.
+
+@receiver(post_save, sender=UserPreference)
+def homepage_preferences_saved(sender, instance, **kwargs):
+    bump_homepage_version(instance.user_id)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def homepage_location_changed(sender, instance, **kwargs):
+    # The personal details show the preferred location's name
+    bump_homepage_versions(UserPreference.objects.filter(preferred_location=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=WeightHistory)
+@receiver(post_delete, sender=WeightHistory)
+@receiver(post_save, sender=WorkoutSession)
+@receiver(post_delete, sender=WorkoutSession)
+def homepage_user_rows_changed(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, UserPreference, CustomUser):
+        bump_homepage_versions([instance.user_id])
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_save, sender=WarmUp)
+@receiver(post_delete, sender=WarmUp)
+@receiver(post_save, sender=CoolDown)
+@receiver(post_delete, sender=CoolDown)
+def homepage_workout_rows_changed(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, WorkoutSession, WorkoutPlan, UserPreference, CustomUser):
+        bump_homepage_versions(WorkoutSession.objects.filter(pk=instance.workout_id).values_list('user_id', flat=True))
+
+
+# Version stamps. Rows stamp themselves on save (auto_now); these cover what
+# a page shows from other tables.
+
+@receiver(post_save, sender=WarmUp)
+@receiver(post_delete, sender=WarmUp)
+@receiver(post_save, sender=CoolDown)
+@receiver(post_delete, sender=CoolDown)
+def workout_parts_changed(sender, instance, origin=None, **kwargs):
+    # The warm-up and cool-down are shown with the workout
+    if not _deleted_with(origin, WorkoutSession, WorkoutPlan, UserPreference, CustomUser):
+        WorkoutSession.objects.filter(pk=instance.workout_id).update(updated_at=timezone.now())
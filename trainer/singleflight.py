@@ -0,0 +1,58 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, and callers arriving while it is in flight wait for it and get
+    the same result (or exception) instead of repeating the work.
+
+    Coalescing is per process. Duplicates that land on different processes
+    are caught by the database checks of the callers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Runs fn, or waits for the in-flight call with the same key.
+
+        Args:
+            key (hashable): Identifies duplicate calls.
+            fn (callable): The work to do, called without arguments.
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came
+            from another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
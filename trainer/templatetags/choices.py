@@ -0,0 +1,24 @@
+from django import template
+
+from trainer.choices import get_choice_set
+
+register = template.Library()
+
+
+@register.filter
+def choice_label(value, name):
+    """
+    Shows the label of a stored choice key, e.g.
+    {{ preferences.fitness_level|choice_label:"fitness_level" }}.
+    Unknown keys are shown as they are.
+    """
+    return get_choice_set(name).label(value, value)
+
+
+@register.filter
+def choice_labels(values, name):
+    """
+    Maps a list of stored choice keys to their labels, e.g.
+    {{ preferences.fitness_goals|choice_labels:"goal"|join:", " }}.
+    """
+    return get_choice_set(name).labels_for(values)
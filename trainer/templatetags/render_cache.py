@@ -0,0 +1,14 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.simple_tag
+def partial_cache_timeout():
+    """
+    Returns settings.PARTIAL_CACHE_TIMEOUT for {% cache %} blocks in partials
+    that are rendered by several views, e.g.
+    {% partial_cache_timeout as timeout %}{% cache timeout ... %}.
+    """
+    return settings.PARTIAL_CACHE_TIMEOUT
@@ -1,14 +1,49 @@
-from django.test import TestCase
+from django.test import Client, TestCase, SimpleTestCase, override_settings
 from django.contrib.auth import get_user_model
+import json
+import threading
+import time
 from datetime import date, timedelta
-from .models import CustomUser, Equipment, Location, UserPreference, WeightHistory, WorkoutSession, WarmUp, CoolDown, Exercise
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from .models import CatalogVersion, CustomUser, Equipment, Location, UserPreference, WeightHistory, WorkoutSession, WarmUp, CoolDown, Exercise, GenerationJob, UserTrainingSummary, Query, WorkoutArchive, WorkoutPlan
+from .generation import enqueue_generation_job, claim_next_job, run_generation_job, plan_week_days, assign_muscle_groups, generate_workout_plan, regenerate_workout, replaced_workout_key
+from .views import exercise_version, replaced_exercise_key
+from .llm_cache import DjangoCacheBackend, LRUBackend, ResponseCache, make_cache_key
+from .llm import StubBackend
+from .helper_functions import convert_text_to_json
+from .json_stream import StreamingJSONParser, iter_json_objects, repair_json
+from .history_summary import summarize_training_history
+from .parsing import parse_reps, parse_weight_kg
+from .singleflight import SingleFlight
+from .persistence import save_workout_plan
+from .serializers import serialize_workout, workouts_with_details
+from .training_summary import get_training_summary, refresh_training_summary
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from .prompt_fragments import location_fragment, personal_fragments
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.utils import timezone
+from django.conf import settings
+from django.core.management import call_command
+from io import StringIO
+from .management.commands.explain_hot_queries import plan_problems
+from .archive import archive_cutoff, archive_workouts, iter_workout_history
+from .page_cache import homepage_version
+from .catalog import location_choices, location_equipment
+from .forms import LocationForm, WorkoutPlanForm
+from .choices import EQUIPMENT_BY_GROUP, EQUIPMENT_GROUPS_BY_NAME, GOALS, WORKOUT_TYPES
+from django.template import Context, Template
 
 User = get_user_model()
 
 class ModelsTestCase(TestCase):
     def setUp(self):
         # Set up test data for CustomUser, Equipment, Location, and other models
-        self.user = User.objects.create_user(email='testuser@example.com', first_name='Test', last_name='User', password='password')
+        self.user = User.objects.create_user(email='testuser@example.com', password='password')
         self.equipment = Equipment.objects.create(equipment='Dumbbells', equipment_type='Strength')
         self.location = Location.objects.create(name="Gym A", location_type="Gym", address="123 Fitness St.")
         self.user_pref = UserPreference.objects.create(
@@ -16,8 +51,9 @@ class ModelsTestCase(TestCase):
             firstname="Test",
             lastname="User",
             dob=date(1990, 1, 1),
+            height=175,
             preferred_location=self.location,
-            preferred_workout_time="30"
+            preferred_workout_duration="30"
         )
 
     def test_create_equipment(self):
@@ -77,8 +113,10 @@ class ModelsTestCase(TestCase):
 
     def test_weight_history(self):
         # Create, update, and delete WeightHistory for user preference
-        weight_history = WeightHistory.objects.create(user=self.user_pref, date=date.today(), weight=70.0, bmi=22.0)
+        weight_history = WeightHistory.objects.create(user=self.user_pref, date=date.today(), weight=70.0)
         self.assertEqual(weight_history.weight, 70.0)
+        # BMI is derived from the user's height rather than stored
+        self.assertEqual(weight_history.bmi, 22.86)
         
         # Update WeightHistory
         weight_history.weight = 68.0
@@ -94,16 +132,13 @@ class ModelsTestCase(TestCase):
     def test_workout_session(self):
         # Create, update, and delete WorkoutSession
         workout = WorkoutSession.objects.create(
-            group_id="001",
+            plan=WorkoutPlan.objects.create(user=self.user_pref),
             user=self.user_pref,
             name="Morning Routine",
             goal="Increase Strength",
             date=date.today(),
             location=self.location,
-            description="Circuit training focusing on core and lower body",
-            time_taken=timedelta(minutes=45),
-            difficulty_rating=4,
-            enjoyment_rating=5
+            description="Circuit training focusing on core and lower body"
         )
         self.assertEqual(workout.name, "Morning Routine")
 
@@ -120,7 +155,7 @@ class ModelsTestCase(TestCase):
 
     def test_exercise(self):
         # Create, update, and delete Exercise for WorkoutSession
-        workout = WorkoutSession.objects.create(group_id="002", user=self.user_pref, name="Evening Cardio", date=date.today(), location=self.location)
+        workout = WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=self.user_pref), user=self.user_pref, name="Evening Cardio", date=date.today(), location=self.location)
         exercise = Exercise.objects.create(workout=workout, name="Jumping Jacks", recommended_weight="Bodyweight", actual_weight="Bodyweight", reps="3x15")
         
         self.assertEqual(exercise.name, "Jumping Jacks")
@@ -138,7 +173,7 @@ class ModelsTestCase(TestCase):
         
     def test_warm_up_and_cool_down(self):
         # Test creating WarmUp and CoolDown for a WorkoutSession
-        workout = WorkoutSession.objects.create(group_id="003", user=self.user_pref, name="Warm-Up Session", date=date.today(), location=self.location)
+        workout = WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=self.user_pref), user=self.user_pref, name="Warm-Up Session", date=date.today(), location=self.location)
         warm_up = WarmUp.objects.create(workout=workout, description="5 minutes of light cardio")
         cool_down = CoolDown.objects.create(workout=workout, description="5 minutes of stretching")
 
@@ -164,3 +199,1170 @@ class ModelsTestCase(TestCase):
         cool_down.delete()
         self.assertFalse(WarmUp.objects.filter(id=warm_up_id).exists())
         self.assertFalse(CoolDown.objects.filter(id=cool_down_id).exists())
+
+
+def create_preferences(email='planner@example.com'):
+    user = User.objects.create_user(email=email, password='password')
+    location = Location.objects.create(name="Gym B", location_type="Gym")
+    return UserPreference.objects.create(
+        user=user,
+        firstname="Plan",
+        lastname="Ner",
+        dob=date(1990, 1, 1),
+        height=180,
+        preferred_location=location,
+        preferred_workout_duration="45",
+    )
+
+
+def llm_replies(*replies):
+    """
+    Fakes LLMClient.generate for a patched get_llm_client: returns (or
+    raises) the given replies in turn, the last one for good, and applies
+    parse like the real client.
+    """
+    replies = list(replies)
+
+    def generate(prompt, use_cache=False, parse=None):
+        reply = replies.pop(0) if len(replies) > 1 else replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        return parse(reply) if parse else reply
+
+    return generate
+
+
+class GenerationJobTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        self.parameters = {
+            'plan_duration': 'day',
+            'start_date': date.today().isoformat(),
+            'location_id': self.preferences.preferred_location_id,
+            'workout_type': 'functional',
+            'workout_length': '45',
+        }
+
+    def test_claim_next_job_only_once(self):
+        job = enqueue_generation_job(self.preferences, self.parameters)
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, GenerationJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    @patch('trainer.generation.generate_workout_plan', return_value=[])
+    def test_run_generation_job_records_plan(self, generate):
+        job = run_generation_job(enqueue_generation_job(self.preferences, self.parameters))
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertEqual(job.plan.status, WorkoutPlan.STATUS_READY)
+        self.assertEqual(job.plan.start_date, job.plan.end_date)
+        generate.assert_called_once_with(job.user, job.parameters, job.plan)
+        self.assertIsNotNone(job.finished_at)
+
+    @patch('trainer.generation.generate_workout_plan', side_effect=ValueError("Invalid JSON format"))
+    def test_run_generation_job_records_failure(self, generate):
+        job = run_generation_job(enqueue_generation_job(self.preferences, self.parameters))
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertIn("Invalid JSON", job.error)
+        self.assertEqual(job.plan.status, WorkoutPlan.STATUS_FAILED)
+
+    @override_settings(LLM_CLIENT={'MAX_CONCURRENCY': 1})
+    @patch('trainer.generation.get_llm_client')
+    def test_parallel_week_retries_failed_days_and_reports_missing_ones(self, get_llm_client):
+        self.preferences.workout_days = ['monday', 'wednesday', 'friday']
+        self.preferences.save()
+        day = lambda iso: json.dumps([{"name": "Workout", "date": iso, "exercises": []}])
+        # First round: Wednesday raises and Friday has no workout; on the retry only Wednesday recovers
+        get_llm_client.return_value.generate.side_effect = llm_replies(
+            day("2024-11-04"), ValueError("timeout"), "Sorry, no JSON here",
+            day("2024-11-06"), ValueError("timeout"),
+        )
+        parameters = {**self.parameters, 'plan_duration': 'week', 'generation_mode': 'parallel', 'start_date': '2024-11-04'}
+        job = run_generation_job(enqueue_generation_job(self.preferences, parameters))
+
+        self.assertEqual(get_llm_client.return_value.generate.call_count, 5)
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertEqual(job.error, "These days could not be generated: Friday 08 November.")
+        dates = sorted(job.plan.workouts.values_list('date', flat=True))
+        self.assertEqual(dates, [date(2024, 11, 4), date(2024, 11, 6)])
+
+    @override_settings(LLM_CLIENT={'MAX_CONCURRENCY': 1})
+    @patch('trainer.generation.get_llm_client')
+    def test_parallel_week_days_keep_their_dates_and_retry_failed_saves(self, get_llm_client):
+        self.preferences.workout_days = ['monday', 'wednesday']
+        self.preferences.save()
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([{"name": "Workout", "date": "Tuesday", "exercises": []}]))
+        parameters = {**self.parameters, 'plan_duration': 'week', 'generation_mode': 'parallel', 'start_date': '2024-11-04'}
+        job = enqueue_generation_job(self.preferences, parameters)
+
+        save = save_workout_plan
+        failures = [DatabaseError("disk I/O error")]
+
+        def save_once_failing(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return save(*args, **kwargs)
+
+        with patch('trainer.generation.save_workout_plan', side_effect=save_once_failing):
+            job = run_generation_job(job)
+
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertEqual(job.error, "")
+        self.assertEqual(get_llm_client.return_value.generate.call_count, 3)
+        dates = sorted(job.plan.workouts.values_list('date', flat=True))
+        self.assertEqual(dates, [date(2024, 11, 4), date(2024, 11, 6)])
+
+    def test_duplicate_submission_joins_unfinished_job(self):
+        job = enqueue_generation_job(self.preferences, self.parameters)
+        reordered = dict(reversed(list(self.parameters.items())))
+        self.assertEqual(enqueue_generation_job(self.preferences, reordered).pk, job.pk)
+        job.status = GenerationJob.STATUS_DONE
+        job.save()
+        self.assertNotEqual(enqueue_generation_job(self.preferences, self.parameters).pk, job.pk)
+
+    def expire_lease(self, job):
+        started_at = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_LEASE_SECONDS + 1)
+        GenerationJob.objects.filter(pk=job.pk).update(started_at=started_at)
+
+    def test_duplicate_submission_does_not_join_a_lost_job(self):
+        enqueue_generation_job(self.preferences, self.parameters)
+        job = claim_next_job()
+        self.expire_lease(job)
+        self.assertNotEqual(enqueue_generation_job(self.preferences, self.parameters).pk, job.pk)
+
+    @override_settings(GENERATION_JOB_MAX_ATTEMPTS=2)
+    def test_running_job_is_claimed_again_after_its_lease(self):
+        job = enqueue_generation_job(self.preferences, self.parameters)
+        claim_next_job()
+        self.assertIsNone(claim_next_job())
+
+        self.expire_lease(job)
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+        self.assertIsNone(claim_next_job())
+
+        # Out of attempts: the job fails instead of running a third time
+        self.expire_lease(job)
+        self.assertIsNone(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertTrue(job.error)
+
+    @patch('trainer.generation.generate_workout_plan', return_value=[])
+    def test_reclaimed_job_replaces_the_lost_attempts_plan(self, generate):
+        enqueue_generation_job(self.preferences, self.parameters)
+        lost = claim_next_job()
+        lost_plan = WorkoutPlan.objects.create(user=self.preferences, start_date=date.today(), end_date=date.today())
+        GenerationJob.objects.filter(pk=lost.pk).update(plan=lost_plan)
+        self.expire_lease(lost)
+
+        job = run_generation_job(claim_next_job())
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertFalse(WorkoutPlan.objects.filter(pk=lost_plan.pk).exists())
+
+        # The lost worker finishing late doesn't overwrite the outcome
+        generate.side_effect = ValueError("timeout")
+        run_generation_job(lost)
+        self.assertEqual(GenerationJob.objects.get(pk=job.pk).plan_id, job.plan_id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertEqual(job.plan.status, WorkoutPlan.STATUS_READY)
+        self.assertEqual(WorkoutPlan.objects.filter(user=self.preferences).count(), 1)
+
+
+class GenerationJobEventsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        self.client.force_login(self.preferences.user)
+        self.job = GenerationJob.objects.create(user=self.preferences, parameters={'plan_duration': 'day'})
+
+    async def events(self):
+        await self.async_client.aforce_login(self.preferences.user)
+        response = await self.async_client.get(f'/generation-jobs/{self.job.id}/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+    @override_settings(GENERATION_EVENTS_STREAMING=True)
+    @patch('trainer.views.GENERATION_EVENTS_POLL_INTERVAL', 0)
+    async def test_finished_job_streams_its_workouts_then_done(self):
+        plan = await WorkoutPlan.objects.acreate(user=self.preferences)
+        workout = await WorkoutSession.objects.acreate(plan=plan, user=self.preferences, name="Legs", date=date.today())
+        await GenerationJob.objects.filter(pk=self.job.pk).aupdate(plan=plan, status=GenerationJob.STATUS_DONE)
+        body = await self.events()
+        self.assertTrue(body.startswith('event: workout\n'))
+        self.assertIn(f'data: <div class="yellow-outline-box container mt-4" id="workout-{workout.id}">', body)
+        self.assertTrue(body.rstrip().split('\n\n')[-1].startswith('event: done'))
+        self.assertIn(f'/plans/{plan.id}/', body)
+
+    @override_settings(GENERATION_EVENTS_STREAMING=True, GENERATION_EVENTS_MAX_SECONDS=0)
+    @patch('trainer.views.GENERATION_EVENTS_POLL_INTERVAL', 0)
+    async def test_stream_of_a_waiting_job_ends_with_a_retry(self):
+        body = await self.events()
+        self.assertTrue(body.startswith('event: done'))
+        self.assertIn(f'/generation-jobs/{self.job.id}/', body)
+
+    @override_settings(GENERATION_EVENTS_STREAMING=True)
+    @patch('trainer.views.GENERATION_EVENTS_KEEPALIVE_INTERVAL', 0)
+    @patch('trainer.views.GENERATION_EVENTS_POLL_INTERVAL', 0)
+    async def test_quiet_stream_sends_keep_alives(self):
+        with override_settings(GENERATION_EVENTS_MAX_SECONDS=0.01):
+            body = await self.events()
+        self.assertIn(': keep-alive\n\n', body)
+
+    def test_stream_is_off_unless_served_over_asgi(self):
+        self.assertEqual(self.client.get(f'/generation-jobs/{self.job.id}/events/').status_code, 404)
+
+    def test_status_polls_and_lists_saved_workouts(self):
+        plan = WorkoutPlan.objects.create(user=self.preferences)
+        WorkoutSession.objects.create(plan=plan, user=self.preferences, name="Legs", date=date.today())
+        GenerationJob.objects.filter(pk=self.job.pk).update(plan=plan, status=GenerationJob.STATUS_RUNNING)
+        response = self.client.get(f'/generation-jobs/{self.job.id}/')
+        self.assertContains(response, 'hx-trigger="every 2s"')
+        self.assertContains(response, 'Legs')
+        self.assertNotContains(response, '/events/')
+
+    @override_settings(GENERATION_EVENTS_STREAMING=True)
+    def test_status_opens_a_stream_when_streaming(self):
+        self.assertContains(self.client.get(f'/generation-jobs/{self.job.id}/'), f'/generation-jobs/{self.job.id}/events/')
+
+    def test_status_redirects_once_done(self):
+        plan = WorkoutPlan.objects.create(user=self.preferences)
+        GenerationJob.objects.filter(pk=self.job.pk).update(plan=plan, status=GenerationJob.STATUS_DONE)
+        response = self.client.get(f'/generation-jobs/{self.job.id}/')
+        self.assertEqual(response['HX-Redirect'], f'/plans/{plan.id}/')
+
+
+class PlanInputsTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        self.parameters = {
+            'plan_duration': 'week',
+            'start_date': '2024-11-04',
+            'location_id': self.preferences.preferred_location_id,
+            'workout_type': 'functional',
+            'workout_length': '30',
+        }
+        self.plan = WorkoutPlan.objects.create(user=self.preferences)
+        self.old = WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=self.preferences), user=self.preferences, name="Old", date=date(2024, 10, 1))
+
+    @patch('trainer.generation.get_llm_client')
+    def test_plan_records_parameters_not_prompt(self, get_llm_client):
+        get_llm_client.return_value.stream.return_value = iter([json.dumps([{"name": "Legs", "date": "04-11-2024"}])])
+        generate_workout_plan(self.preferences, self.parameters, self.plan)
+        query = Query.objects.get(plan=self.plan)
+        self.assertEqual(query.query, "")
+        self.assertEqual(query.parameters['workout_length'], '30')
+        self.assertEqual(query.parameters['workout_history_ids'], [self.old.id])
+
+    @patch('trainer.generation.get_llm_client')
+    def test_single_day_prompt_lists_siblings_as_constraints(self, get_llm_client):
+        Query.objects.create(plan=self.plan, user=self.preferences, parameters=self.parameters)
+        monday = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Push", date=date(2024, 11, 4), muscle_groups=["Chest"])
+        WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Pull", date=date(2024, 11, 6), muscle_groups=["Back"])
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([{"name": "Press", "date": "04-11-2024"}]))
+
+        new_workout = regenerate_workout(self.preferences, monday)
+
+        prompt = get_llm_client.return_value.generate.call_args.args[0]
+        self.assertIn("- Wednesday 2024-11-06: Pull (Back)", prompt)
+        self.assertIn("different from the one it replaces: Push (Chest)", prompt)
+        self.assertIn("30 minutes", prompt)
+        self.assertNotIn("Training History", prompt)
+        self.assertEqual(new_workout.name, "Press")
+        self.assertFalse(WorkoutSession.objects.filter(pk=monday.pk).exists())
+        self.assertEqual(new_workout.plan, self.plan)
+
+    @patch('trainer.generation.get_llm_client')
+    def test_replacement_workout_keeps_the_replaced_workouts_date(self, get_llm_client):
+        wednesday = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Pull", date=date(2024, 11, 6))
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([{"name": "Rows", "date": date.today().isoformat()}]))
+        new_workout = regenerate_workout(self.preferences, wednesday)
+        new_workout.refresh_from_db()
+        self.assertEqual(new_workout.date, date(2024, 11, 6))
+
+    @patch('trainer.generation.get_llm_client')
+    def test_replacement_workout_may_be_a_bare_object(self, get_llm_client):
+        monday = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Push", date=date(2024, 11, 4))
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps({"name": "Press", "date": "04-11-2024"}))
+        self.assertEqual(regenerate_workout(self.preferences, monday).name, "Press")
+
+    @patch('trainer.generation.get_llm_client')
+    def test_workout_replaced_meanwhile_by_another_process_is_not_replaced_twice(self, get_llm_client):
+        monday = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Push", date=date(2024, 11, 4))
+
+        def replaced_elsewhere(prompt, use_cache, parse):
+            # Another process finishes replacing the same workout first
+            cache.set(replaced_workout_key(monday.pk), regenerated.pk)
+            WorkoutSession.objects.filter(pk=monday.pk).delete()
+            return parse(json.dumps([{"name": "Press", "date": "04-11-2024"}]))
+
+        regenerated = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Squat", date=date(2024, 11, 4))
+        get_llm_client.return_value.generate.side_effect = replaced_elsewhere
+
+        self.assertEqual(regenerate_workout(self.preferences, monday), regenerated)
+        self.assertEqual(list(self.plan.workouts.values_list('name', flat=True)), ["Squat"])
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', work)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', work))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        # Give the followers time to join the in-flight call
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("result", False)] + [("result", True)] * 3)
+
+    def test_errors_are_not_remembered(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('key', lambda: int("x"))
+        self.assertEqual(flight.do('key', lambda: 1), (1, False))
+
+
+class ResponseCacheTestCase(SimpleTestCase):
+    def test_key_ignores_whitespace_but_not_model(self):
+        key = make_cache_key("Replace exercise 'Push-up',\n  with sets: 3", "gemini-1.5-flash")
+        self.assertEqual(key, make_cache_key("Replace exercise 'Push-up', with sets: 3 ", "gemini-1.5-flash"))
+        self.assertNotEqual(key, make_cache_key("Replace exercise 'Push-up', with sets: 3", "gemini-1.5-pro"))
+
+    def test_hits_and_misses_are_counted(self):
+        cache = ResponseCache(LRUBackend(max_entries=10, timeout=60))
+        generate = lambda prompt: '[{"name": "Incline Push-up"}]'
+        cache.get_or_generate("Push-up 3x10", "gemini-1.5-flash", generate)
+        cache.get_or_generate("Push-up 3x10", "gemini-1.5-flash", generate)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_response_that_does_not_parse_is_not_cached(self):
+        cache = ResponseCache(LRUBackend(max_entries=10, timeout=60))
+        replies = iter(["Sorry, try again later", '[{"name": "Incline Push-up"}]'])
+        generate = lambda prompt: next(replies)
+        with self.assertRaises(json.JSONDecodeError):
+            cache.get_or_generate("Push-up 3x10", "gemini-1.5-flash", generate, parse=json.loads)
+        parsed = cache.get_or_generate("Push-up 3x10", "gemini-1.5-flash", generate, parse=json.loads)
+        self.assertEqual(parsed, [{"name": "Incline Push-up"}])
+        self.assertEqual(cache.get_or_generate("Push-up 3x10", "gemini-1.5-flash", generate, parse=json.loads), parsed)
+        self.assertEqual(cache.stats['hits'], 1)
+
+    def test_lru_evicts_least_recently_used(self):
+        backend = LRUBackend(max_entries=2, timeout=60)
+        backend.set('a', '1')
+        backend.set('b', '2')
+        backend.get('a')
+        backend.set('c', '3')
+        self.assertEqual(backend.get('a'), '1')
+        self.assertIsNone(backend.get('b'))
+
+    def test_django_backend_clear_keeps_other_entries(self):
+        backend = DjangoCacheBackend(max_entries=10, timeout=60)
+        backend.set('a', '1')
+        cache.set('homepage-version:1', 5)
+        backend.clear()
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(cache.get('homepage-version:1'), 5)
+
+
+class StubBackendTestCase(SimpleTestCase):
+    def test_week_prompt_is_deterministic_and_parseable(self):
+        backend = StubBackend(model_name='stub')
+        prompt = "Create a workout plan for one week tailored to you. The workout should start on 2024-11-04."
+        self.assertEqual(backend.generate(prompt), backend.generate(prompt))
+        workouts = convert_text_to_json(backend.generate(prompt))
+        self.assertEqual(len(workouts), 7)
+        self.assertEqual(workouts[0]['date'], '2024-11-04')
+
+    def test_exercise_prompt_returns_one_exercise(self):
+        exercises = convert_text_to_json(StubBackend(model_name='stub').generate("Replace exercise 'Push-up', with sets: 3"))
+        self.assertEqual(len(exercises), 1)
+        self.assertIn('recommended_weight', exercises[0])
+
+
+class IterJsonObjectsTestCase(SimpleTestCase):
+    def test_objects_are_yielded_as_they_close(self):
+        text = '```json\n[{"name": "Day {1}", "exercises": [{"name": "Squat"}]}, {"name": "Day \\"2\\""}]\n```'
+        chunks = (text[i:i + 7] for i in range(0, len(text), 7))
+        workouts = list(iter_json_objects(chunks))
+        self.assertEqual([w['name'] for w in workouts], ['Day {1}', 'Day "2"'])
+        self.assertEqual(workouts[0]['exercises'][0]['name'], 'Squat')
+
+
+class StreamingJSONParserTestCase(SimpleTestCase):
+    def test_repairs_common_llm_defects(self):
+        repaired = repair_json('{"reps": 10 per leg, "sets": 3, "tags": ["a", "b",], “name”: “Push-up”,}')
+        self.assertEqual(json.loads(repaired), {"reps": "10 per leg", "sets": 3, "tags": ["a", "b"], "name": "Push-up"})
+
+    def test_bad_object_does_not_fail_the_plan(self):
+        parser = StreamingJSONParser()
+        workouts = parser.feed('[{"name": "Day 1"}, {"name": "Day 2" "goal"}, {"name": "Day 3"}]') + parser.close()
+        self.assertEqual([w['name'] for w in workouts], ['Day 1', 'Day 3'])
+        self.assertEqual(len(parser.errors), 1)
+
+    def test_truncated_tail_is_closed(self):
+        parser = StreamingJSONParser()
+        workouts = parser.feed('```json\n[{"name": "Day 1"}, {"name": "Day 2", "exercises": [{"name": "Squ') + parser.close()
+        self.assertEqual(workouts[1], {"name": "Day 2", "exercises": [{"name": "Squ"}]})
+
+    def test_convert_text_to_json_strips_fence_prefix_only(self):
+        self.assertEqual(convert_text_to_json('```json\n{"json": "on"}\n```'), {"json": "on"})
+
+
+class ReplaceExercisesTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        self.workout = WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=self.preferences), user=self.preferences, name="Leg Day", date=date.today())
+        self.exercises = [
+            Exercise.objects.create(workout=self.workout, name=name, sets="3", reps="10")
+            for name in ("Squat", "Lunge", "Calf Raise")
+        ]
+        self.client.force_login(self.preferences.user)
+
+    @patch('trainer.views.get_llm_client')
+    def test_selected_exercises_are_swapped_in_one_call(self, get_llm_client):
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([
+            {"name": "Goblet Squat", "sets": "4", "reps": "8"},
+            {"name": "Step-up", "sets": "3", "reps": "12"},
+        ]))
+        response = self.client.post(
+            f'/workouts/{self.workout.id}/exercises/replace/',
+            {'exercise_ids': [self.exercises[0].id, self.exercises[2].id]},
+        )
+        self.assertEqual(response.status_code, 200)
+        get_llm_client.return_value.generate.assert_called_once()
+        names = list(self.workout.exercises.order_by('id').values_list('name', flat=True))
+        self.assertEqual(names, ["Goblet Squat", "Lunge", "Step-up"])
+
+    @patch('trainer.views.get_llm_client')
+    def test_repeated_click_does_not_replace_again(self, get_llm_client):
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([{"name": "Goblet Squat", "sets": "4", "reps": "8"}]))
+        url = f'/workouts/{self.workout.id}/exercises/replace/'
+        # The versions the page was rendered with
+        page = self.client.get(f'/plans/{self.workout.plan_id}/')
+        versions = [exercise_version(exercise) for exercise in self.exercises]
+        for version in versions:
+            self.assertContains(page, f'value="{version}"')
+        data = {'exercise_ids': [self.exercises[0].id], 'exercise_versions': versions}
+
+        self.assertContains(self.client.post(url, data), "Goblet Squat")
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps([{"name": "Front Squat", "sets": "3", "reps": "5"}]))
+        self.assertContains(self.client.post(url, data), "Goblet Squat")
+        get_llm_client.return_value.generate.assert_called_once()
+
+    @patch('trainer.views.get_llm_client')
+    def test_unparseable_replacement_is_reported_as_json(self, get_llm_client):
+        get_llm_client.return_value.generate.side_effect = llm_replies("Sorry, no JSON here")
+        response = self.client.post(f'/workouts/{self.workout.id}/exercise/replace/{self.exercises[0].id}/')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['status'], 'failed')
+
+        get_llm_client.return_value.generate.side_effect = llm_replies(ConnectionError("timeout"))
+        response = self.client.post(f'/workouts/{self.workout.id}/exercises/replace/', {'exercise_ids': [self.exercises[0].id]})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['error'], "timeout")
+        self.assertTrue(Exercise.objects.filter(pk=self.exercises[0].pk, name="Squat").exists())
+
+    @patch('trainer.views.get_llm_client')
+    def test_single_replacement_may_be_a_bare_object(self, get_llm_client):
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps({"name": "Goblet Squat", "sets": "4", "reps": "8"}))
+        response = self.client.post(
+            f'/workouts/{self.workout.id}/exercises/replace/',
+            {'exercise_ids': [self.exercises[0].id]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.workout.exercises.order_by('id').first().name, "Goblet Squat")
+
+    @patch('trainer.views.get_llm_client')
+    def test_other_users_cannot_replace_exercises(self, get_llm_client):
+        url = f'/workouts/{self.workout.id}/exercises/replace/'
+        data = {'exercise_ids': [self.exercises[0].id]}
+        self.client.logout()
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+        self.client.force_login(create_preferences('other@example.com').user)
+        self.assertEqual(self.client.post(url, data).status_code, 404)
+
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(self.preferences.user)
+        self.assertEqual(csrf_client.post(url, data).status_code, 403)
+        get_llm_client.assert_not_called()
+
+    @patch('trainer.views.get_llm_client')
+    def test_replacement_exercise_may_be_a_bare_object(self, get_llm_client):
+        get_llm_client.return_value.generate.side_effect = llm_replies(json.dumps({"name": "Front Squat", "sets": "3", "reps": "5"}))
+        response = self.client.post(f'/workouts/{self.workout.id}/exercise/replace/{self.exercises[0].id}/')
+        self.assertContains(response, "Front Squat")
+
+    @patch('trainer.views.get_llm_client')
+    def test_exercise_replaced_meanwhile_by_another_process_is_not_replaced_twice(self, get_llm_client):
+        squat = self.exercises[0]
+        replacement = Exercise.objects.create(workout=self.workout, name="Goblet Squat", sets="4", reps="8")
+
+        def replaced_elsewhere(prompt, use_cache, parse):
+            # Another process finishes replacing the same exercise first
+            cache.set(replaced_exercise_key(squat.pk), replacement.pk)
+            Exercise.objects.filter(pk=squat.pk).delete()
+            return parse(json.dumps([{"name": "Front Squat", "sets": "3", "reps": "5"}]))
+
+        get_llm_client.return_value.generate.side_effect = replaced_elsewhere
+        response = self.client.post(f'/workouts/{self.workout.id}/exercise/replace/{squat.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Goblet Squat")
+        self.assertFalse(self.workout.exercises.filter(name="Front Squat").exists())
+
+
+class PlanPersistenceTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        # The first save would otherwise also create the training summary row
+        refresh_training_summary(self.preferences.pk)
+
+    def test_statement_count_does_not_grow_with_plan_size(self):
+        counts = {}
+        for days in (1, 7):
+            workout_data = convert_text_to_json(StubBackend('stub').generate(
+                f"plan for one {'week' if days == 7 else 'day'} start on 2024-11-04"
+            ))
+            self.assertEqual(len(workout_data), days)
+            plan = WorkoutPlan.objects.create(user=self.preferences)
+            with CaptureQueriesContext(connection) as queries:
+                sessions = save_workout_plan(self.preferences, plan, workout_data)
+            counts[days] = len(queries)
+            self.assertEqual(len(sessions), days)
+            self.assertEqual(Exercise.objects.filter(workout__plan=plan).count(), days * 4)
+            self.assertEqual(WarmUp.objects.filter(workout__plan=plan).count(), days)
+        self.assertEqual(counts[1], counts[7])
+        self.assertEqual(sessions[0].date, date(2024, 11, 4))
+
+    def test_day_first_dates_are_read(self):
+        session, = save_workout_plan(self.preferences, WorkoutPlan.objects.create(user=self.preferences), [{"name": "Legs", "date": "28-10-2024"}])
+        session.refresh_from_db()
+        self.assertEqual(session.date, date(2024, 10, 28))
+
+
+class UpcomingWorkoutsQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        workout_data = convert_text_to_json(StubBackend('stub').generate("plan for one week start on 2024-11-04"))
+        self.plan = WorkoutPlan.objects.create(user=self.preferences)
+        save_workout_plan(self.preferences, self.plan, workout_data)
+        self.client.force_login(self.preferences.user)
+
+    def test_week_plan_is_loaded_in_two_queries(self):
+        # Two queries for the session and user, then one for the version
+        # stamp, one for the workouts with their warm-ups and cool-downs, one
+        # for all exercises
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/plans/{self.plan.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['workouts_data']), 7)
+        self.assertEqual(response.context['workouts_data'][0]['warm_up'], "5 minutes of light cardio and dynamic stretching.")
+
+    def test_missing_warm_up_is_reported(self):
+        workout = WorkoutSession.objects.create(plan=self.plan, user=self.preferences, name="Rest", date=date.today())
+        with self.assertNumQueries(2):
+            data = serialize_workout(workouts_with_details().get(id=workout.id))
+        self.assertEqual(data['warm_up'], "No warm-up")
+        self.assertEqual(data['exercises'], [])
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        workout_data = convert_text_to_json(StubBackend('stub').generate("plan for one week start on 2024-11-04"))
+        self.plan = WorkoutPlan.objects.create(user=self.preferences)
+        self.workouts = save_workout_plan(self.preferences, self.plan, workout_data)
+        self.client.force_login(self.preferences.user)
+
+    def assertRevalidates(self, url, queries):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(queries):
+            unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(unchanged.status_code, 304)
+        return response['ETag']
+
+    def test_plan_page_changes_with_its_exercises(self):
+        url = f'/plans/{self.plan.id}/'
+        etag = self.assertRevalidates(url, 3)
+        exercise = self.workouts[0].exercises.first()
+        exercise.actual_weight = "12 kg"
+        exercise.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.assertRevalidates(url, 3)
+        exercise.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_workout_page_changes_with_its_warm_up(self):
+        workout = self.workouts[0]
+        url = f'/workouts/{workout.id}/'
+        etag = self.assertRevalidates(url, 3)
+        workout.warm_up.description = "Skipping"
+        workout.warm_up.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(f'/workouts/{workout.id + 100}/').status_code, 404)
+
+    def test_plan_page_changes_when_logging_in_again(self):
+        # The page carries the CSRF token, which login rotates
+        url = f'/plans/{self.plan.id}/'
+        etag = self.assertRevalidates(url, 3)
+        self.client.logout()
+        self.client.login(email='planner@example.com', password='password')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_location_page_changes_with_its_equipment(self):
+        location = self.preferences.preferred_location
+        url = f'/location/{location.pk}/'
+        etag = self.assertRevalidates(url, 1)
+        location.equipment.add(Equipment.objects.create(equipment="Dumbbells", equipment_type="Gym Free Weights"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pages_of_other_users_are_not_found(self):
+        workout = self.workouts[0]
+        empty_plan = WorkoutPlan.objects.create(user=self.preferences, status=WorkoutPlan.STATUS_GENERATING)
+        urls = [f'/plans/{self.plan.id}/', f'/plans/{empty_plan.id}/', f'/workouts/{workout.id}/']
+        etags = {url: self.client.get(url)['ETag'] for url in urls[::2]}
+        self.assertEqual(self.client.get(urls[1]).status_code, 200)
+
+        self.client.logout()
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+        # Not even a 304 for an ETag copied from the owner: it would confirm the page exists
+        self.client.force_login(create_preferences('other@example.com').user)
+        for url in urls:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags.get(url, '*')).status_code, 404)
+
+    @patch('trainer.generation.get_llm_client')
+    def test_other_users_cannot_replace_workouts(self, get_llm_client):
+        workout = self.workouts[0]
+        url = f'/plans/{self.plan.id}/replace/{workout.id}/'
+        self.client.logout()
+        self.assertEqual(self.client.post(url).status_code, 302)
+        self.client.force_login(create_preferences('other@example.com').user)
+        self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertEqual(self.client.post(f'/workouts/{workout.id}/exercise/replace/{workout.exercises.first().id}/').status_code, 404)
+
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(self.preferences.user)
+        self.assertEqual(csrf_client.post(url).status_code, 403)
+        get_llm_client.assert_not_called()
+        self.assertTrue(WorkoutSession.objects.filter(pk=workout.pk).exists())
+
+
+class PartialRenderCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        workout_data = convert_text_to_json(StubBackend('stub').generate("plan for one week start on 2024-11-04"))
+        self.plan = WorkoutPlan.objects.create(user=self.preferences)
+        self.workouts = save_workout_plan(self.preferences, self.plan, workout_data)
+        self.client.force_login(self.preferences.user)
+
+    def test_only_changed_fragments_are_rendered(self):
+        url = f'/plans/{self.plan.id}/'
+        self.client.get(url)
+
+        # update() leaves the stamps alone, so cached fragments keep the old text
+        Exercise.objects.filter(workout__plan=self.plan).update(description="Stale")
+        exercise = self.workouts[0].exercises.first()
+        exercise.name = "Sumo Squat"
+        exercise.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Sumo Squat")
+        self.assertContains(response, "Stale", count=1)
+
+    def test_deleted_exercise_leaves_the_workout(self):
+        url = f'/plans/{self.plan.id}/'
+        self.client.get(url)
+        exercise = self.workouts[0].exercises.order_by('-id').first()
+        Exercise.objects.filter(workout=self.workouts[0]).exclude(pk=exercise.pk).update(name="Kept")
+        self.assertNotContains(self.client.get(url), "Kept")
+
+        exercise.delete()
+        self.assertEqual(self.client.get(url).content.count(b'id="exercise-'), Exercise.objects.filter(workout__plan=self.plan).count())
+
+
+class WeekFanOutTestCase(SimpleTestCase):
+    def test_plan_week_days_uses_workout_days(self):
+        preferences = SimpleNamespace(workout_days=['monday', 'wednesday'])
+        days = plan_week_days(preferences, date(2024, 11, 4))  # a Monday
+        self.assertEqual(days, [date(2024, 11, 4), date(2024, 11, 6)])
+
+    def test_least_recently_trained_groups_come_first(self):
+        days = [date(2024, 11, 4), date(2024, 11, 5)]
+        sessions = [
+            SimpleNamespace(date=date(2024, 11, 3), muscle_groups=['Upper Body']),
+            SimpleNamespace(date=date(2024, 11, 2), muscle_groups=['Lower Body']),
+        ]
+        focus = assign_muscle_groups(days, sessions)
+        self.assertNotIn(focus[days[0]], ('Upper Body', 'Lower Body'))
+        self.assertNotEqual(focus[days[0]], focus[days[1]])
+
+
+class TrainingHistorySummaryTestCase(SimpleTestCase):
+    def make_session(self, day, exercises):
+        return SimpleNamespace(
+            date=date(2024, 11, day),
+            workout_type='Strength',
+            muscle_groups=['Lower Body'],
+            exercises=SimpleNamespace(all=lambda: exercises),
+        )
+
+    def exercise(self, name, weight, reps="10"):
+        return SimpleNamespace(name=name, sets="3", reps=reps, actual_weight=weight, recommended_weight=None)
+
+    def test_aggregates_per_exercise(self):
+        sessions = [
+            self.make_session(8, [self.exercise("Squat", "60 kg")]),
+            self.make_session(1, [self.exercise("Squat", "50 kg")]),
+        ]
+        text, tokens = summarize_training_history(sessions, [], token_budget=200)
+        self.assertIn("Lower Body: 2024-11-08, 2", text)
+        self.assertIn("Squat: 2024-11-08, 3x10, 2x, 60.00 kg, up 20%", text)
+        self.assertLessEqual(tokens, 200)
+
+    def test_heavy_history_fits_the_budget(self):
+        sessions = [
+            self.make_session(day, [self.exercise(f"Exercise {day}-{i}", f"{i} kg") for i in range(10)])
+            for day in range(1, 29)
+        ]
+        text, tokens = summarize_training_history(sessions, [], token_budget=100)
+        self.assertLessEqual(tokens, 100)
+        self.assertIn("more lines omitted", text)
+
+    def test_tiny_budgets_are_never_exceeded(self):
+        sessions = [self.make_session(8, [self.exercise("Squat", "60 kg")])]
+        for budget in (0, 1, 5, 10):
+            with self.subTest(budget=budget):
+                text, tokens = summarize_training_history(sessions, [], token_budget=budget)
+                self.assertLessEqual(tokens, budget)
+
+    def test_parse_helpers(self):
+        self.assertEqual(parse_reps("8-12 per leg"), (8, 12, True))
+        self.assertEqual(parse_weight_kg("Bodyweight"), (None, True))
+        self.assertEqual(parse_weight_kg("22.5kg"), (Decimal("22.50"), False))
+
+
+class PromptFragmentTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        self.location = self.preferences.preferred_location
+
+    def fragment(self):
+        # The generation worker reads the location fresh for every job
+        return location_fragment(Location.objects.get(pk=self.location.pk))
+
+    def test_location_fragment_follows_equipment_changes(self):
+        dumbbells = Equipment.objects.create(equipment="Dumbbells", equipment_type="Free Weights")
+        self.location.equipment.add(dumbbells)
+        self.assertIn("Dumbbells", self.fragment())
+        location = Location.objects.get(pk=self.location.pk)
+        with self.assertNumQueries(0):
+            location_fragment(location)
+
+        kettlebell = Equipment.objects.create(equipment="Kettlebell", equipment_type="Free Weights")
+        kettlebell.locations.add(self.location)
+        self.assertIn("Kettlebell", self.fragment())
+        self.location.equipment.remove(dumbbells)
+        self.assertNotIn("Dumbbells", self.fragment())
+
+    def test_location_fragment_follows_renames(self):
+        self.assertIn(f"Location: {self.location.name}", self.fragment())
+        Location.objects.filter(pk=self.location.pk).update(name="Garage", updated_at=timezone.now())
+        self.assertIn("Location: Garage", self.fragment())
+
+    def test_personal_fragments_follow_weigh_ins(self):
+        self.assertNotIn("BMI", personal_fragments(self.preferences)[1])
+        WeightHistory.objects.create(user=self.preferences, weight=81, date=date.today())
+        self.assertIn("BMI: 25.0", personal_fragments(self.preferences)[1])
+
+    def test_personal_fragments_follow_changes_made_by_another_process(self):
+        self.assertNotIn("Saturday", personal_fragments(self.preferences)[0])
+        # Another process saves the preferences: no signal reaches this one's
+        # cache, only the bumped version in the database
+        UserPreference.objects.filter(pk=self.preferences.pk).update(workout_days=['saturday'])
+        UserTrainingSummary.objects.filter(user=self.preferences).update(version=F('version') + 1)
+        preferences = UserPreference.objects.get(pk=self.preferences.pk)
+        self.assertIn("Saturday", personal_fragments(preferences)[0])
+
+
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.location = Location.objects.create(name="Park", location_type="Park")
+        self.bar = Equipment.objects.create(equipment="Pull-Up Bar", equipment_type="Public Park Equipment")
+        self.location.equipment.add(self.bar)
+
+    def test_catalog_is_cached_until_it_changes(self):
+        self.assertEqual(location_equipment(self.location.pk), [self.bar])
+        # Only the version is read
+        with self.assertNumQueries(1):
+            self.assertEqual(location_equipment(self.location.pk), [self.bar])
+
+        benches = Equipment.objects.create(equipment="Benches", equipment_type="Public Park Equipment")
+        benches.locations.add(self.location)
+        self.assertEqual(location_equipment(self.location.pk), [self.bar, benches])
+        self.location.equipment.clear()
+        self.assertEqual(location_equipment(self.location.pk), [])
+
+        Location.objects.create(name="Gym", location_type="Gym")
+        self.assertEqual([name for _, name in location_choices()], ["Park", "Gym"])
+
+    def test_forms_render_from_the_catalog(self):
+        str(LocationForm()), str(WorkoutPlanForm())
+        # Within a request, the version is read once
+        request_started.send(sender=self.__class__)
+        try:
+            with self.assertNumQueries(1):
+                html = str(LocationForm())
+                str(WorkoutPlanForm())
+        finally:
+            request_finished.send(sender=self.__class__)
+        self.assertIn("Pull-Up Bar", html)
+
+        form = LocationForm(data={
+            'preferred_location': 'existing',
+            'existing_location': self.location.pk,
+            'new_location_equipment': [self.bar.pk],
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['existing_location'], self.location)
+        self.assertIn('checked', str(form['new_location_equipment']))
+
+    def test_changes_made_by_another_process_are_seen(self):
+        self.assertEqual(location_equipment(self.location.pk), [self.bar])
+        # No signal reaches this process: only the version row changes
+        Location.equipment.through.objects.filter(location=self.location).delete()
+        CatalogVersion.objects.update(version=F('version') + 1)
+        self.assertEqual(location_equipment(self.location.pk), [])
+
+    def test_location_detail(self):
+        response = self.client.get(f'/location/{self.location.pk}/')
+        self.assertContains(response, "Pull-Up Bar")
+        self.assertEqual(self.client.get(f'/location/{self.location.pk + 100}/').status_code, 404)
+
+
+class MigrationsAndIndexesTestCase(TestCase):
+    def test_models_and_migrations_are_in_sync(self):
+        call_command('makemigrations', 'trainer', '--check', '--dry-run', stdout=StringIO())
+
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertNotIn("scan or sort", out.getvalue())
+
+    def test_scans_are_reported(self):
+        plan = WorkoutSession.objects.filter(name="Leg Day").order_by('goal').explain()
+        self.assertEqual(len(plan_problems(plan)), 2)
+
+
+class SQLiteProfileTestCase(TestCase):
+    def test_pragmas_are_applied_on_connect(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+class ExerciseNumericColumnsTestCase(TestCase):
+    def setUp(self):
+        preferences = create_preferences()
+        self.workout = WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=preferences), user=preferences, name="Legs", date=date.today())
+
+    def test_save_fills_numeric_columns(self):
+        exercise = Exercise.objects.create(workout=self.workout, name="Lunge", sets="3 sets", reps="8-12 per leg", recommended_weight="20 lbs")
+        self.assertEqual((exercise.sets_count, exercise.reps_min, exercise.reps_max, exercise.per_side), (3, 8, 12, True))
+        self.assertEqual(exercise.recommended_weight_kg, Decimal("9.07"))
+        self.assertFalse(exercise.is_bodyweight)
+        self.assertEqual(exercise.reps, "8-12 per leg")
+
+    def test_volume_and_tonnage_are_sql_aggregates(self):
+        Exercise.objects.create(workout=self.workout, name="Squat", sets="3", reps="10", recommended_weight="50 kg", actual_weight="60kg")
+        Exercise.objects.create(workout=self.workout, name="Lunge", sets="2", reps="10 per leg", recommended_weight="Bodyweight")
+        with self.assertNumQueries(1):
+            totals = self.workout.exercises.totals()
+        self.assertEqual(totals['volume'], 30 + 40)
+        self.assertEqual(totals['tonnage'], Decimal("1800"))
+
+    def test_backfill_in_chunks(self):
+        Exercise.objects.bulk_create([
+            Exercise(workout=self.workout, name=f"Row {i}", sets="4", reps="6", recommended_weight=f"{i} kg")
+            for i in range(1, 6)
+        ])
+        self.assertFalse(Exercise.objects.filter(sets_count__isnull=False).exists())
+        out = StringIO()
+        call_command('backfill_exercise_numbers', '--chunk-size', '2', stdout=out)
+        self.assertIn("Backfilled 5 exercises", out.getvalue())
+        self.assertEqual(Exercise.objects.filter(sets_count=4, reps_max=6).count(), 5)
+        self.assertEqual(Exercise.objects.get(name="Row 3").recommended_weight_kg, Decimal("3.00"))
+
+
+class TrainingSummaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        today = date.today()
+        plan = WorkoutPlan.objects.create(user=self.preferences)
+        self.past = WorkoutSession.objects.create(plan=plan, user=self.preferences, name="Past", date=today - timedelta(days=2), muscle_groups=["Core"])
+        self.upcoming = WorkoutSession.objects.create(plan=plan, user=self.preferences, name="Next", date=today + timedelta(days=1))
+        Exercise.objects.create(workout=self.past, name="Plank", sets="3", reps="10")
+
+    def test_summary_follows_writes(self):
+        summary = get_training_summary(self.preferences)
+        self.assertEqual(summary.last_workout_id, self.past.id)
+        self.assertEqual(summary.next_workout_id, self.upcoming.id)
+        self.assertEqual(summary.muscle_group_counts, {"Core": 1})
+        self.assertEqual(summary.recent_volume, 30)
+
+        WeightHistory.objects.create(user=self.preferences, weight=81, date=date.today())
+        self.upcoming.delete()
+        summary = get_training_summary(self.preferences)
+        self.assertEqual(summary.latest_bmi, 25.0)
+        self.assertIsNone(summary.next_workout)
+
+    def assertMatchesRefresh(self):
+        fields = ('last_workout_id', 'next_workout_id', 'recent_sessions', 'sessions_per_week',
+                  'muscle_group_counts', 'recent_volume', 'recent_tonnage')
+        incremental = UserTrainingSummary.objects.values(*fields).get(pk=self.preferences.pk)
+        refresh_training_summary(self.preferences.pk)
+        self.assertEqual(incremental, UserTrainingSummary.objects.values(*fields).get(pk=self.preferences.pk))
+
+    def test_saves_update_the_summary_incrementally(self):
+        get_training_summary(self.preferences)
+        with patch('trainer.training_summary.refresh_training_summary') as refresh:
+            exercise = Exercise.objects.create(workout=self.past, name="Row", sets="3", reps="12", recommended_weight="20 kg")
+            exercise.actual_weight = "25 kg"
+            exercise.save()
+            Exercise.objects.create(workout=self.upcoming, name="Squat", sets="5", reps="5")
+            recent = WorkoutSession.objects.create(
+                plan=self.past.plan, user=self.preferences, name="Today", date=date.today(), muscle_groups=["Core", "Legs"]
+            )
+            recent.muscle_groups = ["Legs"]
+            recent.save()
+            WorkoutSession.objects.create(plan=self.past.plan, user=self.preferences, name="Later", date=date.today() + timedelta(days=3))
+            exercise.delete()
+        refresh.assert_not_called()
+        self.assertMatchesRefresh()
+
+        # Marking a workout complete touches nothing the summary shows: one
+        # query reads it before the save, none writes the summary
+        summary_updates = lambda queries: [q for q in queries if 'UPDATE "trainer_usertrainingsummary"' in q['sql']]
+        with CaptureQueriesContext(connection) as queries:
+            self.past.complete = True
+            self.past.save()
+        self.assertEqual(len(summary_updates(queries.captured_queries)), 1)  # the homepage version
+
+    def test_deleting_a_plan_removes_its_workouts(self):
+        get_training_summary(self.preferences)
+        with patch('trainer.training_summary.refresh_training_summary') as refresh:
+            self.upcoming.plan.delete()
+        # Once for the plan, not once per workout and exercise
+        refresh.assert_called_once_with(self.preferences.pk)
+        self.assertFalse(WorkoutSession.objects.exists())
+        summary = refresh_training_summary(self.preferences.pk)
+        self.assertIsNone(summary.next_workout)
+        self.assertEqual(summary.recent_sessions, 0)
+
+    def test_read_is_one_query(self):
+        get_training_summary(self.preferences)
+        with self.assertNumQueries(1):
+            summary = get_training_summary(self.preferences)
+            self.assertEqual(summary.next_workout.name, "Next")
+
+    def test_deleting_the_user_removes_the_summary(self):
+        get_training_summary(self.preferences)
+        self.preferences.user.delete()
+        self.assertFalse(UserTrainingSummary.objects.exists())
+
+    def test_homepage_shows_next_workout_from_summary(self):
+        self.client.login(email='planner@example.com', password='password')
+        response = self.client.get('/')
+        self.assertEqual(response.context['next_workout'].id, self.upcoming.id)
+        self.assertContains(response, "Next")
+
+
+class AnnotatedBMITestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        for day, weight in ((1, 85), (2, 83), (3, 81)):
+            WeightHistory.objects.create(user=self.preferences, weight=weight, date=date(2024, 11, day))
+
+    def test_latest_weight_and_bmi_in_one_query(self):
+        create_preferences(email='other@example.com')
+        with self.assertNumQueries(1):
+            users = list(UserPreference.objects.with_latest_weight().order_by('id'))
+            self.assertEqual(users[0].latest_weight_value, Decimal("81.00"))
+            self.assertEqual(users[0].bmi, 25.0)
+            self.assertIsNone(users[1].bmi)
+
+    def test_weight_history_bmi_in_one_query(self):
+        with self.assertNumQueries(1):
+            bmis = [entry.bmi for entry in WeightHistory.objects.filter(user=self.preferences).with_bmi()]
+        self.assertEqual(bmis, [25.0, 25.62, 26.23])
+        self.assertEqual(bmis, [entry.bmi for entry in WeightHistory.objects.filter(user=self.preferences)])
+
+
+class WorkoutArchiveTestCase(TestCase):
+    def setUp(self):
+        self.preferences = create_preferences()
+        today = date.today()
+        self.old_plan = WorkoutPlan.objects.create(user=self.preferences)
+        recent_plan = WorkoutPlan.objects.create(user=self.preferences)
+        self.recent = WorkoutSession.objects.create(plan=recent_plan, user=self.preferences, name="Recent", date=today - timedelta(days=3))
+        for day in (1, 2):
+            old = WorkoutSession.objects.create(
+                plan=self.old_plan, user=self.preferences, name=f"Old {day}", date=date(2020, 3, day), description="Legs"
+            )
+            WarmUp.objects.create(workout=old, description="Jog")
+            Exercise.objects.create(workout=old, name="Squat", sets="3", reps="10", actual_weight="60kg")
+        Query.objects.create(plan=self.old_plan, user=self.preferences, query="Old plan")
+        Query.objects.create(plan=recent_plan, user=self.preferences, query="Recent plan")
+
+    def test_old_workouts_move_to_a_monthly_archive(self):
+        months = archive_workouts(archive_cutoff(365))
+        self.assertEqual([(row['month'], row['count']) for row in months], [(date(2020, 3, 1), 2)])
+
+        self.assertEqual(list(WorkoutSession.objects.values_list('name', flat=True)), ["Recent"])
+        self.assertEqual(Exercise.objects.count(), 0)
+        self.assertEqual(WarmUp.objects.count(), 0)
+        self.assertEqual(list(Query.objects.values_list('query', flat=True)), ["Recent plan"])
+        self.assertFalse(WorkoutPlan.objects.filter(pk=self.old_plan.pk).exists())
+
+        archive = WorkoutArchive.objects.get()
+        self.assertEqual(archive.session_count, 2)
+        self.assertEqual(archive.unpack()['queries'], [{'plan_id': self.old_plan.id, 'query': "Old plan", 'parameters': {}}])
+        self.assertEqual(get_training_summary(self.preferences).last_workout_id, self.recent.id)
+
+    def test_rerun_merges_into_the_same_month(self):
+        archive_workouts(archive_cutoff(365))
+        WorkoutSession.objects.create(plan=WorkoutPlan.objects.create(user=self.preferences), user=self.preferences, name="Late entry", date=date(2020, 3, 20))
+        archive_workouts(archive_cutoff(365))
+        archive = WorkoutArchive.objects.get()
+        self.assertEqual([entry['name'] for entry in archive.unpack()['workouts']], ["Old 1", "Old 2", "Late entry"])
+
+    def test_history_reads_through_the_archive(self):
+        archive_workouts(archive_cutoff(365))
+        history = list(iter_workout_history(self.preferences))
+        self.assertEqual([entry['name'] for entry in history], ["Recent", "Old 2", "Old 1"])
+        self.assertEqual(history[1]['warm_up'], "Jog")
+        self.assertEqual(history[1]['exercises'][0]['actual_weight'], "60kg")
+
+    def test_export_includes_archived_workouts(self):
+        call_command('archive_workouts', days=365, stdout=StringIO())
+        self.client.login(email='planner@example.com', password='password')
+        response = self.client.get('/workouts/export/')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="workout-history.json"')
+        data = response.json()
+        self.assertEqual(len(data['workouts']), 3)
+        self.assertEqual({query['query'] for query in data['queries']}, {"Old plan", "Recent plan"})
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_workouts', days=365, dry_run=True, stdout=out)
+        self.assertIn("Would archive 2 workouts", out.getvalue())
+        self.assertEqual(WorkoutSession.objects.count(), 3)
+        self.assertFalse(WorkoutArchive.objects.exists())
+
+
+class HomepageFragmentCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.preferences = create_preferences()
+        self.workout = WorkoutSession.objects.create(
+            plan=WorkoutPlan.objects.create(user=self.preferences),
+            user=self.preferences,
+            name="Leg Day",
+            date=date.today() + timedelta(days=1),
+        )
+        self.exercise = Exercise.objects.create(workout=self.workout, name="Squat", sets="3", reps="10")
+        self.client.login(email='planner@example.com', password='password')
+        self.client.get('/')
+
+    def test_repeat_load_skips_the_user_queries(self):
+        # Only the session and user lookups of authentication and the version read remain
+        with self.assertNumQueries(3):
+            response = self.client.get('/')
+        self.assertContains(response, "Leg Day")
+        self.assertContains(response, "First Name: Plan")
+
+    def test_changes_retire_the_fragments(self):
+        self.exercise.name = "Front Squat"
+        self.exercise.save()
+        self.assertContains(self.client.get('/'), "Front Squat")
+
+        WeightHistory.objects.create(user=self.preferences, weight=81, date=date.today())
+        self.assertContains(self.client.get('/'), "25.0")
+
+        self.workout.plan.delete()
+        self.assertContains(self.client.get('/'), "No upcoming workout scheduled.")
+
+    def test_version_bumped_by_another_process_is_seen(self):
+        # The generation worker saves plans from its own process, with its own cache
+        Exercise.objects.filter(pk=self.exercise.pk).update(name="Box Squat")
+        self.assertNotContains(self.client.get('/'), "Box Squat")
+        UserTrainingSummary.objects.filter(user=self.preferences).update(version=F('version') + 1)
+        self.assertContains(self.client.get('/'), "Box Squat")
+
+    def test_versions_are_per_user(self):
+        other = create_preferences(email='other@example.com')
+        before = homepage_version(self.preferences.user_id)
+        other.firstname = "Someone"
+        other.save()
+        self.assertEqual(homepage_version(self.preferences.user_id), before)
+
+
+class ChoicesRegistryTestCase(SimpleTestCase):
+    def test_lookups_both_ways(self):
+        label = 'Improve everyday movement (Functional training)'
+        self.assertEqual(WORKOUT_TYPES.label('functional'), label)
+        self.assertEqual(WORKOUT_TYPES.key(label), 'functional')
+        self.assertIsNone(WORKOUT_TYPES.label('unknown'))
+        self.assertIn('targeted', WORKOUT_TYPES)
+
+    def test_labels_for_keeps_unknown_keys(self):
+        labels = GOALS.labels_for([' energy', 'custom goal'])
+        self.assertTrue(labels[0].startswith('General Energy and Stamina'))
+        self.assertEqual(labels[1], 'custom goal')
+        self.assertEqual(GOALS.labels_for(None), [])
+
+    def test_equipment_indexes(self):
+        self.assertEqual(len(EQUIPMENT_GROUPS_BY_NAME['Battle Ropes']), 2)
+        self.assertIn('Pull-Up Bar', EQUIPMENT_BY_GROUP['Public Park Equipment'])
+
+    def test_template_filters(self):
+        template = Template(
+            '{% load choices %}{{ level|choice_label:"fitness_level" }}|'
+            '{{ goals|choice_labels:"goal"|join:"; " }}|{{ other|choice_label:"fitness_level" }}'
+        )
+        rendered = template.render(Context({'level': 'beginner', 'goals': ['flexibility'], 'other': 'n/a'}))
+        level, goals, other = rendered.split('|')
+        self.assertNotEqual(level, 'beginner')
+        self.assertTrue(goals.startswith('Flexibility'))
+        self.assertEqual(other, 'n/a')
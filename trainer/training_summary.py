@@ -0,0 +1,294 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, PositiveIntegerField, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import Exercise, UserPreference, UserTrainingSummary, WorkoutSession
+
+# Window for the recent session, muscle group and volume figures
+RECENT_DAYS = 28
+
+# Users whose refresh is held back by deferred_summary_updates(), per thread
+_deferred = threading.local()
+
+
+def calculate_bmi(weight, height):
+    """
+    Calculates a BMI from a weight in kg and a height in cm.
+    """
+    if weight is None or not height:
+        return None
+    return round(float(weight) / ((height / 100) ** 2), 2)
+
+
+def refresh_training_summary(preferences_id):
+    """
+    Recomputes a user's training summary from their workouts, exercises and
+    weigh-ins, with a handful of indexed queries. Called on write, whenever
+    something the summary depends on changes.
+
+    Args:
+        preferences_id (int): Primary key of the UserPreference.
+
+    Returns:
+        UserTrainingSummary: The saved summary.
+    """
+    today = date.today()
+    workouts = WorkoutSession.objects.filter(user_id=preferences_id)
+    recent = workouts.filter(date__gt=today - timedelta(days=RECENT_DAYS), date__lte=today)
+
+    muscle_groups = Counter()
+    recent_sessions = 0
+    for groups in recent.values_list('muscle_groups', flat=True):
+        recent_sessions += 1
+        muscle_groups.update(groups or [])
+    totals = Exercise.objects.filter(workout__in=recent).totals()
+    weight = UserPreference.objects.with_latest_weight().values(
+        'latest_weight_value', 'latest_weight_date', 'bmi_value'
+    ).get(pk=preferences_id)
+
+    summary, _ = UserTrainingSummary.objects.update_or_create(
+        user_id=preferences_id,
+        defaults={
+            'last_workout_id': workouts.filter(date__lte=today).order_by('-date').values_list('id', flat=True).first(),
+            'next_workout_id': workouts.filter(date__gt=today).order_by('date').values_list('id', flat=True).first(),
+            'recent_sessions': recent_sessions,
+            'sessions_per_week': round(recent_sessions / (RECENT_DAYS / 7), 2),
+            'muscle_group_counts': dict(muscle_groups.most_common()),
+            'recent_volume': totals['volume'],
+            'recent_tonnage': totals['tonnage'],
+            'latest_weight': weight['latest_weight_value'],
+            'latest_weight_date': weight['latest_weight_date'],
+            'latest_bmi': weight['bmi_value'],
+            'computed_on': today,
+        },
+    )
+    return summary
+
+
+def schedule_summary_refresh(preferences_id):
+    """
+    Refreshes a user's summary now, or once at the end of the enclosing
+    deferred_summary_updates() block.
+    """
+    users = getattr(_deferred, 'users', None)
+    if users is None:
+        refresh_training_summary(preferences_id)
+    else:
+        users.add(preferences_id)
+
+
+@contextmanager
+def deferred_summary_updates():
+    """
+    Collects the summary refreshes requested inside the block and runs one per
+    user when it exits, so bulk writes and deletes (which fire a signal per
+    row) do not recompute a summary per row. Nested blocks join the outermost.
+    """
+    if getattr(_deferred, 'users', None) is not None:
+        yield
+        return
+    _deferred.users = set()
+    try:
+        yield
+    finally:
+        users, _deferred.users = _deferred.users, None
+    for preferences_id in users:
+        refresh_training_summary(preferences_id)
+
+
+def _is_recent(day, today):
+    return day is not None and today - timedelta(days=RECENT_DAYS) < day <= today
+
+
+def _deferring():
+    return getattr(_deferred, 'users', None) is not None
+
+
+def exercise_load(exercise):
+    """
+    Returns an exercise's (volume, tonnage), computed from its numeric columns
+    as ExerciseQuerySet.with_volume() does in SQL.
+    """
+    if exercise.sets_count is None or exercise.reps_max is None:
+        return None, None
+    volume = exercise.sets_count * exercise.reps_max * (2 if exercise.per_side else 1)
+    weight = exercise.actual_weight_kg if exercise.actual_weight_kg is not None else exercise.recommended_weight_kg
+    return volume, (volume * Decimal(weight) if weight is not None else None)
+
+
+def exercise_summary_state(exercise):
+    """
+    Reads what the summary needs to know about an exercise before it is
+    saved: its stored load and its workout's owner and date, in one query.
+
+    Returns:
+        dict or None: 'user_id', 'date', 'workout_id', 'volume', 'tonnage',
+        or None if the workout doesn't exist.
+    """
+    if exercise._state.adding:
+        row = WorkoutSession.objects.filter(pk=exercise.workout_id).values('user_id', 'date').first()
+        return row and {**row, 'workout_id': exercise.workout_id, 'volume': None, 'tonnage': None}
+    row = (
+        Exercise.objects.filter(pk=exercise.pk).with_volume()
+        .values('workout_id', 'volume', 'tonnage', user_id=F('workout__user_id'), date=F('workout__date'))
+        .first()
+    )
+    return row
+
+
+def record_exercise_change(exercise, before, deleted=False):
+    """
+    Applies a saved or deleted exercise to the summary: only the recent
+    volume and tonnage depend on exercises, and only on those of recent
+    workouts, so the change in the exercise's load is added to them.
+
+    Args:
+        exercise (Exercise): The saved or deleted exercise.
+        before (dict): exercise_summary_state() from before the write.
+        deleted (bool): Whether the exercise was deleted.
+    """
+    if before is None:
+        return
+    if _deferring() or before['workout_id'] != exercise.workout_id:
+        # Moved to another workout: rare enough to recompute
+        schedule_summary_refresh(before['user_id'])
+        return
+    today = date.today()
+    if not _is_recent(before['date'], today):
+        return
+    volume, tonnage = (None, None) if deleted else exercise_load(exercise)
+    volume_change = (volume or 0) - (before['volume'] or 0)
+    tonnage_change = (tonnage or 0) - (before['tonnage'] or 0)
+    if not volume_change and not tonnage_change:
+        return
+    # A summary computed on an earlier day is recomputed in full when next read.
+    # The SQL sums are NULL when nothing counts, hence NullIf
+    UserTrainingSummary.objects.filter(pk=before['user_id'], computed_on=today).update(
+        recent_volume=NullIf(
+            Coalesce('recent_volume', Value(0), output_field=PositiveIntegerField()) + volume_change, Value(0)
+        ),
+        recent_tonnage=NullIf(
+            Coalesce('recent_tonnage', Value(Decimal(0)), output_field=DecimalField()) + Decimal(tonnage_change),
+            Value(Decimal(0)),
+        ),
+    )
+
+
+def workout_summary_state(workout):
+    """
+    Reads what the summary needs to know about a workout before it is saved.
+
+    Returns:
+        dict or None: 'user_id', 'date' and 'muscle_groups', or None for a
+        new workout.
+    """
+    if workout._state.adding:
+        return None
+    return WorkoutSession.objects.filter(pk=workout.pk).values('user_id', 'date', 'muscle_groups').first()
+
+
+def record_workout_change(workout, before):
+    """
+    Applies a saved workout to the summary: the recent session and muscle
+    group counts take the change, and the workout becomes the last or next
+    one if it is closer to today. Changes that can't be applied that way (a
+    workout moved into or out of the recent window, the last or next workout
+    moved, a change of owner) recompute the summary.
+
+    Args:
+        workout (WorkoutSession): The saved workout.
+        before (dict): workout_summary_state() from before the save.
+    """
+    # The instance keeps whatever was assigned, e.g. a date string
+    workout_date = WorkoutSession._meta.get_field('date').to_python(workout.date)
+    if before is not None and before['date'] == workout_date and before['muscle_groups'] == workout.muscle_groups \
+            and before['user_id'] == workout.user_id:
+        # Nothing the summary shows changed, e.g. the workout was marked complete
+        return
+    if _deferring() or (before is not None and before['user_id'] != workout.user_id):
+        if before is not None:
+            schedule_summary_refresh(before['user_id'])
+        schedule_summary_refresh(workout.user_id)
+        return
+
+    today = date.today()
+    summary = UserTrainingSummary.objects.filter(pk=workout.user_id, computed_on=today).values(
+        'recent_sessions', 'muscle_group_counts', 'last_workout_id', 'next_workout_id',
+        last_date=F('last_workout__date'), next_date=F('next_workout__date'),
+    ).first()
+    if summary is None:
+        # Missing or computed on an earlier day: recomputed in full when next read
+        return
+    was_recent = before is not None and _is_recent(before['date'], today)
+    is_recent = _is_recent(workout_date, today)
+    moved = before is not None and before['date'] != workout_date
+    if moved and (was_recent != is_recent or workout.pk in (summary['last_workout_id'], summary['next_workout_id'])):
+        # Its exercises' load, or the last or next workout, would have to be found again
+        refresh_training_summary(workout.user_id)
+        return
+
+    changes = {}
+    if was_recent or is_recent:
+        sessions = summary['recent_sessions'] + is_recent - was_recent
+        muscle_groups = Counter(summary['muscle_group_counts'])
+        if was_recent:
+            muscle_groups.subtract(before['muscle_groups'] or [])
+        if is_recent:
+            muscle_groups.update(workout.muscle_groups or [])
+        changes.update(
+            recent_sessions=sessions,
+            sessions_per_week=round(sessions / (RECENT_DAYS / 7), 2),
+            muscle_group_counts=dict((+muscle_groups).most_common()),
+        )
+    if workout_date <= today:
+        if summary['last_date'] is None or workout_date > summary['last_date']:
+            changes['last_workout_id'] = workout.pk
+    elif summary['next_date'] is None or workout_date < summary['next_date']:
+        changes['next_workout_id'] = workout.pk
+    if changes:
+        UserTrainingSummary.objects.filter(pk=workout.user_id).update(**changes)
+
+
+def record_weight(entry):
+    """
+    Applies a saved weigh-in to the summary. A weigh-in at least as recent as
+    the summary's latest one is written straight in; anything else (an edit
+    of an older entry) falls back to a full refresh.
+
+    Args:
+        entry (WeightHistory): The saved weigh-in.
+    """
+    updated = UserTrainingSummary.objects.filter(user_id=entry.user_id, latest_weight_date__lte=entry.date).update(
+        latest_weight=entry.weight,
+        latest_weight_date=entry.date,
+        latest_bmi=calculate_bmi(entry.weight, entry.user.height),
+    )
+    if not updated:
+        refresh_training_summary(entry.user_id)
+
+
+def get_training_summary(preferences):
+    """
+    Returns a user's training summary, with the next workout and its warm-up
+    and cool-down loaded in the same query. It is recomputed first if it is
+    missing or was computed on an earlier day.
+
+    Args:
+        preferences (UserPreference): The user's preferences.
+
+    Returns:
+        UserTrainingSummary: The summary.
+    """
+    queryset = UserTrainingSummary.objects.select_related(
+        'next_workout__warm_up', 'next_workout__cool_down', 'last_workout'
+    )
+    summary = queryset.filter(pk=preferences.pk).first()
+    if summary is None or summary.computed_on != date.today():
+        refresh_training_summary(preferences.pk)
+        summary = queryset.get(pk=preferences.pk)
+    return summary
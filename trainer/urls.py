@@ -15,16 +15,20 @@ urlpatterns = [
     path('location/<int:location_id>/', views.location_detail, name='location_detail'),
     path('login/', views.CustomLoginView.as_view(), name='login'),
     # path('upcoming-workouts/<str:group_id>/', views.upcoming_workouts_view, name='upcoming_workouts'),
-    path('workouts/<int:group_id>/', views.upcoming_workouts_view, name='upcoming_workouts'),
+    path('workouts/export/', views.export_workout_history, name='export_workout_history'),
+    path('plans/<int:plan_id>/', views.upcoming_workouts_view, name='upcoming_workouts'),
     path('workouts/<int:workout_id>/', views.workout_detail_view, name='workout_detail'),
     # path('workouts/replace/<int:workout_id>/', views.replace_workout, name='replace_workout'),
-    path('workouts/replace/<int:group_id>/<int:workout_id>/', views.replace_workout, name='replace_workout'),
+    path('plans/<int:plan_id>/replace/<int:workout_id>/', views.replace_workout, name='replace_workout'),
 
     path('workouts/<int:workout_id>/exercise/replace/<int:exercise_id>/', views.replace_exercise, name='replace_exercise'),
+    path('workouts/<int:workout_id>/exercises/replace/', views.replace_exercises, name='replace_exercises'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     # path('workout/<int:pk>/update/', views.update_workout_session, name='update_workout_session'),
     path('update-personal-details/', views.update_personal_details, name='update_personal_details'),
     path('create-workout-form/', views.create_workout_form_view, name='create_workout_form'),
+    path('generation-jobs/<int:job_id>/', views.generation_job_status, name='generation_job_status'),
+    path('generation-jobs/<int:job_id>/events/', views.generation_job_events, name='generation_job_events'),
     path('personal_details/', views.personal_details, name='personal_details'),
     path('edit_field/<str:field_name>/', views.edit_field, name='edit_field'),
     path('update_field/<str:field_name>/', views.update_field, name='update_field'),
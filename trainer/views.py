@@ -2,42 +2,63 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
-from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.http import JsonResponse
 from django.forms import modelformset_factory
 from decimal import Decimal
 from django.template.loader import render_to_string
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.db import transaction
+from django.core.cache import cache
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from django.utils import dateformat, timezone
+from asgiref.sync import sync_to_async
 
 from .forms import WorkoutPlanForm, UserUpdateForm, LocationForm, CustomAuthenticationForm, ExerciseForm, UserDetailsForm, PreferencesForm
-from .models import UserPreference, WeightHistory, WorkoutSession, WarmUp, CoolDown, Exercise, Location, Query, CustomUser, WorkoutSession, Exercise
-from .lists_and_dictionaries import (
-    QUOTES,
-    GOAL_CHOICES,
-    DAYS_OF_WEEK_CHOICES,
-    WORKOUT_TYPE_PREFERENCE_CHOICES,
-    EATING_HABITS_CHOICES,
-    FITNESS_LEVEL_CHOICES
-)
+from .models import UserPreference, WeightHistory, WorkoutSession, WarmUp, CoolDown, Exercise, Location, Query, CustomUser, WorkoutSession, Exercise, GenerationJob, WorkoutPlan
+from .lists_and_dictionaries import QUOTES
 from .helper_functions import (
-    replace_text,
-    generate_random_id,
     safe_join,
-    convert_text_to_json,
     workout_payload_text,
     generate_exercise_query,
+    generate_batch_exercise_query,
     personal_details_dict
 )
+from .generation import (
+    REPLACED_WORKOUT_TIMEOUT,
+    build_job_parameters,
+    enqueue_generation_job,
+    regenerate_workout,
+    replaced_workout_key,
+)
+from .archive import archived_queries, iter_workout_history
+from .json_stream import parse_json_objects
+from .llm import get_llm_client
+from .catalog import get_location, get_locations, location_equipment
+from .page_cache import (
+    bump_homepage_version,
+    conditional_page,
+    homepage_version,
+    location_page_stamp,
+    plan_page_stamp,
+    workout_page_stamp,
+)
+from .singleflight import SingleFlight
+from .serializers import serialize_workout, workouts_with_details
+from .training_summary import get_training_summary, refresh_training_summary
 
 from dotenv import load_dotenv
 from pathlib import Path
+import asyncio
+import logging
 import os
 import random
 import json
-import google.generativeai as genai
 import requests
 import re
+import time
 import datetime
 
 from datetime import date
@@ -49,6 +70,17 @@ dotenv_path = BASE_DIR / '.env'
 if dotenv_path.exists():
     load_dotenv(dotenv_path)
 
+logger = logging.getLogger(__name__)
+
+# Seconds between database checks while streaming a generation job
+GENERATION_EVENTS_POLL_INTERVAL = 0.5
+# Seconds of silence after which the stream sends a comment, so proxies keep
+# it open and a closed client is noticed on the next write
+GENERATION_EVENTS_KEEPALIVE_INTERVAL = 15
+
+# Coalesces duplicate replace clicks on the same workout or exercise
+_replace_flight = SingleFlight()
+
 
 from django.http import HttpResponse
 from django.template.loader import render_to_string
@@ -87,53 +119,48 @@ def homepage(request):
     Renders the homepage with available locations.
     If the user is logged in, includes user-specific preferences and workout data.
     """
-    locations = Location.objects.all()
+    locations = SimpleLazyObject(get_locations)
     selected_quote = random.choice(QUOTES)
     context = {"locations": locations, "selected_quote": selected_quote}
 
     if request.user.is_authenticated:
-        # Retrieve or create UserPreference
         user = request.user
-        preferences, created = UserPreference.objects.get_or_create(user=user)
-
-        # Retrieve weight history
-        weight_history = WeightHistory.objects.filter(user=preferences).order_by("-date")[:20]
-        weight_data = [
-            {
-                "date": entry.date,
-                "weight": float(entry.weight) if isinstance(entry.weight, Decimal) else entry.weight,
-            }
-            for entry in weight_history
-        ]
-
-        # Retrieve workout sessions and next workout
-        workout_sessions = WorkoutSession.objects.filter(user=preferences).order_by("-date")[:20]
-        next_workout = WorkoutSession.objects.filter(user=preferences, date__gt=date.today()).order_by("date").first()
-        next_workout_exercises = Exercise.objects.filter(workout=next_workout) if next_workout else []
-
-        user_details = personal_details_dict(preferences)
+        # The user's sections are cached under a version that signals bump on
+        # every change, so these are only loaded when a fragment is rendered
+        preferences = SimpleLazyObject(lambda: UserPreference.objects.get_or_create(user=user)[0])
+        # Next workout, latest weight and BMI come from the maintained summary row
+        summary = SimpleLazyObject(lambda: get_training_summary(preferences))
+        next_workout = SimpleLazyObject(lambda: summary.next_workout)
+        version = homepage_version(user.pk)
+        if version is None:
+            # First visit: create the summary, which starts the version
+            version = summary.version
 
         # Update context with user-specific data
         context.update({
             "user": user,
             "preferences": preferences,
-            "weight_history": weight_history,
-            "weight_data": weight_data,
-            "workout_sessions": workout_sessions,
+            "training_summary": summary,
             "next_workout": next_workout,
-            "next_workout_exercises": next_workout_exercises,
-            "user_details": user_details,
+            "next_workout_exercises": SimpleLazyObject(lambda: list(next_workout.exercises.all()) if next_workout else []),
+            "user_details": SimpleLazyObject(lambda: personal_details_dict(preferences, summary)),
+            "homepage_version": version,
+            "homepage_cache_timeout": settings.HOMEPAGE_FRAGMENT_CACHE_TIMEOUT,
+            "today": date.today(),
         })
 
     return render(request, "homepage.html", context)
 
 
+@conditional_page(location_page_stamp)
 def location_detail(request, location_id):
     """
     Retrieves and renders the details of a location, including available equipment.
     """
-    location = get_object_or_404(Location, id=location_id)
-    equipment = location.equipment.all()
+    location = get_location(location_id)
+    if location is None:
+        raise Http404("No Location matches the given query.")
+    equipment = location_equipment(location_id)
 
     context = {
         'location': location,
@@ -242,11 +269,10 @@ def workout_plan(request):
     """
     Renders a personalized workout plan for the logged-in user based on their preferences and history.
     """
-    api_key = os.getenv('GEMINI_API')
     user = request.user
     preferences = get_object_or_404(UserPreference, user=user)
-    weight_history = WeightHistory.objects.filter(user=preferences).order_by('-date')[:20]
-    workout_sessions = WorkoutSession.objects.filter(user=preferences).order_by('-date')[:20]
+    weight_history = WeightHistory.objects.filter(user=preferences).with_bmi().order_by('-date')[:20]
+    workout_sessions = workouts_with_details().select_related('location').filter(user=preferences).order_by('-date')[:20]
     locations = preferences.preferred_location
 
     context = {
@@ -268,160 +294,68 @@ def workout_plan_result(request):
     return render(request, 'workout_plan_result.html', {'workout_plan': workout_plan})
 
 
-@csrf_exempt
-def upcoming_workouts_view(request, group_id):
-    workouts = WorkoutSession.objects.filter(group_id=group_id).order_by('date')
-    workouts_data = []
-    for workout in workouts:
-        exercises = Exercise.objects.filter(workout=workout)
-        warm_up = WarmUp.objects.filter(workout=workout).first()
-        cool_down = CoolDown.objects.filter(workout=workout).first()
-
-        workouts_data.append({
-            'id': workout.id,
-            'name': workout.name,
-            'goal': workout.goal,
-            'date': workout.date,
-            'group_id': workout.group_id,
-            'description': workout.description,
-            'warm_up': warm_up.description if warm_up else "No warm-up",
-            'cool_down': cool_down.description if cool_down else "No cool-down",
-            'exercises': [
-                {
-                    'id': exercise.id,
-                    'name': exercise.name,
-                    'sets': exercise.sets,
-                    'reps': exercise.reps,
-                    'description': exercise.description,
-                    'recommended_weight': exercise.recommended_weight
-                } for exercise in exercises
-            ]
-        })
+@login_required
+@conditional_page(plan_page_stamp)
+def upcoming_workouts_view(request, plan_id):
+    workouts = list(workouts_with_details().filter(plan_id=plan_id, plan__user__user=request.user).order_by('date'))
+    # Only an empty result needs telling apart a plan still being generated from someone else's
+    if not workouts and not WorkoutPlan.objects.filter(pk=plan_id, user__user=request.user).exists():
+        raise Http404("No WorkoutPlan matches the given query.")
+    workouts_data = [serialize_workout(workout) for workout in workouts]
 
-    return render(request, 'upcoming_workouts.html', {'workouts_data': workouts_data, 'group_id': group_id})
+    return render(request, 'upcoming_workouts.html', {'workouts_data': workouts_data, 'plan_id': plan_id})
 
-@csrf_exempt
-def replace_workout(request, group_id, workout_id):
-    try:
-        workout = WorkoutSession.objects.get(pk=workout_id)
-        print(f"WORKOUT - ID:{workout.id}")
-    except WorkoutSession.DoesNotExist:
-        raise Http404("Workout does not exist")
-    print('replacing workouts')
-    if request.method == "POST":
+@login_required
+def replace_workout(request, plan_id, workout_id):
+    if request.method != "POST":
+        return JsonResponse({'status': 'failed'}, status=400)
+
+    preferences = get_object_or_404(UserPreference, user=request.user)
+    workout = WorkoutSession.objects.filter(pk=workout_id, plan_id=plan_id, user=preferences).first()
+    if workout is None:
+        # A repeated click that arrives after the first one finished gets the same new workout
+        replacement_id = cache.get(replaced_workout_key(workout_id))
+        if replacement_id is None:
+            raise Http404("Workout does not exist")
+    else:
         try:
-            user = request.user
-            print(f"User: {user}")
-            preferences = get_object_or_404(UserPreference, user=user)
-            print(f"User Preferences found: {preferences}")
-            user = request.user
-            # Delete the specified workout and its related data
-            workout = get_object_or_404(WorkoutSession, id=workout_id)
-            workout_date = workout.date
-            group_id = workout.group_id
-            print(group_id)
-            workout.delete()  # This cascades to delete WarmUp, CoolDown, and Exercises
-            print('workout deleted')
-            
-            # Retrieve the original query
-            original_query = get_object_or_404(Query, group_id=group_id).query
-
-            print(original_query)
-            # Call Gemini API to get a new workout
-            api_key = os.getenv('GEMINI_API')
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(replace_text(original_query, workout_date)) 
-            print(response.text)
-            # Parse the response and save new workout data
-            workout_data = convert_text_to_json(response.text)
-            # print(response.text)  # You would need a JSON parsing function here
-            for workout in workout_data:
-                workout_session = WorkoutSession.objects.create(
-                    group_id=group_id,
-                    user=preferences,
-                    location=preferences.preferred_location,
-                    name=workout.get('name'),
-                    goal=workout.get('goal'),
-                    date=workout.get('date'),
-                    description=workout.get('explanation'),
-                    workout_type=workout.get('workout_type'),
-                )
-
-                WarmUp.objects.create(workout=workout_session, description=workout.get('warm_up'))
-                CoolDown.objects.create(workout=workout_session, description=workout.get('cool_down'))
-
-                for exercise in workout.get('exercises', []):
-                    Exercise.objects.create(
-                        workout=workout_session,
-                        name=exercise.get('name'),
-                        sets=exercise.get('sets'),
-                        reps=exercise.get('reps'),
-                        description=exercise.get('description')
-                    )
-
-
-            print('REDIRECT')
-
-
-            workout_session = get_object_or_404(WorkoutSession, id=workout_session.id)
-            # exercises = workout_session.exer
-            print(f'Workout obtained {workout_session} ')
-            exercises = workout_session.exercises.all()
-            print(exercises)
-            return render(request, 'partials/workout_partial.html', {
-                'workout': workout_session,
-                'exercises': exercises,
-
-            })
-            # return redirect('upcoming_workouts', group_id=workout_session.group_id)
-        
-
+            # Concurrent clicks on the same workout wait for, and share, one LLM call
+            new_workout, _ = _replace_flight.do(
+                ('workout', workout.id), lambda: regenerate_workout(preferences, workout)
+            )
+        except WorkoutSession.DoesNotExist:
+            raise Http404("Workout does not exist")
         except Exception as e:
-            print(f"Error during workout replacement: {e}")
+            logger.warning("Workout replacement failed for workout %s: %s", workout_id, e)
             return JsonResponse({'status': 'failed', 'error': str(e)}, status=500)
 
-    return JsonResponse({'status': 'failed'}, status=400)
+        replacement_id = new_workout.id
 
+    workout = get_object_or_404(workouts_with_details(), id=replacement_id, user=preferences)
+    return render(request, 'partials/workout_partial.html', {'workout': serialize_workout(workout)})
 
 
-@csrf_exempt
+@login_required
 def replace_exercise(request, workout_id, exercise_id):
-    workout = get_object_or_404(WorkoutSession, id=workout_id)
-    exercise = get_object_or_404(Exercise, id=exercise_id, workout=workout)  # Ensure the exercise belongs to the workout
+    workout = get_object_or_404(WorkoutSession, id=workout_id, user__user=request.user)
 
     if request.method == 'POST':
-        # Collect details of the current exercise to send to the API
-        exercise_data = {
-            'id': exercise.id,
-            'name': exercise.name,
-            'sets': exercise.sets,
-            'reps': exercise.reps,
-            'recommended_weight': exercise.recommended_weight,
-            'description': exercise.description
-        }
-
-        # Call the API to get a similar exercise based on the current one
-        api_key = os.getenv('GEMINI_API')
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(generate_exercise_query(exercise_data))
-        new_exercise_data = convert_text_to_json(response.text)
-
-        # Delete the old exercise
-        exercise.delete()
-
-        print(new_exercise_data)
-
-        # Create and save the new exercise based on the API response
-        new_exercise = Exercise.objects.create(
-            workout=workout,
-            name=new_exercise_data[0].get('name'),
-            sets=new_exercise_data[0].get('sets'),
-            reps=new_exercise_data[0].get('reps'),
-            recommended_weight=new_exercise_data[0].get('recommended_weight'),
-            description=new_exercise_data[0].get('description')
-        )
+        exercise = Exercise.objects.filter(id=exercise_id, workout=workout).first()  # Ensure the exercise belongs to the workout
+        if exercise is None:
+            # A repeated click that arrives after the first one finished gets the same new exercise
+            replacement_id = cache.get(replaced_exercise_key(exercise_id))
+            if replacement_id is None:
+                raise Http404("Exercise does not exist")
+            new_exercise = get_object_or_404(Exercise, id=replacement_id, workout=workout)
+        else:
+            try:
+                # Concurrent clicks on the same exercise wait for, and share, one LLM call
+                new_exercise, _ = _replace_flight.do(('exercise', exercise.id), lambda: _regenerate_exercise(exercise))
+            except Http404:
+                raise
+            except Exception as e:
+                logger.warning("Exercise replacement failed for exercise %s: %s", exercise_id, e)
+                return JsonResponse({'status': 'failed', 'error': str(e)}, status=500)
 
         # Return the updated exercise to replace the old one using HTMX
         return render(request, 'partials/exercise_partial.html', {
@@ -430,18 +364,173 @@ def replace_exercise(request, workout_id, exercise_id):
         })
 
     # Render the replace exercise form for GET requests
+    exercise = get_object_or_404(Exercise, id=exercise_id, workout=workout)
     return render(request, 'replace_exercise.html', {
         'workout': workout,
         'exercise': exercise
     })
 
 
+def exercise_version(exercise):
+    """
+    Returns the version the exercise partial submits for an exercise: its id
+    and updated_at, formatted as the template does.
+    """
+    return f"{exercise.id}@{dateformat.format(exercise.updated_at, 'U.u')}"
+
+
+def _parse_replacement_exercises(count):
+    """
+    Returns a parser for a response that should hold count exercises. It
+    parses object by object, so a single exercise sent as a bare object rather
+    than a list still counts.
+    """
+    def parse(response_text):
+        exercises = parse_json_objects(response_text)
+        if len(exercises) < count:
+            raise ValueError(f"Expected {count} replacement exercises, got {len(exercises)}")
+        return exercises
+
+    return parse
+
+
+def replaced_exercise_key(exercise_id):
+    return f"replaced-exercise:{exercise_id}"
+
+
+def _regenerate_exercise(exercise):
+    """
+    Asks the LLM for a similar exercise and swaps it in for the given one.
+
+    Returns:
+        Exercise: The new exercise.
+    """
+    # Collect details of the current exercise to send to the API
+    exercise_data = {
+        'id': exercise.id,
+        'name': exercise.name,
+        'sets': exercise.sets,
+        'reps': exercise.reps,
+        'recommended_weight': exercise.recommended_weight,
+        'description': exercise.description
+    }
+
+    # Call the API to get a similar exercise based on the current one
+    new_exercise_data = get_llm_client().generate(
+        generate_exercise_query(exercise_data), use_cache=True, parse=_parse_replacement_exercises(1)
+    )
+
+    with transaction.atomic():
+        # The delete, not the earlier read, decides who replaces the exercise:
+        # a request in another process may have replaced it in the meantime
+        deleted, _ = Exercise.objects.filter(pk=exercise.pk).delete()
+        if not deleted:
+            replacement_id = cache.get(replaced_exercise_key(exercise.pk))
+            if replacement_id is None:
+                raise Http404("Exercise does not exist")
+            return Exercise.objects.get(pk=replacement_id)
+        # Create and save the new exercise based on the API response
+        new_exercise = Exercise.objects.create(
+            workout_id=exercise.workout_id,
+            name=new_exercise_data[0].get('name'),
+            sets=new_exercise_data[0].get('sets'),
+            reps=new_exercise_data[0].get('reps'),
+            recommended_weight=new_exercise_data[0].get('recommended_weight'),
+            description=new_exercise_data[0].get('description')
+        )
+        # Recorded before commit, so a request whose delete waited on this one finds it
+        cache.set(replaced_exercise_key(exercise.pk), new_exercise.id, REPLACED_WORKOUT_TIMEOUT)
+    return new_exercise
+
+
+@login_required
+def replace_exercises(request, workout_id):
+    """
+    Replaces several exercises of one workout with a single LLM call. The
+    workout's other exercises are sent as context, and all replacements are
+    saved together or not at all.
+    """
+    workout = get_object_or_404(WorkoutSession, id=workout_id, user__user=request.user)
+    if request.method != 'POST':
+        return JsonResponse({'status': 'failed'}, status=400)
+
+    exercise_ids = {int(i) for i in request.POST.getlist('exercise_ids') if i.isdigit()}
+    exercises = list(workout.exercises.order_by('id'))
+    to_replace = [exercise for exercise in exercises if exercise.id in exercise_ids]
+    others = [exercise for exercise in exercises if exercise.id not in exercise_ids]
+    if not to_replace:
+        return JsonResponse({'status': 'failed', 'error': 'No exercises selected'}, status=400)
+
+    # The page sends the version of every exercise it shows. If a selected one
+    # has changed since, this is a repeated click arriving after the first one
+    # finished (or the page is stale): show the current exercises rather than
+    # replacing them again
+    submitted_versions = set(request.POST.getlist('exercise_versions'))
+    if submitted_versions and any(exercise_version(exercise) not in submitted_versions for exercise in to_replace):
+        workout = workouts_with_details().get(id=workout.id)
+        return render(request, 'partials/workout_partial.html', {'workout': serialize_workout(workout)})
+
+    try:
+        # Duplicate submissions share one LLM call and write the same replacements
+        replacements, _ = _replace_flight.do(
+            ('exercises', workout.id, frozenset(exercise.id for exercise in to_replace)),
+            lambda: get_llm_client().generate(
+                generate_batch_exercise_query(workout, to_replace, others),
+                use_cache=True,
+                parse=_parse_replacement_exercises(len(to_replace)),
+            ),
+        )
+    except Exception as e:
+        logger.warning("Batch exercise replacement failed for workout %s: %s", workout.id, e)
+        return JsonResponse({'status': 'failed', 'error': str(e)}, status=500)
+
+    # Swap in place so the exercises keep their position in the workout
+    for exercise, new_exercise_data in zip(to_replace, replacements):
+        exercise.name = new_exercise_data.get('name')
+        exercise.sets = new_exercise_data.get('sets')
+        exercise.reps = new_exercise_data.get('reps')
+        exercise.recommended_weight = new_exercise_data.get('recommended_weight')
+        exercise.actual_weight = None
+        exercise.description = new_exercise_data.get('description')
+        exercise.normalize()
+        # bulk_update() skips auto_now
+        exercise.updated_at = timezone.now()
+    with transaction.atomic():
+        Exercise.objects.bulk_update(
+            to_replace,
+            ['name', 'sets', 'reps', 'recommended_weight', 'actual_weight', 'description', 'updated_at']
+            + Exercise.NUMERIC_FIELDS,
+        )
+        refresh_training_summary(workout.user_id)
+    # bulk_update sends no signals
+    bump_homepage_version(request.user.pk)
+
+    workout = workouts_with_details().get(id=workout.id)
+    return render(request, 'partials/workout_partial.html', {'workout': serialize_workout(workout)})
+
+
+@login_required
+@conditional_page(workout_page_stamp)
 def workout_detail_view(request, workout_id):
     # Retrieve the workout session and all associated exercises
-    workout = get_object_or_404(WorkoutSession.objects.prefetch_related('exercises'), id=workout_id)
-    exercises = workout.exercises.all()  # Access exercises through the related name
-    
-    return render(request, 'workout_detail.html', {'workout': workout, 'exercises': exercises})
+    workout = serialize_workout(get_object_or_404(workouts_with_details(), id=workout_id, user__user=request.user))
+
+    return render(request, 'workout_detail.html', {'workout': workout, 'exercises': workout['exercises']})
+
+@login_required
+def export_workout_history(request):
+    """
+    Downloads the user's full workout history as JSON, archived months
+    included.
+    """
+    preferences = get_object_or_404(UserPreference, user=request.user)
+    history = {
+        'workouts': list(iter_workout_history(preferences)),
+        'queries': list(Query.objects.filter(user=preferences).values('plan_id', 'query', 'parameters')) + archived_queries(preferences),
+    }
+    response = JsonResponse(history)
+    response['Content-Disposition'] = 'attachment; filename="workout-history.json"'
+    return response
 
 def location_create(request):
     """
@@ -529,10 +618,6 @@ def personal_details(request):
     user_details = preferences
     return render(request, 'partials/personal_details.html', {'user_details': user_details})
 
-import logging
-
-logger = logging.getLogger(__name__)
-
 from django.shortcuts import render, redirect
 from .forms import UserDetailsForm
 from .models import UserPreference
@@ -578,8 +663,6 @@ from django.shortcuts import render, redirect
 from .models import UserPreference
 from .forms import UserDetailsForm  # Make sure you import the appropriate form
 
-logger = logging.getLogger(__name__)
-
 def update_field(request, field_name):
     logger.debug(f"Updating field: {field_name}")
     # Fetch the PersonalDetails instance
@@ -616,73 +699,120 @@ def create_workout_form_view(request):
     if request.method == "POST":
         form = WorkoutPlanForm(request.POST)
         if form.is_valid():
-            user = request.user
-            preferences = get_object_or_404(UserPreference, user=user)
-            weight_history = WeightHistory.objects.filter(user=preferences).order_by('-date')[:20]
-            workout_sessions = WorkoutSession.objects.filter(user=preferences).order_by('-date')[:15]
-            if workout_sessions is None:
-                raise ValueError("workout_data is None")
-            else:
-                print(workout_sessions)
-
-
-            # Get preferred workout type, location, and length from form or defaults
-            preferred_workout_type = form.cleaned_data.get('preferred_workout_type') or ', '.join(preferences.workout_preferences)
-            preferred_location = form.cleaned_data.get('preferred_location') or preferences.preferred_location.name
-            
-            location = Location.objects.get(name=preferred_location)
-            print(f'Preffered Location:{location}')
-            workout_length = form.cleaned_data.get('workout_length') or preferences.preferred_workout_duration
-            start_date = form.cleaned_data.get('start_date')
-            
-            # Determine plan duration in days
-            plan_duration_value = form.cleaned_data.get('plan_duration')
-            plan_duration = 1 if plan_duration_value == 'day' else 7
-
-            # Construct p = ayload text for Gemini API request
-            payload_text = workout_payload_text(
-                plan_duration_value,
-                start_date,
-                preferences,
-                preferred_workout_type,
-                workout_length,
-                location,
-                weight_history,
-                workout_sessions,
-            )
-            #print(payload_text)
-            api_key = os.getenv('GEMINI_API')
-            print(api_key)
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            print("#################payload_text###############")
-            print(payload_text)
-            response = model.generate_content(payload_text)
-            #print(response.text)
-            workout_data = convert_text_to_json(response.text)
-            # print(workout_data)
-            group_id = generate_random_id()
-            Query.objects.create(
-                group_id=group_id,
-                user=preferences,
-                query=payload_text
-            )
-            # if workout_sessions:
-            for workout in workout_data:
-                workout_session = WorkoutSession.objects.create(
-                    group_id=group_id,
-                    user=preferences,
-                    name=workout['name'],
-                    goal=workout['goal'],
-                    date=workout['date'],
-                    description=workout['explanation']
-                )
-                WarmUp.objects.create(workout=workout_session, description=workout['warm_up'])
-                CoolDown.objects.create(workout=workout_session, description=workout['cool_down'])
-                for exercise in workout['exercises']:
-                    Exercise.objects.create(workout=workout_session, **exercise)
-            return redirect('upcoming_workouts', group_id=group_id)
+            preferences = get_object_or_404(UserPreference, user=request.user)
+            # The LLM call is slow, so queue it for the worker and let the browser poll.
+            job = enqueue_generation_job(preferences, build_job_parameters(form.cleaned_data, preferences))
+            return render_generation_status(request, job)
     else:
         form = WorkoutPlanForm()
     
     return render(request, 'partials/create_workout_form.html', {'form': form})
+
+
+def render_generation_status(request, job):
+    """
+    Renders the status fragment of a running or failed job. Unless the job is
+    streamed (settings.GENERATION_EVENTS_STREAMING), the fragment lists the
+    workouts saved so far and polls generation_job_status for the rest.
+    """
+    workouts = []
+    if job.plan_id and not settings.GENERATION_EVENTS_STREAMING:
+        workouts = [serialize_workout(workout) for workout in workouts_with_details().filter(plan_id=job.plan_id).order_by('date')]
+    return render(request, 'partials/generation_status.html', {
+        'job': job,
+        'workouts': workouts,
+        'streaming': settings.GENERATION_EVENTS_STREAMING,
+    })
+
+
+@login_required
+def generation_job_status(request, job_id):
+    """
+    Polled by the status fragment while a job runs, and fetched by the waiting
+    fragment when a job's event stream ends before the job does. Redirects to
+    the new plan once the job has finished, otherwise re-renders the status
+    fragment.
+    """
+    job = get_object_or_404(GenerationJob, id=job_id, user__user=request.user)
+    if job.status == GenerationJob.STATUS_DONE:
+        response = HttpResponse()
+        response['HX-Redirect'] = reverse('upcoming_workouts', kwargs={'plan_id': job.plan_id})
+        return response
+    return render_generation_status(request, job)
+
+
+def sse_event(event, data):
+    """
+    Formats a Server-Sent Events message. Every line of the payload needs its
+    own 'data:' prefix.
+    """
+    lines = ''.join(f"data: {line}\n" for line in data.splitlines())
+    return f"event: {event}\n{lines}\n"
+
+
+def _render_new_workouts(request, plan_id, sent_ids):
+    """
+    Renders the plan's workouts that haven't been streamed yet.
+
+    Returns:
+        A list of (workout id, rendered workout partial) pairs in date order.
+    """
+    new_workouts = workouts_with_details().filter(plan_id=plan_id).exclude(id__in=sent_ids).order_by('date')
+    return [
+        (workout.id, render_to_string('partials/workout_partial.html', {
+            'workout': serialize_workout(workout),
+        }, request=request))
+        for workout in new_workouts
+    ]
+
+
+@login_required
+async def generation_job_events(request, job_id):
+    """
+    Streams a generation job to the browser as Server-Sent Events. Each
+    workout is pushed as a rendered workout partial as soon as the worker has
+    saved it, followed by a final 'done' event. A stream that outlives
+    settings.GENERATION_EVENTS_MAX_SECONDS ends with a 'done' event holding
+    the waiting fragment instead, which checks the job again and reconnects.
+
+    Only served when settings.GENERATION_EVENTS_STREAMING is on, which needs
+    the site running under ASGI: the view is async so an open stream waits
+    on the event loop rather than holding a worker thread.
+    """
+    if not settings.GENERATION_EVENTS_STREAMING:
+        raise Http404
+    user = await request.auser()
+    try:
+        job = await GenerationJob.objects.aget(id=job_id, user__user=user)
+    except GenerationJob.DoesNotExist:
+        raise Http404
+    render_new_workouts = sync_to_async(_render_new_workouts)
+    render_fragment = sync_to_async(render_to_string)
+
+    async def event_stream():
+        sent_ids = set()
+        started_at = last_sent_at = time.monotonic()
+        while True:
+            # Read the status first so no workout saved before it finished can be missed
+            await job.arefresh_from_db(fields=['status', 'plan', 'error'])
+            if job.plan_id:
+                for workout_id, html in await render_new_workouts(request, job.plan_id, sent_ids):
+                    sent_ids.add(workout_id)
+                    yield sse_event('workout', html)
+                    last_sent_at = time.monotonic()
+            if job.is_finished:
+                yield sse_event('done', await render_fragment('partials/generation_done.html', {'job': job}, request=request))
+                return
+            now = time.monotonic()
+            if now - started_at >= settings.GENERATION_EVENTS_MAX_SECONDS:
+                yield sse_event('done', await render_fragment('partials/generation_waiting.html', {'job': job}, request=request))
+                return
+            if now - last_sent_at >= GENERATION_EVENTS_KEEPALIVE_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_sent_at = now
+            await asyncio.sleep(GENERATION_EVENTS_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response